@@ -3,7 +3,7 @@ from lib.db.types import ArtifactDomain
 from lib.inngest_context import with_inngest_step, get_inngest_step_from_context
 from lib.logger import with_logger, get_logger_from_context
 from lib.inngest import inngest_client
-from lib.supabase import create_async_supabase_admin_client
+from lib.supabase import get_async_supabase_admin_client
 from lib.cluster.summarizer import ClusterSummarizer
 from api.inngest.events import ClusterArtifactsEvent, ClusterArtifactsEventData
 import inngest
@@ -28,11 +28,11 @@ async def _run_detect_article_clusters(domain_id: str):
   logger = get_logger_from_context()
   logger.info(f"Running detect article clusters for domain {domain_id}")
 
-  supabase = await create_async_supabase_admin_client()
+  supabase = await get_async_supabase_admin_client()
   await supabase.rpc("detect_article_clusters", {"target_domain_id": domain_id}).execute()
 
 async def _generate_summary_for_cluster(domain_id: str, cluster_id: str, iteration: int, min_cluster_size: int):
-  supabase = await create_async_supabase_admin_client()
+  supabase = await get_async_supabase_admin_client()
 
   summarizer = ClusterSummarizer(supabase)
   topics_summary = await summarizer.generate_summary(
@@ -47,7 +47,7 @@ async def _generate_summary_for_cluster(domain_id: str, cluster_id: str, iterati
   return topics_summary.model_dump()
 
 async def _get_cluster_summaries(domain_id: str):
-  supabase = await create_async_supabase_admin_client()
+  supabase = await get_async_supabase_admin_client()
   step = get_inngest_step_from_context()
 
   domain_response = await (
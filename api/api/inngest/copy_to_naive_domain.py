@@ -1,13 +1,15 @@
+import asyncio
 from typing import List
 from lib.db.types import Artifact, ArtifactContentInsert
 from lib.inngest_context import with_inngest_step, get_inngest_step_from_context
 from lib.logger import with_logger, get_logger_from_context
 from lib.inngest import inngest_client
-from lib.supabase import create_async_supabase_admin_client
+from lib.supabase import get_async_supabase_admin_client
 from api.inngest.events import CopyToNaiveDomainEvent, CopyToNaiveDomainEventData
 import inngest
 
 from lib.text_splitter import HierarchicalMarkdownSplitter
+from lib.crawler.tools import get_sha256_hash
 from lib.config import Settings
 
 BATCH_SIZE = 50
@@ -47,7 +49,7 @@ async def _copy_to_naive_domain(source_domain_id: str, target_domain_id: str) ->
   }
 
 async def _copy_domain_artifacts(source_domain_id: str, target_domain_id: str) -> int:
-  supabase = await create_async_supabase_admin_client()
+  supabase = await get_async_supabase_admin_client()
   artifact_response = await supabase.rpc(
     "copy_domain_artifacts",
     {
@@ -58,7 +60,7 @@ async def _copy_domain_artifacts(source_domain_id: str, target_domain_id: str) -
   return int(artifact_response.data)
 
 async def _get_artifacts(domain_id: str, page: int) -> List[Artifact]:
-  supabase = await create_async_supabase_admin_client()
+  supabase = await get_async_supabase_admin_client()
   artifact_response = await (
     supabase
     .table("artifacts")
@@ -72,7 +74,7 @@ async def _get_artifacts(domain_id: str, page: int) -> List[Artifact]:
   return [Artifact(**artifact_data) for artifact_data in artifact_response.data]
 
 async def _upsert_artifact_contents(payload: List[ArtifactContentInsert]) -> dict:
-  supabase = await create_async_supabase_admin_client()
+  supabase = await get_async_supabase_admin_client()
   artifact_content_response = await supabase.table("artifact_contents").upsert(payload, on_conflict="artifact_id,anchor_id").execute()
   return {
     "artifact_contents_processed": len(artifact_content_response.data),
@@ -82,11 +84,14 @@ async def _ingest_artifacts(domain_id: str, page: int) -> dict:
   artifacts = await _get_artifacts(domain_id, page)
   splitter = HierarchicalMarkdownSplitter(chunk_size=512)
   contents_processed = 0
-  for artifact in artifacts:
-    if artifact["parsed_text"] is None:
-      continue
-    chunks = list(splitter.split(artifact["parsed_text"]))
-    embeddings = await _embed_strings(chunks)
+  artifact_chunks = [
+    (artifact, list(splitter.split(parsed_text)))
+    for artifact in artifacts
+    if (parsed_text := artifact["parsed_text"]) is not None
+  ]
+  # Embedding the page's artifacts concurrently lets the batcher send them in shared requests
+  artifact_embeddings = await asyncio.gather(*[_embed_strings(chunks) for _, chunks in artifact_chunks])
+  for (artifact, chunks), embeddings in zip(artifact_chunks, artifact_embeddings):
     upsert_payload = [
       ArtifactContentInsert(
         artifact_id=artifact["artifact_id"],
@@ -96,6 +101,7 @@ async def _ingest_artifacts(domain_id: str, page: int) -> dict:
         summary_embedding=str(embedding),
         title=chunk.splitlines()[0].strip(),
         anchor_id=str(i),
+        content_sha256=get_sha256_hash(chunk),
       )
       for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
     ]
@@ -107,15 +113,15 @@ async def _ingest_artifacts(domain_id: str, page: int) -> dict:
   }
 
 async def _embed_strings(texts: List[str]) -> List[List[float]]:
-  from lib.nomic import NomicEmbeddings
+  from lib.nomic import get_embedding_batcher
 
   nomic_api_key = settings.nomic_api_key
   assert nomic_api_key is not None, "NOMIC_API_KEY is not set"
-  embedding_client = NomicEmbeddings(api_key=nomic_api_key)
-  embeddings = await embedding_client.embed_texts(
-    texts=texts,
+  embedding_batcher = get_embedding_batcher(
+    nomic_api_key,
     model='nomic-embed-text-v1.5',
     task_type="search_document",
   )
+  embeddings = await embedding_batcher.embed_texts(texts)
 
   return embeddings.embeddings
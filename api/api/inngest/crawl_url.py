@@ -1,22 +1,30 @@
 from lib.inngest_context import with_inngest_step
 from lib.logger import with_logger
 from lib.inngest import inngest_client
+from lib.supabase import with_supabase_roundtrip_counter
 from lib.crawler.crawler import run_crawl_url
 from api.inngest.events import CrawlRequestedEvent
 import inngest
 
+CRAWL_URL_CONCURRENCY = 20
+
 @inngest_client.create_function(
   fn_id="crawl",
   trigger=inngest.TriggerEvent(event=CrawlRequestedEvent.name),
   concurrency=[
-    inngest.Concurrency(limit=20),
+    inngest.Concurrency(limit=CRAWL_URL_CONCURRENCY),
     inngest.Concurrency(scope="account", limit=1, key="event.data.url")
   ],
 )
 async def crawl_url(ctx: inngest.Context, step: inngest.Step):
   event = CrawlRequestedEvent.from_event(ctx.event)
 
-  with with_logger(ctx.logger), with_inngest_step(step):
-    return await run_crawl_url(
+  with with_logger(ctx.logger), with_inngest_step(step), with_supabase_roundtrip_counter() as roundtrips:
+    result = await run_crawl_url(
       event.data,
     )
+    ctx.logger.info(f"Crawl of {event.data.url} made {roundtrips.count} Supabase roundtrips: {dict(roundtrips.by_path)}")
+    return {
+      **result,
+      "supabase_roundtrips": roundtrips.count,
+    }
@@ -0,0 +1,27 @@
+from lib.inngest_context import with_inngest_step
+from lib.logger import with_logger
+from lib.inngest import inngest_client
+from lib.supabase import with_supabase_roundtrip_counter
+from lib.crawler.crawler import run_enrich_artifact
+from api.inngest.events import EnrichArtifactEvent
+import inngest
+
+@inngest_client.create_function(
+  fn_id="enrich_artifact",
+  trigger=inngest.TriggerEvent(event=EnrichArtifactEvent.name),
+  concurrency=[
+    inngest.Concurrency(limit=10),
+    inngest.Concurrency(scope="account", limit=1, key="event.data.artifact_id")
+  ],
+)
+async def enrich_artifact(ctx: inngest.Context, step: inngest.Step):
+  event = EnrichArtifactEvent.from_event(ctx.event)
+
+  with with_logger(ctx.logger), with_inngest_step(step), with_supabase_roundtrip_counter() as roundtrips:
+    result = await run_enrich_artifact(
+      event.data,
+    )
+    return {
+      **result,
+      "supabase_roundtrips": roundtrips.count,
+    }
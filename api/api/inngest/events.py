@@ -28,16 +28,43 @@ class CrawlRequestedEventData(BaseModel):
   url: str = Field(description="The URL to crawl")
   crawl_depth: int = Field(description="The depth of the crawl")
   domain_id: str = Field(description="The ID of the domain to crawl")
+  reprocess_from_cache: bool = Field(
+    default=False,
+    description="Re-run splitting and extraction of a scraped page from the HTML cache without fetching it",
+  )
+  refresh: bool = Field(
+    default=False,
+    description="Re-fetch a scraped page with a conditional request and reprocess it only if it changed",
+  )
 
 class CrawlRequestedEvent(BaseEvent[CrawlRequestedEventData]):
   name: ClassVar[str] = "app/url.added"
 
+class EnrichArtifactEventData(BaseModel):
+  artifact_id: str = Field(description="The ID of the scraped artifact to enrich")
+  domain_id: str = Field(description="The ID of the domain of the artifact")
+
+class EnrichArtifactEvent(BaseEvent[EnrichArtifactEventData]):
+  name: ClassVar[str] = "app/artifact.scraped"
+
 class ResumeCrawlEventData(BaseModel):
   domain_id: str = Field(description="The ID of the domain to crawl")
 
 class ResumeCrawlEvent(BaseEvent[ResumeCrawlEventData]):
   name: ClassVar[str] = "app/crawl.resume"
 
+class ReprocessDomainEventData(BaseModel):
+  domain_id: str = Field(description="The ID of the domain to reprocess")
+
+class ReprocessDomainEvent(BaseEvent[ReprocessDomainEventData]):
+  name: ClassVar[str] = "app/domain.reprocess"
+
+class RefreshDomainEventData(BaseModel):
+  domain_id: str = Field(description="The ID of the domain to refresh")
+
+class RefreshDomainEvent(BaseEvent[RefreshDomainEventData]):
+  name: ClassVar[str] = "app/domain.refresh"
+
 class ClusterArtifactsEventData(BaseModel):
   domain_id: str = Field(description="The ID of the domain to crawl")
 
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
+from lib.lifespan import worker_lifespan
 from .serve import serve_inngest
 
-app = FastAPI()
+app = FastAPI(lifespan=worker_lifespan)
 serve_inngest(app)
 
@@ -0,0 +1,104 @@
+from typing import List
+from lib.inngest_context import with_inngest_step, get_inngest_step_from_context
+from lib.logger import with_logger
+from lib.inngest import inngest_client
+from lib.supabase import get_async_supabase_admin_client
+from api.inngest.events import (
+  CrawlRequestedEvent,
+  CrawlRequestedEventData,
+  RefreshDomainEvent,
+  ReprocessDomainEvent,
+)
+import inngest
+
+@inngest_client.create_function(
+  fn_id="reprocess_domain",
+  trigger=inngest.TriggerEvent(event=ReprocessDomainEvent.name),
+  concurrency=[
+    inngest.Concurrency(limit=1),
+  ],
+)
+async def reprocess_domain(ctx: inngest.Context, step: inngest.Step):
+  """Re-run splitting and extraction of every scraped page of a domain from the HTML cache."""
+  event = ReprocessDomainEvent.from_event(ctx.event)
+  with with_logger(ctx.logger), with_inngest_step(step):
+    return await _recrawl_scraped_artifacts(step, event.data.domain_id, "reprocess", reprocess_from_cache=True)
+
+@inngest_client.create_function(
+  fn_id="refresh_domain",
+  trigger=inngest.TriggerEvent(event=RefreshDomainEvent.name),
+  concurrency=[
+    inngest.Concurrency(limit=1),
+  ],
+)
+async def refresh_domain(ctx: inngest.Context, step: inngest.Step):
+  """Re-fetch every scraped page of a domain, reprocessing only the pages that changed."""
+  event = RefreshDomainEvent.from_event(ctx.event)
+  with with_logger(ctx.logger), with_inngest_step(step):
+    return await _recrawl_scraped_artifacts(step, event.data.domain_id, "refresh", refresh=True)
+
+async def _recrawl_scraped_artifacts(
+  step: inngest.Step,
+  domain_id: str,
+  step_prefix: str,
+  reprocess_from_cache: bool = False,
+  refresh: bool = False,
+) -> dict:
+  batch_size = 100
+  page = 0
+  total_sent_events : List[str] = []
+
+  while True:
+    sent_events = await step.run(
+      f"{step_prefix}_batch_{page}",
+      lambda: _recrawl_batch(domain_id, page, batch_size, step_prefix, reprocess_from_cache, refresh),
+    )
+    total_sent_events.extend(sent_events)
+    if len(sent_events) < batch_size:
+      break
+    page += 1
+
+  return {
+    "sent_events": total_sent_events,
+  }
+
+async def _recrawl_batch(
+  domain_id: str,
+  page: int,
+  batch_size: int,
+  step_prefix: str,
+  reprocess_from_cache: bool,
+  refresh: bool,
+) -> List[str]:
+  supabase = await get_async_supabase_admin_client()
+  scraped_artifacts = await (
+    supabase
+      .table("artifacts")
+      .select("*")
+      .eq("domain_id", domain_id)
+      .eq("crawl_status", "scraped")
+      .is_("crawled_as_artifact_id", None)
+      .order("artifact_id")
+      .range(page * batch_size, (page + 1) * batch_size - 1)
+      .execute()
+  )
+
+  if not scraped_artifacts.data:
+    return []
+
+  event_to_send: List[inngest.Event] = [
+    CrawlRequestedEvent(
+      data=CrawlRequestedEventData(
+        url=artifact["url"],
+        domain_id=artifact["domain_id"],
+        crawl_depth=artifact["crawl_depth"],
+        reprocess_from_cache=reprocess_from_cache,
+        refresh=refresh,
+      )
+    ).to_event()
+    for artifact in scraped_artifacts.data
+  ]
+
+  step = get_inngest_step_from_context()
+
+  return await step.send_event(f"send_{step_prefix}_events_batch_{page}", event_to_send)
@@ -2,7 +2,8 @@ from typing import List
 from lib.inngest_context import with_inngest_step, get_inngest_step_from_context
 from lib.logger import with_logger
 from lib.inngest import inngest_client
-from lib.supabase import create_async_supabase_admin_client
+from lib.supabase import get_async_supabase_admin_client
+from lib.crawler.frontier import CrawlFrontier
 from api.inngest.events import ResumeCrawlEvent, CrawlRequestedEvent, CrawlRequestedEventData
 import inngest
 
@@ -20,6 +21,12 @@ async def resume_crawl(ctx: inngest.Context, step: inngest.Step):
     page = 0
     total_sent_events : List[str] = []
 
+    # Resumed crawls re-expand links that the previous frontier would drop
+    await step.run(
+      "clear_crawl_frontier",
+      lambda: _clear_crawl_frontier(event.data.domain_id),
+    )
+
     while True:
       sent_events = await step.run(
         f"crawl_url_batch_{page}",
@@ -34,8 +41,12 @@ async def resume_crawl(ctx: inngest.Context, step: inngest.Step):
       "sent_events": total_sent_events,
     }
 
+async def _clear_crawl_frontier(domain_id: str) -> None:
+  supabase = await get_async_supabase_admin_client()
+  await CrawlFrontier(supabase, domain_id).clear()
+
 async def _crawl_url_batch(domain_id: str, page: int, batch_size: int) -> List[str]:
-  supabase = await create_async_supabase_admin_client()
+  supabase = await get_async_supabase_admin_client()
   unfinished_artifacts = await (
     supabase
       .table("artifacts")
@@ -2,7 +2,9 @@ import inngest.fast_api
 from fastapi import FastAPI
 from lib.inngest import inngest_client
 from .crawl_url import crawl_url
+from .enrich_artifact import enrich_artifact
 from .resume_crawl import resume_crawl
+from .reprocess_domain import reprocess_domain, refresh_domain
 from .cluster_artifacts import cluster_artifacts
 from .copy_to_naive_domain import copy_to_naive_domain
 
@@ -10,6 +12,6 @@ def serve_inngest(app: FastAPI):
   inngest.fast_api.serve(
   app,
   inngest_client,
-  [crawl_url, resume_crawl, cluster_artifacts, copy_to_naive_domain],
+  [crawl_url, enrich_artifact, resume_crawl, reprocess_domain, refresh_domain, cluster_artifacts, copy_to_naive_domain],
   serve_path="/api/inngest",
 )
@@ -2,8 +2,9 @@ from fastapi import FastAPI
 from api.chat.router import router as chat_router
 from api.inngest.serve import serve_inngest
 from lib.middleware import SupabaseContextMiddleware
+from lib.lifespan import worker_lifespan
 
-app = FastAPI()
+app = FastAPI(lifespan=worker_lifespan)
 app.add_middleware(SupabaseContextMiddleware)
 
 app.include_router(chat_router, prefix="/api/chat")
@@ -1,6 +1,25 @@
 from typing import Optional, Mapping
 import litellm
 
+from lib.config import Settings
+from lib.fake_llm import fake_acompletion
+from lib.llm_limiter import estimate_tokens, get_llm_limiter
+
+settings = Settings()
+
+class RateLimitedCompletions:
+    """Send agent completions through the process-wide LLM rate limiter."""
+
+    def __init__(self, completions):
+        self.completions = completions
+
+    async def create(self, **kwargs):
+        # Streamed responses hold their slot until the stream starts, not until it ends
+        async with get_llm_limiter().limit(estimate_tokens(kwargs.get("messages") or [])):
+            if settings.llm_backend == "fake":
+                return await fake_acompletion(**kwargs)
+            return await self.completions.create(**kwargs)
+
 class AsyncLiteLLM:
     def __init__(
         self,
@@ -15,3 +34,4 @@ class AsyncLiteLLM:
         self.params = locals()
         self.params['acompletion'] = True
         self.chat = litellm.Chat(self.params, router_obj=None)
+        self.chat.completions = RateLimitedCompletions(self.chat.completions)  # type: ignore
@@ -1,13 +1,15 @@
 from typing import Any, Coroutine, List, Dict, Optional, Sequence, TypedDict, cast
 import asyncio
 
-from litellm import Message, acompletion, Choices
+from litellm import Message, Choices
 from litellm.types.utils import ModelResponse
 from pydantic import BaseModel, Field
 
 from supabase import AsyncClient
 
 from lib.db.types import TopLevelCluster
+from lib.fake_llm import get_acompletion
+from lib.llm_limiter import estimate_tokens, get_llm_limiter
 
 class SampledArtifact(TypedDict):
   artifact_id: str
@@ -192,20 +194,25 @@ Articles or article summaries:
 
 Higher-level summary:"""
 
-    response = await acompletion(
-      model=self.llm_model,
-      api_key=self.llm_api_key,
-      messages=[
-        {
-          "role": "user",
-          "content": prompt
-        }
-      ],
-      temperature=0.7,
-      response_format=TopicSummary
-    )
+    messages = [
+      {
+        "role": "user",
+        "content": prompt
+      }
+    ]
+    llm_limiter = get_llm_limiter()
+    estimated_tokens = estimate_tokens(messages)
+    async with llm_limiter.limit(estimated_tokens):
+      response = await get_acompletion()(
+        model=self.llm_model,
+        api_key=self.llm_api_key,
+        messages=messages,
+        temperature=0.7,
+        response_format=TopicSummary
+      )
 
     assert isinstance(response, ModelResponse)
+    llm_limiter.record_usage(estimated_tokens, getattr(getattr(response, "usage", None), "total_tokens", None))
     assert isinstance(response.choices, list)
     assert isinstance(response.choices[0], Choices)
     assert isinstance(response.choices[0].message, Message)
@@ -9,7 +9,31 @@ class Settings(BaseSettings):
   groq_api_key: str = ""
   agent_llm_model: str = ""
   nomic_api_key: str = ""
+  # Nomic prices embeddings per token. Set this to the plan's price to include them in crawl costs
+  embedding_cost_per_million_tokens: float = 0.0
+  embedding_cache_memory_entries: int = 2000
+  embedding_cache_persistent: bool = True
   scraping_fish_api_key: str = ""
+  # Connections to one API host, such as ScrapingFish or Nomic, in the shared HTTP session. Keep
+  # it at or above the crawl_url concurrency so concurrent crawls do not queue for connections
+  http_connection_limit_per_host: int = 32
+  html_parse_workers: int = 0
+  html_cache_dir: str = ""
+  html_cache_ttl_seconds: int = 7 * 24 * 60 * 60
+  html_cache_max_bytes: int = 2 * 1024 * 1024 * 1024
+  llm_cache_path: str = ""
+  llm_cache_ttl_seconds: int = 30 * 24 * 60 * 60
+  llm_cache_max_entries: int = 200_000
+  llm_tokens_per_minute: int = 2_000_000
+  llm_max_concurrency: int = 64
+  llm_initial_concurrency: int = 16
+  # "litellm" calls the providers, "fake" answers offline for benchmarks and load tests
+  llm_backend: str = "litellm"
+  fake_llm_latency_median_ms: float = 800
+  fake_llm_latency_sigma: float = 0.5
+  fake_llm_completion_tokens: int = 300
+  fake_llm_rate_limit_probability: float = 0.0
+  fake_llm_seed: int = 0
 
   model_config = SettingsConfigDict(env_file=".env", extra="allow")
 
@@ -0,0 +1,43 @@
+from typing import Dict, Iterable
+
+from supabase import AsyncClient
+
+from lib.db.types import BoilerplateSection
+
+BOILERPLATE_MIN_OCCURRENCES = 3
+
+class SectionRegistry:
+  """
+  Per-domain count of the pages each section content hash appears on.
+
+  `commit_crawl_result` maintains the counts and keeps the first summary, metadata and embedding
+  stored for every section. Sections found on at least `min_occurrences` pages (navigation,
+  footers, feedback widgets) reuse those instead of going through the LLM and Nomic again.
+  """
+
+  def __init__(self, supabase: AsyncClient, domain_id: str):
+    self.supabase = supabase
+    self.domain_id = domain_id
+
+  async def get_boilerplate_sections(
+    self,
+    content_hashes: Iterable[str],
+    min_occurrences: int = BOILERPLATE_MIN_OCCURRENCES,
+  ) -> Dict[str, BoilerplateSection]:
+    """Return the registered sections among `content_hashes` seen on `min_occurrences` pages or more."""
+    content_hashes = sorted(set(content_hashes))
+    if not content_hashes:
+      return {}
+
+    response = await self.supabase.rpc(
+      "get_boilerplate_sections",
+      {
+        "target_domain_id": self.domain_id,
+        "content_hashes": content_hashes,
+        "min_occurrences": min_occurrences,
+      },
+    ).execute()
+    return {
+      section["content_sha256"]: BoilerplateSection(section)
+      for section in response.data or []
+    }
@@ -1,20 +1,26 @@
 import os
-import re
-from typing import List, Protocol, TypeAlias, cast, Optional, Any
+from typing import Collection, Dict, List, Protocol, Set, Tuple, TypeAlias, cast, Optional, Any
 
 import inngest
 from lib.inngest_context import get_inngest_step_from_context
 
+from lib.config import Settings
 from lib.db.types import (
   Artifact,
+  ArtifactCommit,
   ArtifactContent,
-  ArtifactContentInsert,
+  ArtifactContentCommit,
+  ArtifactContentLinkCommit,
   ArtifactDomain,
   ArtifactLink,
-  ArtifactLinkInsert,
+  ArtifactScrape,
+  BoilerplateSection,
+  CrawlResultCommit,
+  CrawlUsageCommit,
   DomainConfig,
 )
 from lib.metadata import ArtifactMetadata
+from lib.nomic import NomicEmbeddingResult
 from lib.scraper import (
   WebScraper,
   DataExtractor,
@@ -22,12 +28,27 @@ from lib.scraper import (
   ScrapingConfig,
   WebScraperResult,
 )
-from lib.scraper.types import PageDataExtractionResult, ScrapedContent
-from lib.supabase import create_async_supabase_admin_client
+from lib.scraper.html_cache import HtmlCacheMissError
+from lib.scraper.types import (
+  HttpValidators,
+  PageDataExtractionResult,
+  ScrapedContent,
+  SectionDataExtractionResult,
+)
+from lib.supabase import get_async_supabase_admin_client
 from lib.logger import get_logger_from_context
 
-from api.inngest.events import CrawlRequestedEvent, CrawlRequestedEventData
+from api.inngest.events import (
+  CrawlRequestedEvent,
+  CrawlRequestedEventData,
+  EnrichArtifactEvent,
+  EnrichArtifactEventData,
+)
 from .tools import get_sha256_hash
+from .url_patterns import UrlPatternMatcher
+from .frontier import CrawlFrontier
+from .sections import SectionIndex
+from .boilerplate import BOILERPLATE_MIN_OCCURRENCES, SectionRegistry
 
 MetadataExtractionResponse : TypeAlias = PageDataExtractionResult[ArtifactMetadata, ArtifactMetadata]
 class ScheduleCrawlFunction(Protocol):
@@ -36,6 +57,8 @@ class ScheduleCrawlFunction(Protocol):
 
 MAX_CRAWL_DEPTH = 5
 
+settings = Settings()
+
 async def run_crawl_url(
   crawl_request: CrawlRequestedEventData
 ):
@@ -45,7 +68,7 @@ async def run_crawl_url(
   logger = get_logger_from_context()
 
   # Validate and get domain config
-  artifact_domain = await _get_domain(crawl_request)
+  artifact_domain = await _get_domain(crawl_request.domain_id)
   config = artifact_domain["config"]
 
   if not config:
@@ -61,7 +84,8 @@ async def run_crawl_url(
     return {"message": "Domain does not have any allowed URL patterns, skipping"}
 
   # Check if URL matches allowed URL patterns
-  if not any(re.match(pattern, crawl_request.url) for pattern in config.get("allowed_url_patterns", [])):
+  url_matcher = UrlPatternMatcher.from_domain_config(config)
+  if not url_matcher.matches(crawl_request.url):
     logger.info(f"URL {crawl_request.url} does not match any allowed URL patterns")
     return {"message": "URL does not match any allowed URL patterns, skipping"}
 
@@ -72,19 +96,29 @@ async def run_crawl_url(
     logger.info(f"Crawl depth {crawl_request.crawl_depth} is greater than max crawl depth {max_crawl_depth}, skipping")
     return {"message": "Crawl depth is greater than max crawl depth, skipping"}
 
+  if crawl_request.reprocess_from_cache:
+    return await _reprocess_from_cache(crawl_request, scraping_config, url_matcher, config)
+
   # Check for existing artifact
   existing_artifact = await _get_existing_artifact(crawl_request.url, crawl_request.domain_id)
+  if existing_artifact and crawl_request.refresh and _is_own_scraped_artifact(existing_artifact):
+    return await _refresh_artifact(existing_artifact, crawl_request, scraping_config, url_matcher, config, max_crawl_depth)
+
   if existing_artifact:
-    return await _process_existing_artifact(
+    result = await _process_existing_artifact(
       existing_artifact,
       crawl_request,
       config,
     )
+    # An artifact still being enriched is recorded once its enrichment commits
+    if existing_artifact["crawl_status"] == "scraped":
+      await _mark_crawl_frontier(crawl_request, max_crawl_depth)
+    return result
 
   # Create new artifact and scrape
   upserted_artifact = await _create_new_artifact(crawl_request)
   try:
-    scrape_response = await _perform_scraping(crawl_request.url, scraping_config)
+    scrape_response = await _perform_scraping(crawl_request.url, scraping_config, url_matcher)
     if not scrape_response.page_content:
       raise inngest.NonRetriableError("No page content found")
 
@@ -100,45 +134,76 @@ async def run_crawl_url(
         scrape_response,
         duplicate_artifact,
       )
+      await _mark_crawl_frontier(crawl_request, max_crawl_depth)
       return await _process_existing_artifact(
         duplicate_artifact,
         crawl_request,
         config,
       )
-    extraction_response = await _extract_data(scrape_response)
 
+    if config.get("discovery_mode"):
+      # Expand the frontier right away and leave LLM work to enrich_artifact
+      return await _discover_links(
+        upserted_artifact,
+        scrape_response,
+        crawl_request,
+        config,
+      )
 
-    # Process sections and embeddings
-    updated_artifact_contents = await _process_artifact_sections(
-      upserted_artifact,
-      scrape_response,
-      extraction_response
-    )
+    committed_result = await _extract_and_commit(upserted_artifact, scrape_response, config)
+    await _mark_crawl_frontier(crawl_request, max_crawl_depth)
 
     # Process links
-    crawl_links_response = await _crawl_links(
-      updated_artifact_contents,
-      scrape_response,
+    event_ids = await _schedule_link_crawls(
+      [link["target_url"] for link in committed_result["artifact_links"]],
       crawl_request,
-      artifact_domain["config"],
-    )
-
-    # Save data related to the artifact
-    updated_article = await _save_artifact_data(
-      upserted_artifact,
-      scrape_response,
-      extraction_response
     )
 
     return {
-      "artifact": updated_article,
-      **crawl_links_response
+      "artifact": committed_result["artifact"],
+      "crawl_event_ids": event_ids,
+      "insert_ids": committed_result["artifact_links"],
     }
   except Exception as e:
     logger.error(f"Error processing crawl request {crawl_request.url}: {e}")
     await _mark_artifact_as_crawl_failed(upserted_artifact)
     raise e
 
+async def run_enrich_artifact(
+  enrich_request: EnrichArtifactEventData
+):
+  """Summarize, extract and embed an artifact scraped in discovery mode, then commit it."""
+  logger = get_logger_from_context()
+
+  artifact_scrape = await _get_artifact_scrape(enrich_request.artifact_id)
+  if not artifact_scrape:
+    logger.info(f"Artifact {enrich_request.artifact_id} has no pending scrape, skipping")
+    return {"message": "Artifact has no pending scrape, skipping"}
+
+  artifact_domain = await _get_domain(enrich_request.domain_id)
+  artifact = await _get_artifact(enrich_request.artifact_id)
+  scrape_response = WebScraperResult.model_validate(artifact_scrape["scrape_result"])
+  try:
+    committed_result = await _extract_and_commit(artifact, scrape_response, artifact_domain["config"])
+    _, max_crawl_depth = _get_domain_configs(artifact_domain)
+    await _mark_crawl_frontier(
+      CrawlRequestedEventData(
+        url=artifact["url"],
+        crawl_depth=artifact["crawl_depth"],
+        domain_id=artifact["domain_id"],
+      ),
+      max_crawl_depth,
+    )
+
+    return {
+      "artifact": committed_result["artifact"],
+      "insert_ids": committed_result["artifact_links"],
+    }
+  except Exception as e:
+    logger.error(f"Error enriching artifact {artifact['url']}: {e}")
+    await _mark_artifact_as_crawl_failed(artifact)
+    raise e
+
 async def _schedule_crawl(step_id: str, crawl_request: CrawlRequestedEventData | List[CrawlRequestedEventData]) -> List[str]:
   step = get_inngest_step_from_context()
   logger = get_logger_from_context()
@@ -153,40 +218,39 @@ async def _schedule_crawl(step_id: str, crawl_request: CrawlRequestedEventData |
     ]
   return await step.send_event(step_id, events)
 
-async def _embed_strings(texts: List[str]) -> List[List[float]]:
-  from lib.nomic import NomicEmbeddings
+async def _embed_strings(texts: List[str]) -> NomicEmbeddingResult:
+  from lib.nomic import get_embedding_batcher
 
   nomic_api_key = os.getenv("NOMIC_API_KEY")
   assert nomic_api_key is not None, "NOMIC_API_KEY is not set"
-  embedding_client = NomicEmbeddings(api_key=nomic_api_key)
-  embeddings = await embedding_client.embed_texts(
-    texts=texts,
+  # Sections of concurrent crawls share embedding requests
+  embedding_batcher = get_embedding_batcher(
+    nomic_api_key,
     model='nomic-embed-text-v1.5',
     task_type="search_document",
   )
+  return await embedding_batcher.embed_texts(texts)
 
-  return embeddings.embeddings
-
-async def _get_domain(crawl_request: CrawlRequestedEventData) -> ArtifactDomain:
-  admin_supabase = await create_async_supabase_admin_client()
+async def _get_domain(domain_id: str) -> ArtifactDomain:
+  admin_supabase = await get_async_supabase_admin_client()
   logger = get_logger_from_context()
   crawl_domain_response = await (
     admin_supabase
     .table("artifact_domains")
     .select("*")
-    .eq("id", crawl_request.domain_id)
+    .eq("id", domain_id)
     .maybe_single()
     .execute()
   )
 
   if not crawl_domain_response:
-    logger.info(f"Domain {crawl_request.domain_id} not found")
-    raise Exception(f"Domain {crawl_request.domain_id} not found")
+    logger.info(f"Domain {domain_id} not found")
+    raise Exception(f"Domain {domain_id} not found")
 
   artifact_domain = cast(ArtifactDomain, crawl_domain_response.data)
   if not artifact_domain.get("config"):
-    logger.info(f"Domain {crawl_request.domain_id} does not have a crawl config")
-    raise Exception(f"Domain {crawl_request.domain_id} does not have a crawl config")
+    logger.info(f"Domain {domain_id} does not have a crawl config")
+    raise Exception(f"Domain {domain_id} does not have a crawl config")
 
   return artifact_domain
 
@@ -198,68 +262,174 @@ def _get_domain_configs(artifact_domain: ArtifactDomain) -> tuple[ScrapingConfig
   max_crawl_depth = artifact_domain["config"].get("max_crawl_depth", MAX_CRAWL_DEPTH)
   return scraping_config, max_crawl_depth
 
-async def _extract_data(scrape_response: WebScraperResult) -> MetadataExtractionResponse:
+async def _extract_data(
+  scrape_response: WebScraperResult,
+  section_indexes: Optional[Collection[int]] = None,
+) -> MetadataExtractionResponse:
   data_extractor = DataExtractor(
     model="openai/gpt-4o-mini",
     model_api_key=os.getenv("OPENAI_API_KEY"),
   )
 
-  return await data_extractor.async_extract_from_scraped_data(
+  extraction_response = await data_extractor.async_extract_from_scraped_data(
     scrape_response,
     DataExtractorConfig(
       section_extraction_schema=ArtifactMetadata,
       section_extraction_prompt="Extract the title, summary, and main_sections.",
       page_extraction_schema=ArtifactMetadata,
       page_extraction_prompt="Extract the title, summary, and main_sections.",
-    )
+      combined_extraction=True,
+      section_batch_token_budget=4000,
+      max_content_tokens=12000,
+    ),
+    section_indexes,
+  )
+  usage = extraction_response.usage
+  get_logger_from_context().info(
+    f"Extracted {scrape_response.url} with {usage.requests} LLM requests, "
+    f"{usage.prompt_tokens} prompt tokens ({usage.cached_prompt_tokens} cached), "
+    f"{usage.completion_tokens} completion tokens and {usage.cached_responses} cached responses"
   )
+  return extraction_response
 
-async def _save_artifact_data(
+async def _save_artifact_data_with_duplicate(
   artifact: Artifact,
   scrape_response: WebScraperResult,
-  extraction_response: MetadataExtractionResponse
+  duplicate_artifact: Artifact,
 ) -> Artifact:
-  admin_supabase = await create_async_supabase_admin_client()
+  admin_supabase = await get_async_supabase_admin_client()
   content_hash = get_sha256_hash(scrape_response.page_content)
   updated_article_response = await admin_supabase\
     .table("artifacts")\
     .update({
       "crawl_status": "scraped",
-      "metadata": extraction_response.whole_page_data.model_dump(mode='json'),
+      "metadata": duplicate_artifact["metadata"],
       "parsed_text": scrape_response.page_content,
-      "summary": extraction_response.whole_page_summary,
-      "title": scrape_response.page_title,
+      "summary": duplicate_artifact["summary"],
+      "title": duplicate_artifact["title"],
       "content_sha256": content_hash,
-      "crawled_as_artifact_id": None,
+      "crawled_as_artifact_id": duplicate_artifact["artifact_id"],
     })\
     .eq("artifact_id", artifact["artifact_id"])\
     .execute()
 
   return Artifact(updated_article_response.data[0])
 
-async def _save_artifact_data_with_duplicate(
+async def _reprocess_from_cache(
+  crawl_request: CrawlRequestedEventData,
+  scraping_config: ScrapingConfig,
+  url_matcher: UrlPatternMatcher,
+  config: DomainConfig,
+) -> dict:
+  """
+  Re-run section splitting and extraction of a scraped page from the HTML cache.
+
+  Nothing is fetched and no outbound links are crawled, so a domain can be reprocessed after a
+  scraping or extraction config change with zero network fetches.
+  """
+  logger = get_logger_from_context()
+  artifact = await _get_existing_artifact(crawl_request.url, crawl_request.domain_id)
+  if not artifact or not _is_own_scraped_artifact(artifact):
+    logger.info(f"{crawl_request.url} has no scraped artifact of its own, skipping")
+    return {"message": "No scraped artifact to reprocess, skipping"}
+
+  try:
+    scrape_response = await _perform_scraping(crawl_request.url, scraping_config, url_matcher, cache_only=True)
+  except HtmlCacheMissError:
+    logger.info(f"{crawl_request.url} is not in the HTML cache, skipping")
+    return {"message": "Page is not in the HTML cache, skipping"}
+
+  committed_result = await _extract_and_commit(artifact, scrape_response, config)
+  return {
+    "artifact": committed_result["artifact"],
+    "insert_ids": committed_result["artifact_links"],
+  }
+
+async def _refresh_artifact(
   artifact: Artifact,
-  scrape_response: WebScraperResult,
-  duplicate_artifact: Artifact,
-) -> Artifact:
-  admin_supabase = await create_async_supabase_admin_client()
-  content_hash = get_sha256_hash(scrape_response.page_content)
-  updated_article_response = await admin_supabase\
+  crawl_request: CrawlRequestedEventData,
+  scraping_config: ScrapingConfig,
+  url_matcher: UrlPatternMatcher,
+  config: DomainConfig,
+  max_crawl_depth: int,
+) -> dict:
+  """
+  Re-fetch a scraped page with a conditional request and redo the pipeline only if it changed.
+
+  The fetch, the comparison and the commit run in one step, so the function's replay after the
+  outbound crawls are sent reuses the committed result instead of fetching the page again.
+  """
+  step = get_inngest_step_from_context()
+  committed_result = await step.run(
+    "refresh-artifact",
+    lambda: _refresh_changed_artifact(artifact, crawl_request, scraping_config, url_matcher, config),
+  )
+  await _mark_crawl_frontier(crawl_request, max_crawl_depth)
+  if committed_result is None:
+    return {"message": "Page not modified, skipping"}
+
+  event_ids = await _schedule_link_crawls(
+    [link["target_url"] for link in committed_result["artifact_links"]],
+    crawl_request,
+  )
+  return {
+    "artifact": committed_result["artifact"],
+    "crawl_event_ids": event_ids,
+    "insert_ids": committed_result["artifact_links"],
+  }
+
+async def _refresh_changed_artifact(
+  artifact: Artifact,
+  crawl_request: CrawlRequestedEventData,
+  scraping_config: ScrapingConfig,
+  url_matcher: UrlPatternMatcher,
+  config: DomainConfig,
+) -> Optional[CrawlResultCommit]:
+  """
+  Fetch the page with the artifact's ETag and Last-Modified as `If-None-Match` /
+  `If-Modified-Since` and commit it if it changed. A 304, or a page whose converted content
+  hashes to the stored `content_sha256`, skips extraction, embedding and link rewriting and
+  returns None.
+  """
+  logger = get_logger_from_context()
+  scraper = _create_scraper()
+  page = await scraper.async_fetch_page(
+    crawl_request.url,
+    HttpValidators(etag=artifact["http_etag"], last_modified=artifact["http_last_modified"]),
+  )
+  if page.not_modified or page.content is None:
+    logger.info(f"{crawl_request.url} has not been modified since the last crawl")
+    return None
+
+  scrape_response = await scraper.async_scrape_html(
+    crawl_request.url,
+    page.content,
+    scraping_config,
+    url_matcher.patterns,
+    page.validators,
+  )
+  if get_sha256_hash(scrape_response.page_content) == artifact["content_sha256"]:
+    logger.info(f"Content of {crawl_request.url} is unchanged since the last crawl")
+    await _update_http_validators(artifact, page.validators)
+    return None
+
+  return await _extract_and_commit(artifact, scrape_response, config)
+
+def _is_own_scraped_artifact(artifact: Artifact) -> bool:
+  """Whether the artifact was scraped itself, rather than pending or copied from a duplicate."""
+  return artifact["crawl_status"] == "scraped" and not artifact["crawled_as_artifact_id"]
+
+async def _update_http_validators(artifact: Artifact, validators: HttpValidators) -> None:
+  admin_supabase = await get_async_supabase_admin_client()
+  await admin_supabase\
     .table("artifacts")\
     .update({
-      "crawl_status": "scraped",
-      "metadata": duplicate_artifact["metadata"],
-      "parsed_text": scrape_response.page_content,
-      "summary": duplicate_artifact["summary"],
-      "title": duplicate_artifact["title"],
-      "content_sha256": content_hash,
-      "crawled_as_artifact_id": duplicate_artifact["artifact_id"],
+      "http_etag": validators.etag,
+      "http_last_modified": validators.last_modified,
     })\
     .eq("artifact_id", artifact["artifact_id"])\
     .execute()
 
-  return Artifact(updated_article_response.data[0])
-
 async def _process_existing_artifact(
   existing_artifact: Artifact,
   base_crawl_event: CrawlRequestedEventData,
@@ -276,13 +446,13 @@ async def _process_existing_artifact(
     logger.info(f"Artifact {existing_artifact['url']} has already been processed at depth {existing_artifact['crawl_depth']}")
     return {"data": existing_artifact}
 
-  if not existing_artifact["crawl_status"] in ["scraped"]:
+  if existing_artifact["crawl_status"] not in ["scraped", "enriching"]:
     logger.info(f"Artifact {existing_artifact['url']} has not been scraped, skipping")
-    raise Exception(f"Artifact {existing_artifact['url']} has not been scraped, skipping")
+    return {"message": "Artifact has not been scraped, skipping"}
 
   logger.info(f"Processing outbound links for {existing_artifact['url']} at depth {existing_artifact['crawl_depth']}")
 
-  admin_supabase = await create_async_supabase_admin_client()
+  admin_supabase = await get_async_supabase_admin_client()
   await admin_supabase\
     .table("artifacts")\
     .update({
@@ -291,10 +461,43 @@ async def _process_existing_artifact(
     .eq("artifact_id", existing_artifact["artifact_id"])\
     .execute()
 
+  target_urls = await _filter_crawl_frontier(
+    await _get_outbound_link_urls(existing_artifact, config),
+    base_crawl_event,
+  )
+  outbound_crawl_requests = [
+    CrawlRequestedEventData(
+      url=target_url,
+      crawl_depth=base_crawl_event.crawl_depth + 1,
+      domain_id=base_crawl_event.domain_id
+    ) for target_url in target_urls
+  ]
+  event_ids = await _schedule_crawl(
+    step_id=f"crawl-outbound-links",
+    crawl_request=outbound_crawl_requests
+  )
+  return {"event_ids": event_ids}
+
+async def _get_outbound_link_urls(artifact: Artifact, config: DomainConfig) -> List[str]:
+  """
+  Return the outbound links of a stored artifact. An artifact still being enriched has no
+  `artifact_links` yet, so its links come from the scrape saved for enrichment.
+  """
+  if artifact["crawl_status"] == "enriching":
+    artifact_scrape = await _get_artifact_scrape(artifact["artifact_id"])
+    if artifact_scrape:
+      scrape_response = WebScraperResult.model_validate(artifact_scrape["scrape_result"])
+      return [
+        link["target_url"]
+        for _, section in _get_unique_sections(scrape_response)
+        for link in _get_section_links(section, config)
+      ][:100]
+
+  admin_supabase = await get_async_supabase_admin_client()
   artifact_contents = await admin_supabase\
     .table("artifact_contents")\
     .select("*")\
-    .eq("artifact_id", existing_artifact["artifact_id"])\
+    .eq("artifact_id", artifact["artifact_id"])\
     .execute()
 
   outbound_links = await admin_supabase\
@@ -303,166 +506,165 @@ async def _process_existing_artifact(
     .in_("source_artifact_content_id", [content["artifact_content_id"] for content in artifact_contents.data])\
     .limit(100)\
     .execute()
+  return [link["target_url"] for link in outbound_links.data]
 
-  outbound_crawl_requests = [
+async def _schedule_link_crawls(
+  target_urls: List[str],
+  base_crawl_event: CrawlRequestedEventData,
+) -> List[str]:
+  """Schedule crawls for new links if within depth limit."""
+  event_payload = await _create_link_crawl_requests(target_urls, base_crawl_event)
+  if not event_payload:
+    return []
+
+  return await _schedule_crawl(
+    step_id="crawl-outbound-links",
+    crawl_request=event_payload
+  )
+
+async def _create_link_crawl_requests(
+  target_urls: List[str],
+  base_crawl_event: CrawlRequestedEventData,
+) -> List[CrawlRequestedEventData]:
+  if not target_urls or base_crawl_event.crawl_depth + 1 > MAX_CRAWL_DEPTH:
+    return []
+
+  target_urls = await _filter_crawl_frontier(target_urls, base_crawl_event)
+
+  return [
     CrawlRequestedEventData(
-      url=link["target_url"],
+      url=target_url,
       crawl_depth=base_crawl_event.crawl_depth + 1,
-      domain_id=base_crawl_event.domain_id
-    ) for link in outbound_links.data
+      domain_id=base_crawl_event.domain_id,
+    ) for target_url in target_urls
   ]
-  event_ids = await _schedule_crawl(
-    step_id=f"crawl-outbound-links",
-    crawl_request=outbound_crawl_requests
-  )
-  return {"event_ids": event_ids}
 
-async def _crawl_links(
-  artifact_contents: List[ArtifactContent],
-  scraper_result: WebScraperResult,
+async def _discover_links(
+  artifact: Artifact,
+  scrape_response: WebScraperResult,
   base_crawl_event: CrawlRequestedEventData,
   config: DomainConfig,
 ) -> dict:
-  """Process and store links for an artifact."""
-  # Match sections and delete existing links
-  matched_sections = _match_artifact_sections(artifact_contents, scraper_result)
-  await _delete_existing_links(artifact_contents)
-
-  # Create and insert new links
-  insert_links_payload = _create_insert_links_payload(matched_sections, config)
-  if len(insert_links_payload) == 0:
-    return {"crawl_event_ids": [], "insert_ids": []}
-
-  inserted_links = await _insert_new_links(insert_links_payload)
-
-  # Handle crawling of new links
-  links_to_crawl = await _filter_existing_links(
-    insert_links_payload,
-    base_crawl_event
-  )
-
-  event_ids = await _schedule_link_crawls(
-    inserted_links,
-    base_crawl_event,
-  )
+  """
+  Store the scrape for deferred enrichment and schedule the outbound crawls right after the fetch.
+
+  The outbound crawls and the enrichment request go out in a single `send_event` step so that the
+  function's replay after the step finds the artifact as `enriching` and stops there.
+  """
+  await _save_scrape_for_enrichment(artifact, scrape_response)
+
+  target_urls = [
+    link["target_url"]
+    for _, section in _get_unique_sections(scrape_response)
+    for link in _get_section_links(section, config)
+  ]
+  events = [
+    CrawlRequestedEvent(data=crawl_request).to_event()
+    for crawl_request in await _create_link_crawl_requests(target_urls, base_crawl_event)
+  ]
+  events.append(EnrichArtifactEvent(
+    data=EnrichArtifactEventData(
+      artifact_id=artifact["artifact_id"],
+      domain_id=artifact["domain_id"],
+    )
+  ).to_event())
 
+  step = get_inngest_step_from_context()
+  logger = get_logger_from_context()
+  logger.info(f"Scheduling {len(events) - 1} crawl requests and enrichment of {artifact['url']}")
+  event_ids = await step.send_event("discover-outbound-links", events)
   return {
-    "crawl_event_ids": event_ids,
-    "insert_ids": inserted_links
+    "crawl_event_ids": event_ids[:-1],
+    "enrich_event_id": event_ids[-1],
   }
 
-def _match_artifact_sections(
-  artifact_contents: List[ArtifactContent],
-  scraper_result: WebScraperResult
-) -> List[tuple[ArtifactContent, ScrapedContent]]:
-  """Match artifact contents with scraped sections."""
-  used_artifact_contents = set()
-  return [
-    (artifact_content, scraped_section)
-    for artifact_content in artifact_contents
-    for scraped_section in scraper_result.scraped_sections
-    if (artifact_content["anchor_id"], artifact_content["parsed_text"]) == (scraped_section.id, scraped_section.content)
-    and artifact_content["artifact_content_id"] not in used_artifact_contents
-    and not used_artifact_contents.add(artifact_content["artifact_content_id"])
-  ]
-
-async def _delete_existing_links(
-  artifact_contents: List[ArtifactContent]
+async def _mark_crawl_frontier(
+  crawl_request: CrawlRequestedEventData,
+  max_crawl_depth: int,
 ) -> None:
-  """Delete existing links for the given artifact contents in batches of 20."""
-  admin_supabase = await create_async_supabase_admin_client()
-
-  # Get all content IDs
-  content_ids = [content["artifact_content_id"] for content in artifact_contents]
-
-  # Process in batches of 20
-  batch_size = 20
-  for i in range(0, len(content_ids), batch_size):
-    batch = content_ids[i:i + batch_size]
-    await admin_supabase.table("artifact_links")\
-      .delete()\
-      .in_("source_artifact_content_id", batch)\
-      .execute()
+  """
+  Record a crawl once its artifact is committed, so other pages stop scheduling its URL at this
+  depth or deeper. Crawls that fail before the commit are not recorded and are retried when the
+  URL is linked again.
+  """
+  admin_supabase = await get_async_supabase_admin_client()
+  frontier = CrawlFrontier(admin_supabase, crawl_request.domain_id)
+  await frontier.mark_crawled(crawl_request.url, crawl_request.crawl_depth, max_crawl_depth)
+
+async def _filter_crawl_frontier(
+  target_urls: List[str],
+  base_crawl_event: CrawlRequestedEventData,
+) -> List[str]:
+  """Drop links that were already crawled at the next depth or shallower before scheduling them."""
+  if not target_urls:
+    return []
 
-def _create_insert_links_payload(
-  matched_sections: List[tuple[ArtifactContent, ScrapedContent]],
-  config: DomainConfig
-) -> List[ArtifactLinkInsert]:
-  """Create payload for new links to be inserted."""
-  assert "allowed_url_patterns" in config, "Allowed URL patterns are required"
-  return [
-    ArtifactLinkInsert({
-      "anchor_text": link.anchor_text,
-      "source_artifact_content_id": artifact_content["artifact_content_id"],
-      "target_url": link.url
-    })
-    for (artifact_content, scraped_section) in matched_sections
-    for link in scraped_section.scraped_links[:50]
-    if any(re.match(pattern, link.url) for pattern in config["allowed_url_patterns"])
-  ]
+  logger = get_logger_from_context()
+  admin_supabase = await get_async_supabase_admin_client()
+  frontier = CrawlFrontier(admin_supabase, base_crawl_event.domain_id)
+  unseen_urls = await frontier.filter_unseen(target_urls, base_crawl_event.crawl_depth + 1)
+  logger.info(f"Crawl frontier dropped {len(target_urls) - len(unseen_urls)} of {len(target_urls)} links")
+  return unseen_urls
 
-async def _insert_new_links(
-  links_payload: List[ArtifactLinkInsert]
-) -> List[ArtifactLink]:
-  """Insert new links into the database."""
-  admin_supabase = await create_async_supabase_admin_client()
-  response = await admin_supabase.table("artifact_links")\
-    .insert(links_payload)\
+async def _save_scrape_for_enrichment(
+  artifact: Artifact,
+  scrape_response: WebScraperResult,
+) -> None:
+  admin_supabase = await get_async_supabase_admin_client()
+  await (
+    admin_supabase
+    .table("artifact_scrapes")
+    .upsert({
+      "artifact_id": artifact["artifact_id"],
+      "scrape_result": scrape_response.model_dump(mode='json'),
+    })
     .execute()
-
-  return [ArtifactLink(link) for link in response.data]
-
-async def _filter_existing_links(
-  links: List[ArtifactLinkInsert],
-  base_crawl_event: CrawlRequestedEventData
-) -> List[ArtifactLinkInsert]:
-  """Filter out links that already exist with lower/equal crawl depth."""
-  admin_supabase = await create_async_supabase_admin_client()
-  existing_response = await admin_supabase.table("artifacts")\
-    .select("*")\
-    .in_("url", [link["target_url"] for link in links])\
-    .limit(100)\
+  )
+  await admin_supabase\
+    .table("artifacts")\
+    .update({
+      "crawl_status": "enriching",
+      "parsed_text": scrape_response.page_content,
+      "title": scrape_response.page_title,
+      "content_sha256": get_sha256_hash(scrape_response.page_content),
+      "crawled_as_artifact_id": None,
+    })\
+    .eq("artifact_id", artifact["artifact_id"])\
     .execute()
 
-  if not existing_response.data:
-    return links
-
-  existing_artifacts = [cast(Artifact, artifact) for artifact in existing_response.data]
-  return [
-    link for link in links
-    if not any(
-      artifact["url"] == link["target_url"] and
-      artifact["crawl_depth"] <= base_crawl_event.crawl_depth + 1
-      for artifact in existing_artifacts
-    )
-  ]
+async def _get_artifact_scrape(artifact_id: str) -> Optional[ArtifactScrape]:
+  admin_supabase = await get_async_supabase_admin_client()
+  artifact_scrape_response = await (
+    admin_supabase
+    .table("artifact_scrapes")
+    .select("*")
+    .eq("artifact_id", artifact_id)
+    .maybe_single()
+    .execute()
+  )
 
-async def _schedule_link_crawls(
-  links: List[ArtifactLink],
-  base_crawl_event: CrawlRequestedEventData,
-) -> List[str]:
-  """Schedule crawls for new links if within depth limit."""
-  if not links or base_crawl_event.crawl_depth + 1 > MAX_CRAWL_DEPTH:
-    return []
+  if artifact_scrape_response and artifact_scrape_response.data:
+    return ArtifactScrape(artifact_scrape_response.data)
 
-  event_payload = [
-    CrawlRequestedEventData(
-      url=link["target_url"],
-      crawl_depth=base_crawl_event.crawl_depth + 1,
-      domain_id=base_crawl_event.domain_id,
-    ) for link in links
-  ]
+  return None
 
-  return await _schedule_crawl(
-    step_id="crawl-outbound-links",
-    crawl_request=event_payload
+async def _get_artifact(artifact_id: str) -> Artifact:
+  admin_supabase = await get_async_supabase_admin_client()
+  artifact_response = await (
+    admin_supabase
+    .table("artifacts")
+    .select("*")
+    .eq("artifact_id", artifact_id)
+    .single()
+    .execute()
   )
+  return Artifact(artifact_response.data)
 
 async def _get_existing_artifact(
   url: str,
   domain_id: str
 ) -> Optional[Artifact]:
-  admin_supabase = await create_async_supabase_admin_client()
+  admin_supabase = await get_async_supabase_admin_client()
   existing_artifact_response = await (
     admin_supabase
     .table("artifacts")
@@ -476,7 +678,7 @@ async def _get_existing_artifact(
 
   if existing_artifact_response and \
     existing_artifact_response.data and \
-    Artifact(existing_artifact_response.data)["crawl_status"] == "scraped":
+    Artifact(existing_artifact_response.data)["crawl_status"] in ["scraped", "enriching"]:
     return Artifact(existing_artifact_response.data)
 
   return None
@@ -484,7 +686,7 @@ async def _get_existing_artifact(
 async def _create_new_artifact(
   crawl_request: CrawlRequestedEventData
 ) -> Artifact:
-  admin_supabase = await create_async_supabase_admin_client()
+  admin_supabase = await get_async_supabase_admin_client()
   upsert_response = await (
     admin_supabase
     .table("artifacts")
@@ -503,19 +705,25 @@ async def _create_new_artifact(
 
 async def _perform_scraping(
   url: str,
-  scraping_config: ScrapingConfig
+  scraping_config: ScrapingConfig,
+  url_matcher: UrlPatternMatcher,
+  cache_only: bool = False,
 ) -> WebScraperResult:
-  scraper = WebScraper(
+  scraper = _create_scraper(cache_only)
+  return await scraper.async_scrape(url, scraping_config, allowed_url_patterns=url_matcher.patterns)
+
+def _create_scraper(cache_only: bool = False) -> WebScraper:
+  return WebScraper(
     scraper="scraping_fish",
-    scraping_service_api_key=os.getenv("SCRAPING_FISH_API_KEY")
+    scraping_service_api_key=os.getenv("SCRAPING_FISH_API_KEY"),
+    cache_only=cache_only,
   )
-  return await scraper.async_scrape(url, scraping_config)
 
 async def _check_duplicate_content(
   artifact: Artifact,
   content: str
 ) -> Optional[Artifact]:
-  admin_supabase = await create_async_supabase_admin_client()
+  admin_supabase = await get_async_supabase_admin_client()
   content_hash = get_sha256_hash(content)
   logger = get_logger_from_context()
   existing_hash_doc_response = await (
@@ -525,7 +733,7 @@ async def _check_duplicate_content(
     .eq("content_sha256", content_hash)
     .eq("domain_id", artifact["domain_id"])
     .neq("artifact_id", artifact["artifact_id"])
-    .in_("crawl_status", ["scraped", "scraping"])
+    .in_("crawl_status", ["scraped", "scraping", "enriching"])
     .is_("crawled_as_artifact_id", None)
     .limit(1)
     .maybe_single()
@@ -554,51 +762,209 @@ async def _check_duplicate_content(
 
   return None
 
-async def _process_artifact_sections(
+async def _extract_and_commit(
   artifact: Artifact,
   scrape_response: WebScraperResult,
-  extraction_response: MetadataExtractionResponse
-) -> List[ArtifactContent]:
-  admin_supabase = await create_async_supabase_admin_client()
-  logger = get_logger_from_context()
+  config: DomainConfig,
+) -> CrawlResultCommit:
+  section_index = SectionIndex(scrape_response.scraped_sections)
+  unchanged_anchor_ids = await _get_unchanged_anchor_ids(artifact, section_index)
+  changed_sections = [
+    (index, section) for index, section in section_index.unique_sections()
+    if section.id not in unchanged_anchor_ids
+  ]
 
-  # Create a dictionary to track unique anchor_ids
-  seen_anchor_ids = {}
-  unique_sections = []
+  # Sections repeated across the domain reuse the summary and embedding stored for them
+  boilerplate_sections = await SectionRegistry(
+    await get_async_supabase_admin_client(),
+    artifact["domain_id"],
+  ).get_boilerplate_sections(
+    [section_index.get_content_hash(section.id) for _, section in changed_sections],
+    config.get("boilerplate_min_occurrences", BOILERPLATE_MIN_OCCURRENCES),
+  )
+  reused_sections = {
+    index: boilerplate_sections[content_hash]
+    for index, section in changed_sections
+    if (content_hash := section_index.get_content_hash(section.id)) in boilerplate_sections
+  }
+  extracted_indexes = {
+    index for index, _ in changed_sections
+    if index not in reused_sections
+  }
 
-  # Filter out duplicates while preserving order
-  for index, scraped_section in enumerate(scrape_response.scraped_sections):
-    if scraped_section.id not in seen_anchor_ids:
-      seen_anchor_ids[scraped_section.id] = index
-      unique_sections.append((index, scraped_section))
+  # Only new and changed sections that are not boilerplate go through the LLM
+  extraction_response = await _extract_data(scrape_response, extracted_indexes)
+
+  # Embed sections and attach their outbound links
+  artifact_contents_payload, embedding_tokens = await _create_artifact_contents_payload(
+    artifact,
+    section_index,
+    extraction_response,
+    config,
+    extracted_indexes,
+    reused_sections,
+  )
+
+  # Commit contents, links, artifact status and usage in a single transaction
+  return await _commit_crawl_result(
+    artifact,
+    scrape_response,
+    extraction_response,
+    artifact_contents_payload,
+    embedding_tokens,
+  )
+
+async def _get_unchanged_anchor_ids(artifact: Artifact, section_index: SectionIndex) -> Set[Optional[str]]:
+  """Return the anchor ids of the stored sections whose content hash matches the scrape."""
+  admin_supabase = await get_async_supabase_admin_client()
+  stored_contents_response = await admin_supabase\
+    .table("artifact_contents")\
+    .select("artifact_content_id, anchor_id, content_sha256")\
+    .eq("artifact_id", artifact["artifact_id"])\
+    .not_.is_("content_sha256", "null")\
+    .execute()
+
+  stored_contents = cast(List[ArtifactContent], stored_contents_response.data or [])
+  return {
+    scraped_section.id
+    for _, scraped_section in section_index.match(stored_contents)
+  }
+
+async def _create_artifact_contents_payload(
+  artifact: Artifact,
+  section_index: SectionIndex,
+  extraction_response: MetadataExtractionResponse,
+  config: DomainConfig,
+  extracted_indexes: Set[int],
+  reused_sections: Dict[int, BoilerplateSection],
+) -> Tuple[List[ArtifactContentCommit], int]:
+  """
+  Embed the newly extracted sections of a page and attach the allowed outbound links of each.
+  Returns the sections with the embedding tokens spent on them.
+
+  Boilerplate sections take their summary, metadata and embedding from the section registry.
+  The remaining sections are unchanged and go out without them, so the commit keeps the values
+  already stored for them.
+  """
+  unique_sections = section_index.unique_sections()
+  extracted_sections = [
+    (index, section) for index, section in unique_sections
+    if index in extracted_indexes
+  ]
 
-  summary_embeddings = await _embed_strings([
-    f"{section.title}\n\n{extraction_response.sections_data[i].section_summary}"
-    for i, section in unique_sections
-  ])
+  embedding_result = await _embed_strings([
+    f"{section.title}\n\n{_get_section_data(extraction_response, index).section_summary}"
+    for index, section in extracted_sections
+  ]) if extracted_sections else None
+  embeddings_by_index = {
+    index: str(summary_embedding)
+    for (index, _), summary_embedding in zip(extracted_sections, embedding_result.embeddings if embedding_result else [])
+  }
 
-  upsert_artifact_content_payload: List[ArtifactContentInsert] = [
-    ArtifactContentInsert({
+  payload: List[ArtifactContentCommit] = []
+  for orig_index, scraped_section in unique_sections:
+    summary, metadata, summary_embedding = None, None, None
+    if orig_index in extracted_indexes:
+      section_data = _get_section_data(extraction_response, orig_index)
+      summary = section_data.section_summary
+      metadata = section_data.section_data.model_dump(mode='json')
+      summary_embedding = embeddings_by_index[orig_index]
+    elif orig_index in reused_sections:
+      summary = reused_sections[orig_index]["summary"]
+      metadata = reused_sections[orig_index]["metadata"]
+      summary_embedding = reused_sections[orig_index]["summary_embedding"]
+
+    payload.append(ArtifactContentCommit({
       "artifact_id": artifact["artifact_id"],
       "title": scraped_section.title,
       "parsed_text": scraped_section.content,
       "anchor_id": scraped_section.id,
-      "summary": extraction_response.sections_data[orig_index].section_summary,
-      "metadata": extraction_response.sections_data[orig_index].section_data.model_dump(mode='json'),
-      "summary_embedding": str(summary_embeddings[i]),
-    }) for i, (orig_index, scraped_section) in enumerate(unique_sections)
+      "content_sha256": section_index.get_content_hash(scraped_section.id),
+      "summary": summary,
+      "metadata": metadata,
+      "summary_embedding": summary_embedding,
+      "links": _get_section_links(scraped_section, config),
+    }))
+  return payload, embedding_result.usage.total_tokens if embedding_result else 0
+
+def _get_section_data(
+  extraction_response: MetadataExtractionResponse,
+  index: int,
+) -> SectionDataExtractionResult:
+  section_data = extraction_response.sections_data[index]
+  assert section_data is not None, f"Section {index} was not extracted"
+  return section_data
+
+def _get_unique_sections(scrape_response: WebScraperResult) -> List[tuple[int, ScrapedContent]]:
+  """Return the first section for each anchor id, with its index in the scrape, preserving order."""
+  return SectionIndex(scrape_response.scraped_sections).unique_sections()
+
+def _get_section_links(
+  scraped_section: ScrapedContent,
+  config: DomainConfig,
+) -> List[ArtifactContentLinkCommit]:
+  """Return the first 50 links of a section that match the domain's allowed URL patterns."""
+  assert "allowed_url_patterns" in config, "Allowed URL patterns are required"
+  url_matcher = UrlPatternMatcher.from_domain_config(config)
+  return [
+    ArtifactContentLinkCommit({
+      "anchor_text": link.anchor_text,
+      "target_url": link.url,
+    })
+    for link in scraped_section.scraped_links[:50]
+    if url_matcher.matches(link.url)
   ]
 
-  upsert_response = await (
-    admin_supabase
-    .table("artifact_contents")
-    .upsert(upsert_artifact_content_payload, on_conflict="artifact_id, anchor_id")
-    .execute()
-  )
-  return upsert_response.data
+async def _commit_crawl_result(
+  artifact: Artifact,
+  scrape_response: WebScraperResult,
+  extraction_response: MetadataExtractionResponse,
+  artifact_contents: List[ArtifactContentCommit],
+  embedding_tokens: int,
+) -> CrawlResultCommit:
+  """
+  Persist a scraped page in one roundtrip.
+
+  The `commit_crawl_result` function drops the sections the page no longer has, upserts the
+  others, replaces their outbound links, marks the artifact as scraped and records the LLM and
+  embedding usage of the crawl within a single transaction. A retry after a failed commit then
+  neither finds the page scraped without its usage nor records the usage twice.
+  """
+  admin_supabase = await get_async_supabase_admin_client()
+  validators = scrape_response.validators or HttpValidators()
+  artifact_data = ArtifactCommit({
+    "metadata": extraction_response.whole_page_data.model_dump(mode='json'),
+    "parsed_text": scrape_response.page_content,
+    "summary": extraction_response.whole_page_summary,
+    "title": scrape_response.page_title,
+    "content_sha256": get_sha256_hash(scrape_response.page_content),
+    "http_etag": validators.etag,
+    "http_last_modified": validators.last_modified,
+  })
+  usage = extraction_response.usage
+  crawl_usage = CrawlUsageCommit({
+    "llm_requests": usage.requests,
+    "cached_llm_responses": usage.cached_responses,
+    "prompt_tokens": usage.prompt_tokens,
+    "cached_prompt_tokens": usage.cached_prompt_tokens,
+    "completion_tokens": usage.completion_tokens,
+    "embedding_tokens": embedding_tokens,
+    "cost_usd": usage.cost_usd + embedding_tokens * settings.embedding_cost_per_million_tokens / 1_000_000,
+  })
+  commit_response = await admin_supabase.rpc(
+    "commit_crawl_result",
+    {
+      "target_artifact_id": artifact["artifact_id"],
+      "artifact_data": artifact_data,
+      "artifact_contents": artifact_contents,
+      "crawl_usage": crawl_usage,
+    },
+  ).execute()
+
+  return cast(CrawlResultCommit, commit_response.data)
 
 async def _mark_artifact_as_crawl_failed(artifact: Artifact) -> None:
-  admin_supabase = await create_async_supabase_admin_client()
+  admin_supabase = await get_async_supabase_admin_client()
   await admin_supabase\
     .table("artifacts")\
     .update({
@@ -0,0 +1,117 @@
+from hashlib import blake2b
+from typing import Dict, Iterable, List
+from urllib.parse import urlsplit, urlunsplit
+
+from supabase import AsyncClient
+
+FRONTIER_BITS = 1 << 22
+FRONTIER_HASHES = 7
+BLOCK_BITS = 64
+
+class CrawlFrontier:
+  """
+  Per-domain Bloom filter of (normalized URL, crawl depth) pairs that were crawled successfully.
+
+  A crawl of `url` at depth `d` makes every later request for `url` at depth `d` or deeper
+  redundant, so `mark_crawled` sets the keys for `d..max_crawl_depth` and `filter_unseen` only
+  has to probe one key per link. The filter is stored as 64-bit blocks in
+  `crawl_frontier_blocks`; false positives drop a link, false negatives only cost a crawl run
+  that bails out on the existing artifact.
+  """
+
+  def __init__(self, supabase: AsyncClient, domain_id: str):
+    self.supabase = supabase
+    self.domain_id = domain_id
+
+  async def mark_crawled(self, url: str, crawl_depth: int, max_crawl_depth: int) -> None:
+    positions = [
+      position
+      for depth in range(crawl_depth, max_crawl_depth + 1)
+      for position in get_frontier_positions(url, depth)
+    ]
+    if not positions:
+      return
+
+    block_masks = get_block_masks(positions)
+    await self.supabase.rpc(
+      "add_to_crawl_frontier",
+      {
+        "target_domain_id": self.domain_id,
+        "block_indexes": list(block_masks.keys()),
+        "block_masks": [_to_signed_bigint(mask) for mask in block_masks.values()],
+      },
+    ).execute()
+
+  async def clear(self) -> None:
+    """
+    Forget every crawl of the domain. A fresh crawl starts from an empty frontier, so links to
+    deleted artifacts and pages within a raised `max_crawl_depth` are scheduled again.
+    """
+    await self.supabase.rpc(
+      "clear_crawl_frontier",
+      {"target_domain_id": self.domain_id},
+    ).execute()
+
+  async def filter_unseen(self, urls: List[str], crawl_depth: int) -> List[str]:
+    """Drop URLs already crawled at `crawl_depth` or shallower, and duplicates within `urls`."""
+    unique_urls: Dict[str, str] = {}
+    for url in urls:
+      unique_urls.setdefault(normalize_frontier_url(url), url)
+    if not unique_urls:
+      return []
+
+    url_positions = {
+      url: get_frontier_positions(normalized_url, crawl_depth)
+      for normalized_url, url in unique_urls.items()
+    }
+    block_indexes = sorted({
+      position // BLOCK_BITS
+      for positions in url_positions.values()
+      for position in positions
+    })
+    blocks_response = await self.supabase.rpc(
+      "get_crawl_frontier_blocks",
+      {
+        "target_domain_id": self.domain_id,
+        "block_indexes": block_indexes,
+      },
+    ).execute()
+    blocks = {
+      block["block_index"]: block["bits"] & ((1 << BLOCK_BITS) - 1)
+      for block in blocks_response.data or []
+    }
+
+    return [
+      url for url, positions in url_positions.items()
+      if not contains_positions(blocks, positions)
+    ]
+
+def normalize_frontier_url(url: str) -> str:
+  """Lowercase the scheme and host, and drop the fragment and trailing slash of the path."""
+  parts = urlsplit(url)
+  path = parts.path.rstrip("/") or "/"
+  return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+def get_frontier_positions(url: str, crawl_depth: int) -> List[int]:
+  """Return the Bloom filter bit positions of a (URL, depth) key using double hashing."""
+  key = f"{crawl_depth}:{normalize_frontier_url(url)}".encode("utf-8")
+  digest = blake2b(key, digest_size=16).digest()
+  h1 = int.from_bytes(digest[:8], "big")
+  h2 = int.from_bytes(digest[8:], "big") | 1
+  return [(h1 + i * h2) % FRONTIER_BITS for i in range(FRONTIER_HASHES)]
+
+def get_block_masks(positions: Iterable[int]) -> Dict[int, int]:
+  block_masks: Dict[int, int] = {}
+  for position in positions:
+    block_index, bit = divmod(position, BLOCK_BITS)
+    block_masks[block_index] = block_masks.get(block_index, 0) | (1 << bit)
+  return block_masks
+
+def contains_positions(blocks: Dict[int, int], positions: Iterable[int]) -> bool:
+  return all(
+    blocks.get(position // BLOCK_BITS, 0) & (1 << (position % BLOCK_BITS))
+    for position in positions
+  )
+
+def _to_signed_bigint(mask: int) -> int:
+  return mask - (1 << BLOCK_BITS) if mask >= 1 << (BLOCK_BITS - 1) else mask
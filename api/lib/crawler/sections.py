@@ -0,0 +1,65 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from lib.db.types import ArtifactContent
+from lib.scraper.types import ScrapedContent
+
+from .tools import get_sha256_hash
+
+SectionKey = Tuple[Optional[str], str]
+
+class SectionIndex:
+  """
+  The scraped sections of a page keyed by `(anchor_id, content_hash)`, built once per page.
+
+  The first section of each anchor id is the one that gets stored, so `unique_sections` keeps
+  scrape order and `match` pairs stored `artifact_contents` rows with those sections through a
+  single hash lookup per row instead of comparing every row with every section.
+  """
+
+  def __init__(self, scraped_sections: Sequence[ScrapedContent]):
+    self._unique_sections: List[Tuple[int, ScrapedContent]] = []
+    self._sections_by_key: Dict[SectionKey, Tuple[int, ScrapedContent]] = {}
+    self._content_hashes: Dict[Optional[str], str] = {}
+
+    for index, scraped_section in enumerate(scraped_sections):
+      if scraped_section.id in self._content_hashes:
+        continue
+      content_hash = get_sha256_hash(scraped_section.content)
+      self._content_hashes[scraped_section.id] = content_hash
+      self._sections_by_key[(scraped_section.id, content_hash)] = (index, scraped_section)
+      self._unique_sections.append((index, scraped_section))
+
+  def unique_sections(self) -> List[Tuple[int, ScrapedContent]]:
+    """Return the first section for each anchor id, with its index in the scrape, preserving order."""
+    return list(self._unique_sections)
+
+  def get_content_hash(self, anchor_id: Optional[str]) -> str:
+    return self._content_hashes[anchor_id]
+
+  def get(self, anchor_id: Optional[str], content_hash: str) -> Optional[ScrapedContent]:
+    entry = self._sections_by_key.get((anchor_id, content_hash))
+    return entry[1] if entry else None
+
+  def match(
+    self,
+    artifact_contents: Sequence[ArtifactContent],
+  ) -> List[Tuple[ArtifactContent, ScrapedContent]]:
+    """
+    Pair stored sections with the scraped section of the same anchor id and content.
+
+    Rows are compared by their stored `content_sha256`, or by hashing `parsed_text` for rows
+    stored before section hashes were recorded.
+    """
+    matched_sections: List[Tuple[ArtifactContent, ScrapedContent]] = []
+    matched_keys = set()
+    for artifact_content in artifact_contents:
+      anchor_id = artifact_content["anchor_id"]
+      if anchor_id not in self._content_hashes or anchor_id in matched_keys:
+        continue
+      content_hash = artifact_content.get("content_sha256") \
+        or get_sha256_hash(artifact_content.get("parsed_text") or "")
+      scraped_section = self.get(anchor_id, content_hash)
+      if scraped_section is not None:
+        matched_keys.add(anchor_id)
+        matched_sections.append((artifact_content, scraped_section))
+    return matched_sections
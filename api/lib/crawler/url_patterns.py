@@ -0,0 +1,130 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+from lib.db.types import DomainConfig
+
+_QUANTIFIERS = "*+?{"
+_METACHARACTERS = ".^$*+?{}[]|()\\"
+_LITERAL_ESCAPES = set("./-:_~%&=#@!,;'\"<> ")
+
+class UrlPatternMatcher:
+  """
+  Matches URLs against a domain's `allowed_url_patterns` with `re.match` semantics.
+
+  Patterns whose literal prefix pins down the host (e.g. `https://docs\\.example\\.com/.*`) are
+  bucketed by host and compiled into one alternation per host, so a URL is only tested against
+  the patterns that could match it. The remaining patterns share a single fallback alternation.
+  """
+
+  def __init__(self, patterns: Sequence[str]):
+    self.patterns = tuple(patterns)
+
+    host_patterns: Dict[str, List[str]] = {}
+    any_host_patterns: List[str] = []
+    for pattern in self.patterns:
+      host = _get_host(_get_literal_prefix(pattern))
+      if host is None:
+        any_host_patterns.append(pattern)
+      else:
+        host_patterns.setdefault(host, []).append(pattern)
+
+    self._host_matchers = {
+      host: _compile_alternation(patterns)
+      for host, patterns in host_patterns.items()
+    }
+    self._any_host_matcher = _compile_alternation(any_host_patterns)
+
+  @classmethod
+  def from_domain_config(cls, config: DomainConfig) -> "UrlPatternMatcher":
+    return get_url_pattern_matcher(tuple(config.get("allowed_url_patterns") or []))
+
+  def matches(self, url: str) -> bool:
+    host = _get_host(url)
+    if host is not None:
+      host_matcher = self._host_matchers.get(host)
+      if host_matcher and host_matcher(url):
+        return True
+
+    return self._any_host_matcher(url)
+
+  def __call__(self, url: str) -> bool:
+    return self.matches(url)
+
+@lru_cache(maxsize=128)
+def get_url_pattern_matcher(patterns: Tuple[str, ...]) -> UrlPatternMatcher:
+  """Return the matcher for a set of patterns, building it only the first time it is seen."""
+  return UrlPatternMatcher(patterns)
+
+def _compile_alternation(patterns: List[str]):
+  if not patterns:
+    return lambda url: False
+
+  try:
+    combined = re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+    # Numbered backreferences would point at the wrong group once patterns are joined
+    if not any(re.search(r"\\[1-9]|\(\?P=", pattern) for pattern in patterns):
+      return lambda url: combined.match(url) is not None
+  except re.error:
+    # Global inline flags such as (?i) are only allowed at the start of a pattern
+    pass
+
+  compiled: List[Pattern[str]] = [re.compile(pattern) for pattern in patterns]
+  return lambda url: any(pattern.match(url) for pattern in compiled)
+
+def _get_literal_prefix(pattern: str) -> str:
+  """Return the literal text every match of `pattern` must start with."""
+  prefix: List[str] = []
+  i = 0
+  while i < len(pattern):
+    char = pattern[i]
+    if char == "\\" and i + 1 < len(pattern) and pattern[i + 1] in _LITERAL_ESCAPES:
+      literal = pattern[i + 1]
+      i += 2
+    elif char in _METACHARACTERS:
+      break
+    else:
+      literal = char
+      i += 1
+
+    if i < len(pattern) and pattern[i] in _QUANTIFIERS:
+      # The quantified character is optional or repeated, so it is not part of the prefix
+      break
+    prefix.append(literal)
+
+  if _has_top_level_alternation(pattern):
+    return ""
+  return "".join(prefix)
+
+def _has_top_level_alternation(pattern: str) -> bool:
+  depth = 0
+  in_class = False
+  i = 0
+  while i < len(pattern):
+    char = pattern[i]
+    if char == "\\":
+      i += 2
+      continue
+    if in_class:
+      in_class = char != "]"
+    elif char == "[":
+      in_class = True
+    elif char == "(":
+      depth += 1
+    elif char == ")":
+      depth -= 1
+    elif char == "|" and depth == 0:
+      return True
+    i += 1
+  return False
+
+def _get_host(url: str) -> Optional[str]:
+  """Return the text between the first `://` and the next `/`, if the URL contains both."""
+  scheme_end = url.find("://")
+  if scheme_end == -1:
+    return None
+  host_start = scheme_end + 3
+  host_end = url.find("/", host_start)
+  if host_end == -1:
+    return None
+  return url[host_start:host_end]
@@ -1,7 +1,7 @@
 
 from typing import Literal, Optional, Sequence, TypedDict
 
-CrawlStatus = Literal["discovered", "scraped", "scrape_failed", "scraping"]
+CrawlStatus = Literal["discovered", "scraped", "scrape_failed", "scraping", "enriching"]
 
 ThreadType = Literal["runbook_generator"]
 
@@ -22,6 +22,8 @@ class Artifact(TypedDict):
   url: str
   content_sha256: Optional[str]
   crawled_as_artifact_id: Optional[str]
+  http_etag: Optional[str]
+  http_last_modified: Optional[str]
 
 
 class ArtifactContentInsert(TypedDict):
@@ -32,6 +34,7 @@ class ArtifactContentInsert(TypedDict):
   summary_embedding: str
   title: str
   anchor_id: Optional[str]
+  content_sha256: Optional[str]
 
 class ArtifactContent(ArtifactContentInsert):
   artifact_content_id: str
@@ -46,11 +49,59 @@ class ArtifactLink(ArtifactLinkInsert):
   created_at: str
   id: str
 
+class ArtifactContentLinkCommit(TypedDict):
+  anchor_text: str
+  target_url: str
+
+class ArtifactContentCommit(TypedDict):
+  artifact_id: str
+  title: str
+  parsed_text: str
+  anchor_id: Optional[str]
+  content_sha256: str
+  # None for unchanged sections, which keep their stored values
+  summary: Optional[str]
+  metadata: Optional[dict]
+  summary_embedding: Optional[str]
+  links: list[ArtifactContentLinkCommit]
+
+class ArtifactCommit(TypedDict):
+  metadata: dict
+  parsed_text: str
+  summary: str
+  title: Optional[str]
+  content_sha256: str
+  http_etag: Optional[str]
+  http_last_modified: Optional[str]
+
+class BoilerplateSection(TypedDict):
+  content_sha256: str
+  occurrences: int
+  summary: str
+  metadata: Optional[dict]
+  summary_embedding: str
+
+class CrawlResultCommit(TypedDict):
+  artifact: Artifact
+  artifact_contents: list[ArtifactContent]
+  artifact_links: list[ArtifactLink]
+
+class CrawlUsageCommit(TypedDict):
+  llm_requests: int
+  cached_llm_responses: int
+  prompt_tokens: int
+  cached_prompt_tokens: int
+  completion_tokens: int
+  embedding_tokens: int
+  cost_usd: float
+
 class DomainConfig(TypedDict, total=False):
   max_crawl_depth: int
   allowed_url_patterns: list[str]
   min_cluster_size: int
   crawler_disabled: Optional[bool]
+  discovery_mode: Optional[bool]
+  boilerplate_min_occurrences: int
   starting_agent: Optional[str]
 
 class ArtifactDomain(TypedDict):
@@ -59,6 +110,11 @@ class ArtifactDomain(TypedDict):
   config: DomainConfig
   created_at: str
 
+class ArtifactScrape(TypedDict):
+  artifact_id: str
+  created_at: str
+  scrape_result: dict
+
 class ArtifactCluster(TypedDict):
   id: str
   artifact_id: str
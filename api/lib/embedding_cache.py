@@ -0,0 +1,133 @@
+import logging
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+from lib.config import Settings
+from lib.supabase import get_async_supabase_admin_client
+
+settings = Settings()
+
+# PostgREST passes `in` filters in the URL, so lookups are split to keep it short
+STORE_LOOKUP_CHUNK_SIZE = 100
+
+EmbeddingKey = Tuple[str, str, int, str]
+
+class EmbeddingStore(Protocol):
+  async def get_many(self, keys: Sequence[EmbeddingKey]) -> Dict[EmbeddingKey, List[float]]:
+    ...
+
+  async def put_many(self, embeddings: Dict[EmbeddingKey, List[float]]) -> None:
+    ...
+
+class SupabaseEmbeddingStore:
+  """Embeddings kept in the `embedding_cache` table, shared by every worker."""
+
+  async def get_many(self, keys: Sequence[EmbeddingKey]) -> Dict[EmbeddingKey, List[float]]:
+    admin_supabase = await get_async_supabase_admin_client()
+    embeddings: Dict[EmbeddingKey, List[float]] = {}
+    groups: Dict[Tuple[str, str, int], List[str]] = {}
+    for model, task_type, dimensionality, content_sha256 in keys:
+      groups.setdefault((model, task_type, dimensionality), []).append(content_sha256)
+
+    for (model, task_type, dimensionality), content_hashes in groups.items():
+      for start in range(0, len(content_hashes), STORE_LOOKUP_CHUNK_SIZE):
+        response = await admin_supabase\
+          .table("embedding_cache")\
+          .select("content_sha256, embedding")\
+          .eq("model", model)\
+          .eq("task_type", task_type)\
+          .eq("dimensionality", dimensionality)\
+          .in_("content_sha256", content_hashes[start:start + STORE_LOOKUP_CHUNK_SIZE])\
+          .execute()
+        for row in response.data or []:
+          embeddings[(model, task_type, dimensionality, row["content_sha256"])] = row["embedding"]
+    return embeddings
+
+  async def put_many(self, embeddings: Dict[EmbeddingKey, List[float]]) -> None:
+    if not embeddings:
+      return
+    admin_supabase = await get_async_supabase_admin_client()
+    await admin_supabase\
+      .table("embedding_cache")\
+      .upsert([
+        {
+          "model": model,
+          "task_type": task_type,
+          "dimensionality": dimensionality,
+          "content_sha256": content_sha256,
+          "embedding": embedding,
+        }
+        for (model, task_type, dimensionality, content_sha256), embedding in embeddings.items()
+      ], on_conflict="model,task_type,dimensionality,content_sha256", ignore_duplicates=True)\
+      .execute()
+
+class EmbeddingCache:
+  """
+  Embeddings keyed by model, task type, dimensionality and the SHA-256 of the text.
+
+  Recently used embeddings are kept in an in-memory LRU of `max_memory_entries`, in front of
+  an optional persistent `store`. Repeated section summaries, duplicate pages and re-crawls
+  then reuse their embeddings instead of going back to Nomic. Store errors are logged and
+  treated as misses, so the cache never fails an embedding request.
+  """
+
+  def __init__(self, max_memory_entries: int, store: Optional[EmbeddingStore] = None):
+    self.max_memory_entries = max_memory_entries
+    self.store = store
+    self.hits = 0
+    self.misses = 0
+    self._memory: OrderedDict[EmbeddingKey, List[float]] = OrderedDict()
+
+  @staticmethod
+  def get_key(model: str, task_type: str, dimensionality: int, text: str) -> EmbeddingKey:
+    return (model, task_type, dimensionality, sha256(text.encode("utf-8")).hexdigest())
+
+  async def get_many(self, keys: Iterable[EmbeddingKey]) -> Dict[EmbeddingKey, List[float]]:
+    keys = list(dict.fromkeys(keys))
+    embeddings: Dict[EmbeddingKey, List[float]] = {}
+    for key in keys:
+      if key in self._memory:
+        self._memory.move_to_end(key)
+        embeddings[key] = self._memory[key]
+
+    missing_keys = [key for key in keys if key not in embeddings]
+    if missing_keys and self.store is not None:
+      try:
+        stored_embeddings = await self.store.get_many(missing_keys)
+      except Exception as e:
+        logging.warning(f"Failed to read cached embeddings: {e}")
+        stored_embeddings = {}
+      self._remember(stored_embeddings)
+      embeddings.update(stored_embeddings)
+
+    self.hits += len(embeddings)
+    self.misses += len(keys) - len(embeddings)
+    return embeddings
+
+  async def put_many(self, embeddings: Dict[EmbeddingKey, List[float]]) -> None:
+    self._remember(embeddings)
+    if self.store is not None:
+      try:
+        await self.store.put_many(embeddings)
+      except Exception as e:
+        logging.warning(f"Failed to store embeddings: {e}")
+
+  def _remember(self, embeddings: Dict[EmbeddingKey, List[float]]) -> None:
+    for key, embedding in embeddings.items():
+      self._memory[key] = embedding
+      self._memory.move_to_end(key)
+    while len(self._memory) > self.max_memory_entries:
+      self._memory.popitem(last=False)
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+  """Return the process-wide embedding cache, or None when `EMBEDDING_CACHE_MEMORY_ENTRIES` is 0."""
+  global _embedding_cache
+  if _embedding_cache is None and settings.embedding_cache_memory_entries > 0:
+    _embedding_cache = EmbeddingCache(
+      settings.embedding_cache_memory_entries,
+      SupabaseEmbeddingStore() if settings.embedding_cache_persistent else None,
+    )
+  return _embedding_cache
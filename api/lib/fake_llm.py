@@ -0,0 +1,128 @@
+"""
+Offline stand-in for `litellm.acompletion`, selected with `LLM_BACKEND=fake`.
+
+Responses are derived from a hash of the request, so the same request always gets the same
+content, latency and token counts. Structured output requests get a value that validates
+against their `response_format`. Extraction, cluster summarization and the agents can then be
+load tested for throughput, concurrency limits and caching without network access or cost.
+"""
+import asyncio
+import json
+import math
+import random
+import types
+from enum import Enum
+from hashlib import sha256
+from typing import Any, Callable, Dict, List, Literal, Optional, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from lib.config import Settings
+
+settings = Settings()
+
+FAKE_WORDS = [
+  "api", "authentication", "cluster", "configuration", "deployment", "endpoint", "integration",
+  "latency", "migration", "monitoring", "permissions", "pipeline", "request", "schema", "service",
+  "storage", "token", "workflow",
+]
+
+def get_acompletion() -> Callable[..., Any]:
+  """Return the `acompletion` of the configured LLM backend."""
+  if settings.llm_backend == "fake":
+    return fake_acompletion
+
+  import litellm
+  return litellm.acompletion
+
+async def fake_acompletion(
+  model: str,
+  messages: List[Dict[str, Any]],
+  response_format: Optional[Type[BaseModel]] = None,
+  stream: bool = False,
+  **kwargs,
+):
+  """Answer a completion request after a simulated latency, without calling a provider."""
+  import litellm
+  from litellm.exceptions import RateLimitError
+  from litellm.types.utils import Choices, Message, ModelResponse, Usage
+
+  rng = random.Random(_get_request_seed(model, messages, response_format))
+  await asyncio.sleep(
+    settings.fake_llm_latency_median_ms / 1000 * math.exp(settings.fake_llm_latency_sigma * rng.gauss(0, 1))
+  )
+  if rng.random() < settings.fake_llm_rate_limit_probability:
+    raise RateLimitError(
+      message="Fake rate limit",
+      llm_provider="fake",
+      model=model,
+    )
+
+  if response_format is not None:
+    content = json.dumps(_fake_value(response_format, rng))
+  else:
+    content = _fake_text(rng, settings.fake_llm_completion_tokens)
+
+  if stream:
+    return await litellm.acompletion(model=model, messages=messages, stream=True, mock_response=content)
+
+  prompt_tokens = sum(len(str(message.get("content") or "")) for message in messages) // 4
+  completion_tokens = max(len(content) // 4, 1)
+  return ModelResponse(
+    model=model,
+    choices=[Choices(index=0, finish_reason="stop", message=Message(role="assistant", content=content))],
+    usage=Usage(
+      prompt_tokens=prompt_tokens,
+      completion_tokens=completion_tokens,
+      total_tokens=prompt_tokens + completion_tokens,
+    ),
+  )
+
+def _get_request_seed(
+  model: str,
+  messages: List[Dict[str, Any]],
+  response_format: Optional[Type[BaseModel]],
+) -> int:
+  request = json.dumps([
+    settings.fake_llm_seed,
+    model,
+    messages,
+    response_format.model_json_schema() if response_format else None,
+  ], sort_keys=True, default=str)
+  return int(sha256(request.encode("utf-8")).hexdigest()[:16], 16)
+
+def _fake_text(rng: random.Random, tokens: int) -> str:
+  words = [rng.choice(FAKE_WORDS) for _ in range(tokens)]
+  points = [words[start:start + 20] for start in range(0, len(words), 20)]
+  return "\n".join(f"* {' '.join(point).capitalize()}." for point in points)
+
+def _fake_value(annotation: Any, rng: random.Random) -> Any:
+  origin = get_origin(annotation)
+  args = get_args(annotation)
+
+  if origin in (Union, types.UnionType):
+    return _fake_value(next(arg for arg in args if arg is not type(None)), rng)
+  if origin is Literal:
+    return args[0]
+  if origin in (list, set, tuple):
+    return [_fake_value(args[0], rng) for _ in range(rng.randint(1, 3))] if args else []
+  if origin is dict:
+    return {}
+  if not isinstance(annotation, type):
+    return None
+  if issubclass(annotation, BaseModel):
+    return {
+      name: _fake_value(field.annotation, rng)
+      for name, field in annotation.model_fields.items()
+    }
+  if issubclass(annotation, Enum):
+    return list(annotation)[0].value
+  if annotation is bool:
+    return rng.random() < 0.5
+  if annotation is int:
+    return rng.randint(0, 100)
+  if annotation is float:
+    return rng.random()
+  if annotation is str:
+    return " ".join(rng.choice(FAKE_WORDS) for _ in range(8))
+  return None
@@ -0,0 +1,46 @@
+import asyncio
+from weakref import WeakKeyDictionary
+
+import aiohttp
+
+from lib.config import Settings
+
+CONNECTION_LIMIT = 100
+DNS_CACHE_TTL_SECONDS = 300
+KEEPALIVE_TIMEOUT_SECONDS = 30
+
+# One session per event loop. aiohttp sessions are bound to the loop they were created on,
+# so scripts that call asyncio.run() repeatedly get a fresh session while a warm worker
+# keeps reusing the same connection pool, DNS cache and TLS sessions.
+_http_sessions: WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession] = WeakKeyDictionary()
+
+settings = Settings()
+
+def create_http_session() -> aiohttp.ClientSession:
+  connector = aiohttp.TCPConnector(
+    limit=CONNECTION_LIMIT,
+    limit_per_host=settings.http_connection_limit_per_host,
+    ttl_dns_cache=DNS_CACHE_TTL_SECONDS,
+    keepalive_timeout=KEEPALIVE_TIMEOUT_SECONDS,
+  )
+  return aiohttp.ClientSession(connector=connector)
+
+def get_http_session() -> aiohttp.ClientSession:
+  """
+  Return the process-wide HTTP session for the running event loop, creating it on first use.
+
+  Outbound calls to scraping and embedding APIs share its keep-alive pool instead of opening
+  a session per request. Call `close_http_session` on worker shutdown.
+  """
+  loop = asyncio.get_running_loop()
+  session = _http_sessions.get(loop)
+  if session is None or session.closed:
+    session = create_http_session()
+    _http_sessions[loop] = session
+  return session
+
+async def close_http_session() -> None:
+  """Close the shared HTTP session bound to the running event loop, if any."""
+  session = _http_sessions.pop(asyncio.get_running_loop(), None)
+  if session is not None:
+    await session.close()
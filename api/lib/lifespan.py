@@ -0,0 +1,16 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+
+from lib.http_client import close_http_session
+from lib.scraper.browser_pool import close_browser_pools
+from lib.scraper.parsing import close_parse_executor
+from lib.supabase import close_async_supabase_admin_client
+
+@asynccontextmanager
+async def worker_lifespan(app: FastAPI):
+  """Release process-wide clients held by a warm worker when the app shuts down."""
+  yield
+  await close_async_supabase_admin_client()
+  await close_browser_pools()
+  await close_http_session()
+  close_parse_executor()
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+from weakref import WeakKeyDictionary
+
+from lib.config import Settings
+
+settings = Settings()
+
+DEFAULT_OUTPUT_TOKENS = 1000
+
+class LlmRateLimiter:
+  """
+  Process-wide limit on LLM requests, shared by extraction, cluster summarization and agents.
+
+  A token bucket holds requests back to `tokens_per_minute`, and an AIMD window bounds how many
+  requests are in flight: it grows by one request per window of successes and halves when the
+  provider answers 429. Requests wait for a slot instead of piling onto a provider that is
+  already rate limiting us.
+  """
+
+  def __init__(
+    self,
+    tokens_per_minute: int,
+    max_concurrency: int,
+    min_concurrency: int = 1,
+    initial_concurrency: Optional[int] = None,
+  ):
+    self.tokens_per_minute = tokens_per_minute
+    self.max_concurrency = max_concurrency
+    self.min_concurrency = min_concurrency
+    self.concurrency = float(initial_concurrency or max_concurrency)
+    self.in_flight = 0
+    self.rate_limited_count = 0
+    self._tokens = float(tokens_per_minute)
+    self._refilled_at = time.monotonic()
+    self._decreased_at = 0.0
+    self._bucket_lock = asyncio.Lock()
+    self._window_changed = asyncio.Condition()
+
+  @asynccontextmanager
+  async def limit(self, estimated_tokens: int) -> AsyncIterator[None]:
+    """Hold a slot in the window and `estimated_tokens` from the bucket around one request."""
+    await self._acquire_slot()
+    started_at = time.monotonic()
+    try:
+      await self._acquire_tokens(estimated_tokens)
+      yield
+    except Exception as e:
+      if _is_rate_limit_error(e):
+        self._on_rate_limited(started_at)
+      raise
+    else:
+      self._on_success()
+    finally:
+      await self._release_slot()
+
+  def record_usage(self, estimated_tokens: int, used_tokens: Optional[int]) -> None:
+    """Settle the bucket with the tokens the provider reported for a request."""
+    if used_tokens is None:
+      return
+    self._tokens = min(float(self.tokens_per_minute), self._tokens + estimated_tokens - used_tokens)
+
+  async def _acquire_slot(self) -> None:
+    async with self._window_changed:
+      await self._window_changed.wait_for(lambda: self.in_flight < int(self.concurrency))
+      self.in_flight += 1
+
+  async def _release_slot(self) -> None:
+    async with self._window_changed:
+      self.in_flight -= 1
+      self._window_changed.notify_all()
+
+  async def _acquire_tokens(self, tokens: int) -> None:
+    # A request larger than the bucket waits for a full bucket rather than forever
+    tokens = min(tokens, self.tokens_per_minute)
+    async with self._bucket_lock:
+      while True:
+        self._refill()
+        if self._tokens >= tokens:
+          self._tokens -= tokens
+          return
+        await asyncio.sleep((tokens - self._tokens) * 60 / self.tokens_per_minute)
+
+  def _refill(self) -> None:
+    now = time.monotonic()
+    self._tokens = min(
+      float(self.tokens_per_minute),
+      self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60,
+    )
+    self._refilled_at = now
+
+  def _on_success(self) -> None:
+    self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+
+  def _on_rate_limited(self, started_at: float) -> None:
+    self.rate_limited_count += 1
+    # Requests sent before the last decrease saw the old window, so they only count once
+    if started_at < self._decreased_at:
+      return
+    self._decreased_at = time.monotonic()
+    self.concurrency = max(float(self.min_concurrency), self.concurrency / 2)
+    # Pause new requests until the bucket refills
+    self._tokens = 0
+    logging.warning(
+      "LLM provider is rate limiting, reducing concurrency to %d",
+      int(self.concurrency),
+    )
+
+def estimate_tokens(
+  messages: Iterable[Dict[str, Any]],
+  max_output_tokens: int = DEFAULT_OUTPUT_TOKENS,
+) -> int:
+  """Roughly estimate the tokens of a request at 4 characters per token."""
+  return sum(len(str(message.get("content") or "")) for message in messages) // 4 + max_output_tokens
+
+def _is_rate_limit_error(e: Exception) -> bool:
+  return getattr(e, "status_code", None) == 429
+
+# Asyncio primitives are bound to the loop they are first used on, so the limiter is shared
+# per event loop like the HTTP session. A worker runs a single loop, making it process-wide.
+_llm_limiters: WeakKeyDictionary[asyncio.AbstractEventLoop, LlmRateLimiter] = WeakKeyDictionary()
+
+def get_llm_limiter() -> LlmRateLimiter:
+  """Return the LLM rate limiter for the running event loop, creating it on first use."""
+  loop = asyncio.get_running_loop()
+  limiter = _llm_limiters.get(loop)
+  if limiter is None:
+    limiter = LlmRateLimiter(
+      tokens_per_minute=settings.llm_tokens_per_minute,
+      max_concurrency=settings.llm_max_concurrency,
+      initial_concurrency=settings.llm_initial_concurrency,
+    )
+    _llm_limiters[loop] = limiter
+  return limiter
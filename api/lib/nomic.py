@@ -1,11 +1,21 @@
-from typing import List, Literal, Optional
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Optional, Tuple
+from weakref import WeakKeyDictionary
 from pydantic import BaseModel
 import aiohttp
-import json
+
+from lib.embedding_cache import EmbeddingCache, get_embedding_cache
+from lib.http_client import get_http_session
+
+MAX_BATCH_SIZE = 256
+MAX_BATCH_TOKENS = 100_000
+MAX_BATCH_WAIT_SECONDS = 0.01
 
 TaskType = Literal["search_document", "search_query", "classification", "clustering"]
 LongTextMode = Literal["truncate", "mean"]
 ModelType = Literal["nomic-embed-text-v1", "nomic-embed-text-v1.5"]
+Dimensionality = Literal[768, 512, 256, 128, 64]
 
 class EmbeddingUsage(BaseModel):
   prompt_tokens: int
@@ -21,8 +31,11 @@ class NomicEmbeddings:
     self,
     api_key: str,
     base_url: str = "https://api-atlas.nomic.ai/",
+    session: Optional[aiohttp.ClientSession] = None,
   ):
+    """Requests go through `session`, or the shared HTTP session of the running event loop."""
     self.api_key = api_key
+    self.session = session
     self.base_url = base_url.rstrip('/')
     self.headers = {
       "Authorization": f"Bearer {api_key}",
@@ -36,7 +49,7 @@ class NomicEmbeddings:
     task_type: TaskType = "search_document",
     long_text_mode: LongTextMode = "truncate",
     max_tokens_per_text: int = 8192,
-    dimensionality: Optional[Literal[768, 512, 256, 128, 64]] = 768,
+    dimensionality: Optional[Dimensionality] = 768,
   ) -> NomicEmbeddingResult:
     """Generate embeddings for a list of texts using Nomic's API."""
 
@@ -49,15 +62,180 @@ class NomicEmbeddings:
       "dimensionality": dimensionality,
     }
 
-    async with aiohttp.ClientSession() as session:
-      async with session.post(
-        f"{self.base_url}/v1/embedding/text",
-        headers=self.headers,
-        json=payload
-      ) as response:
-        if response.status != 200:
-          error_text = await response.text()
-          raise Exception(f"API request failed with status {response.status}: {error_text}")
-
-        result = await response.json()
-        return NomicEmbeddingResult.model_validate(result)
+    session = self.session or get_http_session()
+    async with session.post(
+      f"{self.base_url}/v1/embedding/text",
+      headers=self.headers,
+      json=payload
+    ) as response:
+      if response.status != 200:
+        error_text = await response.text()
+        raise Exception(f"API request failed with status {response.status}: {error_text}")
+
+      result = await response.json()
+      return NomicEmbeddingResult.model_validate(result)
+
+@dataclass
+class _EmbeddingRequest:
+  texts: List[str]
+  future: asyncio.Future
+  embeddings: List[Optional[List[float]]] = field(default_factory=list)
+  total_tokens: int = 0
+  remaining: int = 0
+
+class NomicEmbeddingBatcher:
+  """
+  Coalesce the embedding requests of concurrent callers into shared Nomic requests.
+
+  Texts wait up to `max_wait_seconds` for other callers to join them, and a batch is sent as
+  soon as it reaches `max_batch_size` texts or `max_batch_tokens` estimated tokens. A text that
+  would take a batch over `max_batch_tokens` goes to the next one, so only a single text longer
+  than the limit makes a batch exceed it. Each caller gets its own embeddings back, with its
+  share of the batch's token usage.
+
+  Texts found in `cache` are answered from it and never join a batch.
+  """
+
+  def __init__(
+    self,
+    client: NomicEmbeddings,
+    model: ModelType = "nomic-embed-text-v1.5",
+    task_type: TaskType = "search_document",
+    dimensionality: Dimensionality = 768,
+    cache: Optional[EmbeddingCache] = None,
+    max_batch_size: int = MAX_BATCH_SIZE,
+    max_batch_tokens: int = MAX_BATCH_TOKENS,
+    max_wait_seconds: float = MAX_BATCH_WAIT_SECONDS,
+  ):
+    self.client = client
+    self.model: ModelType = model
+    self.task_type: TaskType = task_type
+    self.dimensionality: Dimensionality = dimensionality
+    self.cache = cache
+    self.max_batch_size = max_batch_size
+    self.max_batch_tokens = max_batch_tokens
+    self.max_wait_seconds = max_wait_seconds
+    self._pending: List[Tuple[_EmbeddingRequest, int]] = []
+    self._pending_tokens = 0
+    self._flush_handle: Optional[asyncio.TimerHandle] = None
+    self._batches: set[asyncio.Task] = set()
+
+  async def embed_texts(self, texts: List[str]) -> NomicEmbeddingResult:
+    if self.cache is None:
+      return await self._embed_batched(texts)
+
+    keys = [
+      self.cache.get_key(self.model, self.task_type, self.dimensionality, text)
+      for text in texts
+    ]
+    cached_embeddings = await self.cache.get_many(keys)
+    # Identical texts in one call are embedded once
+    missing_keys = list(dict.fromkeys(key for key in keys if key not in cached_embeddings))
+    text_by_key = dict(zip(keys, texts))
+    result = await self._embed_batched([text_by_key[key] for key in missing_keys])
+    new_embeddings = dict(zip(missing_keys, result.embeddings))
+    await self.cache.put_many(new_embeddings)
+
+    return NomicEmbeddingResult(
+      embeddings=[cached_embeddings.get(key) or new_embeddings[key] for key in keys],
+      usage=result.usage,
+      model=self.model,
+    )
+
+  async def _embed_batched(self, texts: List[str]) -> NomicEmbeddingResult:
+    if not texts:
+      return NomicEmbeddingResult(
+        embeddings=[],
+        usage=EmbeddingUsage(prompt_tokens=0, total_tokens=0),
+        model=self.model,
+      )
+
+    request = _EmbeddingRequest(
+      texts=texts,
+      future=asyncio.get_running_loop().create_future(),
+      embeddings=[None] * len(texts),
+      remaining=len(texts),
+    )
+    for index, text in enumerate(texts):
+      text_tokens = _estimate_tokens(text)
+      # A text that would take the batch over its token limit starts the next batch
+      if self._pending and self._pending_tokens + text_tokens > self.max_batch_tokens:
+        self._flush()
+      self._pending.append((request, index))
+      self._pending_tokens += text_tokens
+      if len(self._pending) >= self.max_batch_size or self._pending_tokens >= self.max_batch_tokens:
+        self._flush()
+
+    if self._pending and self._flush_handle is None:
+      self._flush_handle = asyncio.get_running_loop().call_later(self.max_wait_seconds, self._flush)
+
+    await request.future
+    return NomicEmbeddingResult(
+      embeddings=request.embeddings,  # type: ignore
+      usage=EmbeddingUsage(prompt_tokens=request.total_tokens, total_tokens=request.total_tokens),
+      model=self.model,
+    )
+
+  def _flush(self) -> None:
+    if self._flush_handle is not None:
+      self._flush_handle.cancel()
+      self._flush_handle = None
+
+    batch, self._pending, self._pending_tokens = self._pending, [], 0
+    if batch:
+      task = asyncio.create_task(self._send_batch(batch))
+      # Keep a reference so the task is not garbage collected while it runs
+      self._batches.add(task)
+      task.add_done_callback(self._batches.discard)
+
+  async def _send_batch(self, batch: List[Tuple[_EmbeddingRequest, int]]) -> None:
+    texts = [request.texts[index] for request, index in batch]
+    try:
+      result = await self.client.embed_texts(
+        texts=texts,
+        model=self.model,
+        task_type=self.task_type,
+        dimensionality=self.dimensionality,
+      )
+    except Exception as e:
+      for request, _ in batch:
+        if not request.future.done():
+          request.future.set_exception(e)
+      return
+
+    # Split the usage between callers by their share of the batch's characters
+    batch_size = sum(len(text) for text in texts) or 1
+    for (request, index), text, embedding in zip(batch, texts, result.embeddings):
+      if request.future.done():
+        continue
+      request.embeddings[index] = embedding
+      request.total_tokens += round(result.usage.total_tokens * len(text) / batch_size)
+      request.remaining -= 1
+      if request.remaining == 0:
+        request.future.set_result(None)
+
+def _estimate_tokens(text: str) -> int:
+  return len(text) // 4 + 1
+
+# Batchers are bound to the event loop their futures and timers run on
+_embedding_batchers: WeakKeyDictionary[
+  asyncio.AbstractEventLoop,
+  Dict[Tuple[str, str, str], NomicEmbeddingBatcher],
+] = WeakKeyDictionary()
+
+def get_embedding_batcher(
+  api_key: str,
+  model: ModelType = "nomic-embed-text-v1.5",
+  task_type: TaskType = "search_document",
+) -> NomicEmbeddingBatcher:
+  """Return the embedding batcher shared by the callers on the running event loop."""
+  batchers = _embedding_batchers.setdefault(asyncio.get_running_loop(), {})
+  key = (api_key, model, task_type)
+  if key not in batchers:
+    batchers[key] = NomicEmbeddingBatcher(
+      NomicEmbeddings(api_key=api_key),
+      model,
+      task_type,
+      cache=get_embedding_cache(),
+    )
+  return batchers[key]
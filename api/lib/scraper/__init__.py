@@ -7,10 +7,13 @@ from .types import (
   DataExtractorConfig,
 )
 from .scraper import WebScraper
+from .browser_pool import BrowserPool, get_browser_pool
 from .extractor import DataExtractor
 
 __all__ = [
   "WebScraper",
+  "BrowserPool",
+  "get_browser_pool",
   "ScrapedLink",
   "ScrapedContent",
   "WebScraperResult",
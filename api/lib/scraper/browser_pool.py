@@ -0,0 +1,155 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+if TYPE_CHECKING:
+  from playwright.async_api import Browser, BrowserContext, Page, Playwright
+
+MAX_CONCURRENT_PAGES = 4
+MAX_PAGES_PER_CONTEXT = 20
+
+class _PooledContext:
+  def __init__(self, context: "BrowserContext"):
+    self.context = context
+    self.pages_served = 0
+    self.open_pages = 0
+    self.retired = False
+
+class BrowserPool:
+  """
+  A long-lived Chromium browser with reusable, stealth-patched contexts.
+
+  The browser starts on first use and stays up for the lifetime of the pool. Pages are handed
+  out from a shared context until it has served `max_pages_per_context` pages, after which the
+  context is closed once its last page is released and a fresh one takes its place. At most
+  `max_concurrent_pages` pages are open at any time. A disconnected browser is relaunched on the
+  next request.
+  """
+
+  def __init__(
+    self,
+    headless: bool = True,
+    browser_config: Optional[Dict[str, Any]] = None,
+    max_concurrent_pages: int = MAX_CONCURRENT_PAGES,
+    max_pages_per_context: int = MAX_PAGES_PER_CONTEXT,
+  ):
+    self.headless = headless
+    self.browser_config = browser_config or {}
+    self.max_pages_per_context = max_pages_per_context
+
+    self._semaphore = asyncio.Semaphore(max_concurrent_pages)
+    self._lock = asyncio.Lock()
+    self._playwright: Optional["Playwright"] = None
+    self._browser: Optional["Browser"] = None
+    self._current: Optional[_PooledContext] = None
+
+  @asynccontextmanager
+  async def page(self) -> AsyncIterator["Page"]:
+    """Open a page in a pooled context, waiting for a free slot if the pool is saturated."""
+    async with self._semaphore:
+      pooled_context = await self._acquire_context()
+      failed = False
+      try:
+        page = await pooled_context.context.new_page()
+        try:
+          yield page
+        finally:
+          await page.close()
+      except BaseException:
+        failed = True
+        raise
+      finally:
+        await self._release_context(pooled_context, failed)
+
+  async def close(self) -> None:
+    async with self._lock:
+      browser, playwright = self._browser, self._playwright
+      self._browser = None
+      self._playwright = None
+      self._current = None
+      if browser is not None:
+        await browser.close()
+      if playwright is not None:
+        await playwright.stop()
+
+  async def _acquire_context(self) -> _PooledContext:
+    async with self._lock:
+      browser = await self._get_browser()
+      current = self._current
+      if current is None or current.retired or current.pages_served >= self.max_pages_per_context:
+        if current is not None:
+          await self._retire(current)
+        current = _PooledContext(await self._new_context(browser))
+        self._current = current
+
+      current.pages_served += 1
+      current.open_pages += 1
+      return current
+
+  async def _release_context(self, pooled_context: _PooledContext, failed: bool) -> None:
+    async with self._lock:
+      pooled_context.open_pages -= 1
+      if failed:
+        # Navigation errors can leave a context in a bad state, so do not hand it out again
+        await self._retire(pooled_context)
+      elif pooled_context.retired and pooled_context.open_pages == 0:
+        await _close_quietly(pooled_context.context)
+
+  async def _retire(self, pooled_context: _PooledContext) -> None:
+    pooled_context.retired = True
+    if self._current is pooled_context:
+      self._current = None
+    if pooled_context.open_pages == 0:
+      await _close_quietly(pooled_context.context)
+
+  async def _get_browser(self) -> "Browser":
+    if self._browser is not None and self._browser.is_connected():
+      return self._browser
+
+    from playwright.async_api import async_playwright
+
+    if self._playwright is None:
+      self._playwright = await async_playwright().start()
+    self._current = None
+    self._browser = await self._playwright.chromium.launch(
+      headless=self.headless,
+      **self.browser_config
+    )
+    return self._browser
+
+  async def _new_context(self, browser: "Browser") -> "BrowserContext":
+    from undetected_playwright import Malenia
+
+    context = await browser.new_context()
+    await Malenia.apply_stealth(context)
+    return context
+
+async def _close_quietly(context: "BrowserContext") -> None:
+  try:
+    await context.close()
+  except Exception:
+    # The context is gone already when the browser crashed or was closed
+    pass
+
+# One pool per event loop and browser configuration, shared by every scraper on that loop
+_browser_pools: WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[bool, str], BrowserPool]] = WeakKeyDictionary()
+
+def get_browser_pool(
+  headless: bool = True,
+  browser_config: Optional[Dict[str, Any]] = None,
+) -> BrowserPool:
+  """Return the shared browser pool of the running event loop for the given launch options."""
+  pools = _browser_pools.setdefault(asyncio.get_running_loop(), {})
+  key = (headless, repr(sorted((browser_config or {}).items())))
+  pool = pools.get(key)
+  if pool is None:
+    pool = BrowserPool(headless=headless, browser_config=browser_config)
+    pools[key] = pool
+  return pool
+
+async def close_browser_pools() -> None:
+  """Close the browsers started by the shared pools of the running event loop, if any."""
+  pools: List[BrowserPool] = list(_browser_pools.pop(asyncio.get_running_loop(), {}).values())
+  for pool in pools:
+    await pool.close()
@@ -1,11 +1,18 @@
 import asyncio
-from typing import Optional, Tuple, Type, TypeVar
-from pydantic import BaseModel
+from contextvars import ContextVar
+from typing import Awaitable, Collection, Dict, List, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel, Field, create_model
 import json
 
+from lib.fake_llm import get_acompletion
+from lib.llm_limiter import estimate_tokens, get_llm_limiter
+from .llm_cache import LlmResponseCache, get_llm_cache
+from .truncation import TruncatedContent, get_max_content_tokens, truncate_to_tokens
 from .types import (
   DataExtractorConfig,
+  LlmUsage,
   PageDataExtractionResult,
+  ScrapedContent,
   SectionDataExtractionResult,
   WebScraperResult,
   TPage,
@@ -14,17 +21,22 @@ from .types import (
 
 TData = TypeVar("TData", bound=BaseModel)
 
+# LLM usage of the page being extracted, shared with the section requests it fans out to
+_page_usage: ContextVar[Optional[LlmUsage]] = ContextVar("page_usage", default=None)
+
 class DataExtractor():
   def __init__(self,
     model: str = "gpt-4o-mini",
     model_api_base: Optional[str] = 'https://api.openai.com/v1',
     model_api_key: Optional[str] = None,
     verbose: bool = False,
+    llm_cache: Optional[LlmResponseCache] = None,
     ):
     self.model = model
     self.model_api_base = model_api_base
     self.model_api_key = model_api_key
     self.verbose = verbose
+    self.llm_cache = llm_cache or get_llm_cache()
 
   def extract_from_scraped_data(
     self,
@@ -36,57 +48,335 @@ class DataExtractor():
   async def async_extract_from_scraped_data(
     self,
     scraped_page: WebScraperResult,
-    config: DataExtractorConfig[TPage, TSection]
+    config: DataExtractorConfig[TPage, TSection],
+    section_indexes: Optional[Collection[int]] = None,
   ) -> PageDataExtractionResult[TPage, TSection]:
+    """
+    Summarize and extract data from the whole page and its sections.
 
+    When `section_indexes` is given, only those sections go through the LLM and the others get
+    None in `sections_data`.
+    """
+
+    usage_token = _page_usage.set(LlmUsage())
+    try:
+      return await self._async_extract_page(scraped_page, config, section_indexes)
+    finally:
+      _page_usage.reset(usage_token)
+
+  async def _async_extract_page(
+    self,
+    scraped_page: WebScraperResult,
+    config: DataExtractorConfig[TPage, TSection],
+    section_indexes: Optional[Collection[int]],
+  ) -> PageDataExtractionResult[TPage, TSection]:
     if self.verbose:
       print("Extracting full page data using LLM...")
 
-    whole_page_summary, whole_page_data = await self._async_extract_data(
-      scraped_page.page_content,
+    max_content_tokens = get_max_content_tokens(self.model, config.max_content_tokens)
+    page_content = truncate_to_tokens(scraped_page.page_content, self.model, max_content_tokens)
+    page_data = asyncio.ensure_future(self._async_extract_data(
+      page_content.content,
       scraped_page.page_title,
       config.page_extraction_prompt,
       config.page_extraction_schema,
-    )
+      combined=config.combined_extraction,
+    ))
+    page_summary = asyncio.ensure_future(_get_summary(page_data))
 
     if self.verbose:
       print("Extracting section data using LLM...")
 
-    raw_sections_data = await asyncio.gather(*[
-      self._async_extract_data(
-        section.content,
-        section.title,
-        config.section_extraction_prompt,
-        config.section_extraction_schema,
-        whole_page_summary,
-      )
-      for section in scraped_page.scraped_sections
-    ])
+    extracted_indexes = [
+      index for index in range(len(scraped_page.scraped_sections))
+      if section_indexes is None or index in section_indexes
+    ]
+    section_contents = {
+      index: truncate_to_tokens(scraped_page.scraped_sections[index].content, self.model, max_content_tokens)
+      for index in extracted_indexes
+    }
+    # Small sections are packed into shared requests when batching is on
+    batches = self._pack_sections(section_contents, config)
+    # Sections start with the page, and only the parts that need its summary wait for it
+    (whole_page_summary, whole_page_data), _, *raw_batches = await asyncio.gather(
+      page_data,
+      page_summary,
+      *[
+        self._async_extract_section_batch(scraped_page, batch, section_contents, config, page_summary)
+        for batch in batches
+      ],
+    )
+
+    sections_data: List[Optional[SectionDataExtractionResult]] = [None] * len(scraped_page.scraped_sections)
+    for batch, raw_sections_data in zip(batches, raw_batches):
+      for index, (section_summary, section_data) in zip(batch, raw_sections_data):
+        sections_data[index] = SectionDataExtractionResult(
+          section_summary=section_summary,
+          section_data=section_data,
+          content_tokens=section_contents[index].content_tokens,
+          truncated_content_tokens=section_contents[index].truncated_content_tokens,
+        )
 
     return PageDataExtractionResult(
       whole_page_summary=whole_page_summary,
       whole_page_data=whole_page_data,
-      sections_data=[
-        SectionDataExtractionResult(
-          section_summary=section_summary,
-          section_data=section_data,
+      sections_data=sections_data,
+      content_tokens=page_content.content_tokens,
+      truncated_content_tokens=page_content.truncated_content_tokens,
+      usage=_page_usage.get() or LlmUsage(),
+    )
+
+  def _pack_sections(
+    self,
+    section_contents: Dict[int, TruncatedContent],
+    config: DataExtractorConfig,
+  ) -> List[List[int]]:
+    """Group sections under `section_batch_max_section_tokens` into batches within the token budget."""
+    if not config.section_batch_token_budget:
+      return [[index] for index in section_contents]
+
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    batch_tokens = 0
+    for index, section_content in section_contents.items():
+      section_tokens = section_content.truncated_content_tokens
+      if section_tokens > config.section_batch_max_section_tokens:
+        batches.append([index])
+        continue
+      if batch and batch_tokens + section_tokens > config.section_batch_token_budget:
+        batches.append(batch)
+        batch, batch_tokens = [], 0
+      batch.append(index)
+      batch_tokens += section_tokens
+    if batch:
+      batches.append(batch)
+    return batches
+
+  async def _async_extract_section_batch(
+    self,
+    scraped_page: WebScraperResult,
+    batch: List[int],
+    section_contents: Dict[int, TruncatedContent],
+    config: DataExtractorConfig[TPage, TSection],
+    context: Awaitable[str],
+  ) -> List[Tuple[str, TSection]]:
+    """
+    Extract a batch of sections in one request, falling back to a request per section.
+
+    Batched requests go out without the page context, alongside the page's own request, while
+    sections sent one by one wait for the page summary and carry it as context.
+    """
+    if len(batch) > 1:
+      try:
+        return await self._async_extract_batched_data(
+          [
+            scraped_page.scraped_sections[index].model_copy(update={"content": section_contents[index].content})
+            for index in batch
+          ],
+          config.section_extraction_prompt,
+          config.section_extraction_schema,
         )
-        for section_summary, section_data in raw_sections_data
-      ]
+      except ValueError as e:
+        if self.verbose:
+          print(f"Warning: Batched extraction failed, extracting sections one by one: {e}")
+
+    return list(await asyncio.gather(*[
+      self._async_extract_data(
+        section_contents[index].content,
+        scraped_page.scraped_sections[index].title,
+        config.section_extraction_prompt,
+        config.section_extraction_schema,
+        context,
+        combined=config.combined_extraction,
+      )
+      for index in batch
+    ]))
+
+  async def _async_extract_batched_data(
+    self,
+    sections: List[ScrapedContent],
+    extraction_prompt: str,
+    extraction_schema: Type[TData],
+  ) -> List[Tuple[str, TData]]:
+    """
+    Summarize and extract several sections of a page with a single structured output call.
+
+    The chunks of a batch give each other context, so the request does not wait for the page
+    summary, and its prompt is the same for every batch of every page.
+    """
+    section_result_schema = create_model(
+      f"{extraction_schema.__name__}SectionResult",
+      id=(int, Field(description="The id of the document chunk")),
+      summary=(str, Field(description="The main points of the document chunk, in the summary output format")),
+      data=(extraction_schema, Field(description="The data extracted from the document chunk")),
+    )
+    batch_schema = create_model(
+      f"{extraction_schema.__name__}SectionBatch",
+      sections=(List[section_result_schema], Field(description="One result for each document chunk")),  # type: ignore
+    )
+    summary_prompt, _ = self._get_summary_messages(None, "", None)
+    batch_prompt = f"""
+      You are given several document chunks, each with an id. For every chunk, return its `id`, its `summary` and its `data` in the `sections` list.
+
+      The `summary` of a chunk:
+      {summary_prompt}
+
+      The `data` of a chunk:
+      {extraction_prompt}
+      """
+    document_chunks = "\n".join(
+      f"""<DocumentChunkToAnalyze id="{chunk_id}">
+  <Heading>{section.title}</Heading>
+  <Content>{section.content}</Content>
+</DocumentChunkToAnalyze>"""
+      for chunk_id, section in enumerate(sections)
+    )
+
+    batch_response = await self._async_completion(
+      [
+        {"role": "system", "content": batch_prompt},
+        {"role": "user", "content": document_chunks},
+      ],
+      batch_schema,
     )
 
+    results = {
+      result.id: result  # type: ignore
+      for result in self._parse_response(batch_response, batch_schema).sections  # type: ignore
+    }
+    if sorted(results) != list(range(len(sections))):
+      raise ValueError(f"Expected results for {len(sections)} document chunks, got ids {sorted(results)}")
+    return [(results[chunk_id].summary, results[chunk_id].data) for chunk_id in range(len(sections))]
+
   async def _async_extract_data(
     self,
     parsed_content: str,
     title: str | None,
     extraction_prompt: str,
     extraction_schema: Type[TData],
-    context: Optional[str] = None,
+    context: Optional[Awaitable[str]] = None,
+    combined: bool = False,
+  ) -> Tuple[str, TData]:
+    """
+    Summarize and extract content already truncated to the model's token budget.
+
+    `context` resolves to the summary of the page a section belongs to. Only the summary needs
+    it, so the separate extraction request is sent without waiting for it.
+    """
+    async def get_summary_messages() -> Tuple[str, List[Dict[str, str]]]:
+      return self._get_summary_messages(title, parsed_content, await context if context else None)
+
+    if combined:
+      summary_prompt, content_messages = await get_summary_messages()
+      return await self._async_extract_combined_data(
+        summary_prompt,
+        content_messages,
+        extraction_prompt,
+        extraction_schema,
+      )
+
+    async def summarize() -> str:
+      summary_prompt, content_messages = await get_summary_messages()
+      summary_messages = [
+        {"role": "system", "content": summary_prompt},
+        *content_messages,
+      ]
+      return await self._async_completion(summary_messages)
+
+    extract_messages = [
+      {"role": "system", "content": extraction_prompt},
+      {"role": "user", "content": f"<Title>{title or 'None'}</Title>\n\n<Content>{parsed_content}</Content>"}
+    ]
+
+    summary_result, extract_result = await asyncio.gather(
+      summarize(),
+      self._async_completion(extract_messages, extraction_schema),
+    )
+    return summary_result, self._parse_response(extract_result, extraction_schema)
+
+  async def _async_extract_combined_data(
+    self,
+    summary_prompt: str,
+    content_messages: List[Dict[str, str]],
+    extraction_prompt: str,
+    extraction_schema: Type[TData],
   ) -> Tuple[str, TData]:
-    from litellm import acompletion
-    # Truncate content to 50k characters
-    truncated_content = f"{parsed_content[:50000]}..." if len(parsed_content) > 50000 else parsed_content
+    """Summarize and extract in a single structured output call that sends the content once."""
+    combined_schema = create_model(
+      f"{extraction_schema.__name__}WithSummary",
+      summary=(str, Field(description="The main points of the document, in the summary output format")),
+      data=(extraction_schema, Field(description="The data extracted from the document")),
+    )
+    combined_prompt = f"""
+      You have two tasks, and you answer both in a single JSON object.
+
+      Task 1, the `summary` field:
+      {summary_prompt}
+
+      Task 2, the `data` field:
+      {extraction_prompt}
+      """
+
+    combined_response = await self._async_completion(
+      [
+        {"role": "system", "content": combined_prompt},
+        *content_messages,
+      ],
+      combined_schema,
+    )
+
+    combined_result = self._parse_response(combined_response, combined_schema)
+    return combined_result.summary, combined_result.data  # type: ignore
+
+  async def _async_completion(
+    self,
+    messages: List[Dict[str, str]],
+    response_format: Optional[Type[BaseModel]] = None,
+  ) -> str:
+    """Return the content of the completion, reusing the cached response of an identical request."""
+    acompletion = get_acompletion()
+
+    cache_key = None
+    if self.llm_cache is not None:
+      cache_key = self.llm_cache.get_cache_key(self.model, messages, response_format)
+      cached_response = await self.llm_cache.get(cache_key)
+      if cached_response is not None:
+        _record_usage(None)
+        return cached_response
+
+    llm_limiter = get_llm_limiter()
+    estimated_tokens = estimate_tokens(messages)
+    async with llm_limiter.limit(estimated_tokens):
+      response = await acompletion(
+        model=self.model,
+        messages=messages,
+        response_format=response_format,
+        temperature=0.7,
+        api_base=self.model_api_base,
+        api_key=self.model_api_key,
+      )
+    llm_limiter.record_usage(estimated_tokens, _get_total_tokens(response))
+    _record_usage(response)
+    content = str(response.choices[0].message.content)  # type: ignore
 
+    # Invalid structured output is not cached, so a retry asks the LLM again
+    if self.llm_cache is not None and cache_key is not None and _is_valid_response(content, response_format):
+      await self.llm_cache.put(cache_key, self.model, content)
+    return content
+
+  def _get_summary_messages(
+    self,
+    title: str | None,
+    truncated_content: str,
+    context: Optional[str],
+  ) -> Tuple[str, List[Dict[str, str]]]:
+    """
+    Return the summary system prompt and the user messages carrying the content.
+
+    Sections of a page are sent with the page context as a message of its own ahead of the
+    section. The system prompt and that message are the same for every section of the page,
+    so providers with prompt caching reuse them across the page's requests.
+    """
     if not context:
       summary_prompt = f"""
       1. Analyze the input text and generate 5 essential questions that, when answered, capture the main points and core meaning of the text.
@@ -104,12 +394,12 @@ class DataExtractor():
       * <Main point 2> (reframed from answer to question 2)
       ...
       """
-      content_message = f"""
+      content_messages = [{"role": "user", "content": f"""
 <Document>
   <Title>{title or 'None'}</Title>
   <Content>{truncated_content}</Content>
 </Document>
-"""
+"""}]
     else:
       summary_prompt = f"""
       1. You are analyzing the document chunk within a given document context. Generate 5 essential questions that, when answered, capture the main points and core meaning of the text
@@ -129,52 +419,69 @@ class DataExtractor():
       * <Main point 2> (reframed from answer to question 2)
       ...
       """
-      content_message = f"""
-<ParentDocumentContext>
-  {context}
-</ParentDocumentContext>
-<DocumentChunkToAnalyze>
+      content_messages = [
+        self._get_page_context_message(context),
+        {"role": "user", "content": f"""<DocumentChunkToAnalyze>
   <Heading>{title}</Heading>
   <Content>{truncated_content}</Content>
-</DocumentChunkToAnalyze>"""
-
-    summary_messages = [
-      {"role": "system", "content": summary_prompt},
-      {"role": "user", "content": content_message}
-    ]
-
-    summary_response = await acompletion(
-      model=self.model,
-      messages=summary_messages,
-      temperature=0.7,
-      api_base=self.model_api_base,
-      api_key=self.model_api_key,
-    )
-
+</DocumentChunkToAnalyze>"""},
+      ]
 
-    summary_result = str(summary_response.choices[0].message.content)  # type: ignore
+    return summary_prompt, content_messages
 
-    extract_messages = [
-      {"role": "system", "content": extraction_prompt},
-      {"role": "user", "content": f"<Title>{title or 'None'}</Title>\n\n<Content>{truncated_content}</Content>"}
-    ]
-
-    extract_response = await acompletion(
-      model=self.model,
-      messages=extract_messages,
-      response_format=extraction_schema,
-      temperature=0.7,
-      api_base=self.model_api_base,
-      api_key=self.model_api_key,
-    )
+  def _get_page_context_message(self, context: str) -> Dict[str, str]:
+    return {"role": "user", "content": f"""<ParentDocumentContext>
+  {context}
+</ParentDocumentContext>"""}
 
-    extract_result = str(extract_response.choices[0].message.content)  # type: ignore
+  def _parse_response(self, response_content: str, schema: Type[TData]) -> TData:
     try:
-      raw_result = json.loads(extract_result)
-      extracted_page_data = extraction_schema.model_validate(raw_result)
-      return summary_result, extracted_page_data
+      return schema.model_validate(json.loads(response_content))
     except Exception as e:
       if self.verbose:
         print(f"Warning: Failed to parse or validate LLM response: {e}")
       raise ValueError(f"Failed to parse or validate LLM response: {e}")
 
+
+async def _get_summary(page_data: Awaitable[Tuple[str, BaseModel]]) -> str:
+  summary, _ = await page_data
+  return summary
+
+def _record_usage(response) -> None:
+  """Add the tokens of a response to the usage of the page being extracted, if any."""
+  usage = _page_usage.get()
+  if usage is None:
+    return
+  if response is None:
+    usage.cached_responses += 1
+    return
+
+  response_usage = getattr(response, "usage", None)
+  prompt_tokens_details = getattr(response_usage, "prompt_tokens_details", None)
+  usage.requests += 1
+  usage.prompt_tokens += getattr(response_usage, "prompt_tokens", None) or 0
+  usage.cached_prompt_tokens += getattr(prompt_tokens_details, "cached_tokens", None) or 0
+  usage.completion_tokens += getattr(response_usage, "completion_tokens", None) or 0
+  usage.cost_usd += _get_cost(response)
+
+def _get_cost(response) -> float:
+  from litellm.cost_calculator import completion_cost
+
+  try:
+    return completion_cost(completion_response=response)
+  except Exception:
+    # Responses of models without a known price
+    return 0.0
+
+def _get_total_tokens(response) -> Optional[int]:
+  usage = getattr(response, "usage", None)
+  return getattr(usage, "total_tokens", None)
+
+def _is_valid_response(content: str, response_format: Optional[Type[BaseModel]]) -> bool:
+  if response_format is None:
+    return True
+  try:
+    response_format.model_validate_json(content)
+    return True
+  except ValueError:
+    return False
@@ -0,0 +1,219 @@
+import asyncio
+import gzip
+import os
+import threading
+import time
+from hashlib import sha256
+from pathlib import Path
+from typing import List, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+from lib.config import Settings
+from .types import FetchedPage, HttpValidators
+
+settings = Settings()
+
+# Eviction frees space down to this share of `max_bytes`, so a full cache is not scanned on every put
+EVICTION_TARGET_RATIO = 0.9
+# Workers sharing the directory add blobs too, so the running size is recounted this often
+SIZE_RESYNC_INTERVAL_PUTS = 1000
+
+class HtmlCacheMissError(Exception):
+  pass
+
+class CachedPage(BaseModel):
+  url: str
+  fetched_at: float
+  content_sha256: str
+  size: int
+  validators: HttpValidators = HttpValidators()
+
+class HtmlCache:
+  """
+  Compressed on-disk cache of fetched HTML.
+
+  Pages are stored content-addressed as `objects/<content_sha256>.html.gz`, so refetching an
+  unchanged page or two URLs serving the same document share one blob. `entries/<url hash>.json`
+  records the latest fetch of each URL with its fetch time and content hash. Entries older than
+  `ttl_seconds` are treated as misses, and the oldest fetches are evicted once the blobs exceed
+  `max_bytes`. The blob size is kept as a running total, so the directory is only scanned when
+  the total goes over budget or is due to be recounted.
+  """
+
+  def __init__(self, directory: str, ttl_seconds: int, max_bytes: int):
+    self.directory = Path(directory)
+    self.ttl_seconds = ttl_seconds
+    self.max_bytes = max_bytes
+    self._size_lock = threading.Lock()
+    self._evict_lock = threading.Lock()
+    self._blob_bytes: Optional[int] = None
+    self._puts_since_resync = 0
+
+  async def get(self, url: str, ignore_ttl: bool = False) -> Optional[str]:
+    """Return the cached HTML of `url`, or None when it was never fetched or has expired."""
+    page = await self.get_page(url, ignore_ttl)
+    return page.content if page else None
+
+  async def get_page(self, url: str, ignore_ttl: bool = False) -> Optional[FetchedPage]:
+    """Return the cached fetch of `url` with its HTTP validators."""
+    return await asyncio.to_thread(self._get_page, url, ignore_ttl)
+
+  async def put(
+    self,
+    url: str,
+    html_content: str,
+    validators: Optional[HttpValidators] = None,
+  ) -> CachedPage:
+    return await asyncio.to_thread(self._put, url, html_content, validators or HttpValidators())
+
+  def _get_page(self, url: str, ignore_ttl: bool) -> Optional[FetchedPage]:
+    entry = self._read_entry(url)
+    if entry is None:
+      return None
+    if not ignore_ttl and time.time() - entry.fetched_at > self.ttl_seconds:
+      return None
+
+    try:
+      with gzip.open(self._object_path(entry.content_sha256), "rt", encoding="utf-8") as f:
+        return FetchedPage(url=url, content=f.read(), validators=entry.validators)
+    except FileNotFoundError:
+      # The blob was evicted along with an older entry that shared it
+      return None
+
+  def _put(self, url: str, html_content: str, validators: HttpValidators) -> CachedPage:
+    content_sha256 = _sha256(html_content)
+    object_path = self._object_path(content_sha256)
+    added_bytes = 0
+    if not object_path.exists():
+      object_path.parent.mkdir(parents=True, exist_ok=True)
+      compressed_content = gzip.compress(html_content.encode("utf-8"))
+      _write_atomically(object_path, compressed_content)
+      added_bytes = len(compressed_content)
+
+    entry = CachedPage(
+      url=url,
+      fetched_at=time.time(),
+      content_sha256=content_sha256,
+      size=object_path.stat().st_size,
+      validators=validators,
+    )
+    entry_path = self._entry_path(url)
+    entry_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomically(entry_path, entry.model_dump_json().encode("utf-8"))
+
+    if self._add_blob_bytes(added_bytes):
+      self._evict()
+    return entry
+
+  def _add_blob_bytes(self, added_bytes: int) -> bool:
+    """Add a new blob to the running size and return whether the directory should be scanned."""
+    with self._size_lock:
+      self._puts_since_resync += 1
+      if self._blob_bytes is None or self._puts_since_resync >= SIZE_RESYNC_INTERVAL_PUTS:
+        return True
+      self._blob_bytes += added_bytes
+      return self._blob_bytes > self.max_bytes
+
+  def _evict(self) -> None:
+    # Another put is already scanning the directory
+    if not self._evict_lock.acquire(blocking=False):
+      return
+    try:
+      total_size = self._evict_to_target()
+    finally:
+      self._evict_lock.release()
+    with self._size_lock:
+      self._blob_bytes = total_size
+      self._puts_since_resync = 0
+
+  def _evict_to_target(self) -> int:
+    """Recount the blobs and evict the oldest fetches if over budget, returning the new size."""
+    blob_sizes = {}
+    for path in self._iter_dir("objects"):
+      try:
+        blob_sizes[path.name] = path.stat().st_size
+      except FileNotFoundError:
+        continue
+    total_size = sum(blob_sizes.values())
+    if total_size <= self.max_bytes:
+      return total_size
+
+    target_size = self.max_bytes * EVICTION_TARGET_RATIO
+
+    entries: List[tuple[float, Path, CachedPage]] = []
+    for path in self._iter_dir("entries"):
+      try:
+        entry = CachedPage.model_validate_json(path.read_text())
+      except (OSError, ValueError):
+        continue
+      entries.append((entry.fetched_at, path, entry))
+    entries.sort(key=lambda item: item[0])
+
+    live_blobs = {f"{entry.content_sha256}.html.gz" for _, _, entry in entries}
+    for blob_name in set(blob_sizes) - live_blobs:
+      total_size -= self._remove(self.directory / "objects" / blob_name, blob_sizes[blob_name])
+
+    referenced_by = {}
+    for _, _, entry in entries:
+      referenced_by[entry.content_sha256] = referenced_by.get(entry.content_sha256, 0) + 1
+
+    for _, path, entry in entries:
+      if total_size <= target_size:
+        break
+      self._remove(path, 0)
+      referenced_by[entry.content_sha256] -= 1
+      if referenced_by[entry.content_sha256] == 0:
+        blob_name = f"{entry.content_sha256}.html.gz"
+        total_size -= self._remove(self.directory / "objects" / blob_name, blob_sizes.get(blob_name, 0))
+    return total_size
+
+  def _read_entry(self, url: str) -> Optional[CachedPage]:
+    try:
+      return CachedPage.model_validate_json(self._entry_path(url).read_text())
+    except FileNotFoundError:
+      return None
+
+  def _entry_path(self, url: str) -> Path:
+    return self.directory / "entries" / f"{_sha256(url)}.json"
+
+  def _object_path(self, content_sha256: str) -> Path:
+    return self.directory / "objects" / f"{content_sha256}.html.gz"
+
+  def _iter_dir(self, name: str) -> List[Path]:
+    directory = self.directory / name
+    if not directory.exists():
+      return []
+    # Skip files that are still being written
+    return [path for path in directory.iterdir() if not path.name.startswith(".")]
+
+  @staticmethod
+  def _remove(path: Path, size: int) -> int:
+    try:
+      path.unlink()
+      return size
+    except FileNotFoundError:
+      return 0
+
+def _write_atomically(path: Path, data: bytes) -> None:
+  # Concurrent crawls may read the file while it is being written
+  tmp_path = path.with_name(f".{path.name}.{uuid4().hex}.tmp")
+  tmp_path.write_bytes(data)
+  os.replace(tmp_path, path)
+
+def _sha256(value: str) -> str:
+  return sha256(value.encode("utf-8")).hexdigest()
+
+_html_cache: Optional[HtmlCache] = None
+
+def get_html_cache() -> Optional[HtmlCache]:
+  """Return the HTML cache configured with `HTML_CACHE_DIR`, or None when caching is off."""
+  global _html_cache
+  if _html_cache is None and settings.html_cache_dir:
+    _html_cache = HtmlCache(
+      settings.html_cache_dir,
+      ttl_seconds=settings.html_cache_ttl_seconds,
+      max_bytes=settings.html_cache_max_bytes,
+    )
+  return _html_cache
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from pydantic import BaseModel
+
+from lib.config import Settings
+
+settings = Settings()
+
+class LlmCacheStats(BaseModel):
+  hits: int = 0
+  misses: int = 0
+  evictions: int = 0
+
+class LlmResponseCache:
+  """
+  SQLite cache of LLM completions keyed by model, prompt, response schema and content hash.
+
+  Re-crawls, retried steps and pages served under several URLs send the exact same request,
+  so the response of the first call is reused. Entries older than `ttl_seconds` are misses,
+  and the least recently used entries are evicted once there are more than `max_entries`.
+  """
+
+  def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+    self.path = Path(path)
+    self.ttl_seconds = ttl_seconds
+    self.max_entries = max_entries
+    self.stats = LlmCacheStats()
+    self._lock = threading.Lock()
+    self._initialized = False
+
+  @staticmethod
+  def get_cache_key(
+    model: str,
+    messages: List[Dict[str, str]],
+    response_format: Optional[Type[BaseModel]] = None,
+  ) -> str:
+    """Hash the request. The content is hashed on its own so large pages are not copied around."""
+    prompt = [
+      {"role": message["role"], "content_sha256": _sha256(message["content"])}
+      for message in messages
+    ]
+    schema = response_format.model_json_schema() if response_format else None
+    return _sha256(json.dumps([model, prompt, schema], sort_keys=True))
+
+  async def get(self, cache_key: str) -> Optional[str]:
+    response = await asyncio.to_thread(self._get, cache_key)
+    if response is None:
+      self.stats.misses += 1
+      logging.debug("LLM cache miss %s (%s)", cache_key, self.stats)
+    else:
+      self.stats.hits += 1
+      logging.debug("LLM cache hit %s (%s)", cache_key, self.stats)
+    return response
+
+  async def put(self, cache_key: str, model: str, response: str) -> None:
+    await asyncio.to_thread(self._put, cache_key, model, response)
+
+  def _get(self, cache_key: str) -> Optional[str]:
+    now = time.time()
+    with self._connect() as connection:
+      row = connection.execute(
+        "SELECT response FROM llm_responses WHERE cache_key = ? AND created_at > ?",
+        (cache_key, now - self.ttl_seconds),
+      ).fetchone()
+      if row is not None:
+        connection.execute(
+          "UPDATE llm_responses SET accessed_at = ? WHERE cache_key = ?",
+          (now, cache_key),
+        )
+    return row[0] if row else None
+
+  def _put(self, cache_key: str, model: str, response: str) -> None:
+    now = time.time()
+    with self._connect() as connection:
+      connection.execute(
+        "INSERT OR REPLACE INTO llm_responses (cache_key, model, response, created_at, accessed_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (cache_key, model, response, now, now),
+      )
+      evicted = connection.execute(
+        "DELETE FROM llm_responses WHERE created_at <= ? OR cache_key IN ("
+        "  SELECT cache_key FROM llm_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+        ")",
+        (now - self.ttl_seconds, self.max_entries),
+      ).rowcount
+    with self._lock:
+      self.stats.evictions += evicted
+
+  @contextmanager
+  def _connect(self) -> Iterator[sqlite3.Connection]:
+    with self._lock:
+      if not self._initialized:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+          # Several workers may share the cache file
+          connection.execute("PRAGMA journal_mode=WAL")
+          connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "  cache_key TEXT PRIMARY KEY,"
+            "  model TEXT NOT NULL,"
+            "  response TEXT NOT NULL,"
+            "  created_at REAL NOT NULL,"
+            "  accessed_at REAL NOT NULL"
+            ")"
+          )
+          connection.execute(
+            "CREATE INDEX IF NOT EXISTS llm_responses_accessed_at ON llm_responses (accessed_at)"
+          )
+        self._initialized = True
+    with closing(sqlite3.connect(self.path, timeout=30)) as connection, connection:
+      yield connection
+
+def _sha256(value: Any) -> str:
+  return sha256(str(value).encode("utf-8")).hexdigest()
+
+_llm_cache: Optional[LlmResponseCache] = None
+
+def get_llm_cache() -> Optional[LlmResponseCache]:
+  """Return the LLM response cache configured with `LLM_CACHE_PATH`, or None when caching is off."""
+  global _llm_cache
+  if _llm_cache is None and settings.llm_cache_path:
+    _llm_cache = LlmResponseCache(
+      settings.llm_cache_path,
+      ttl_seconds=settings.llm_cache_ttl_seconds,
+      max_entries=settings.llm_cache_max_entries,
+    )
+  return _llm_cache
@@ -0,0 +1,297 @@
+"""
+CPU-bound HTML parsing for the web scraper.
+
+Everything here is a module-level function over picklable inputs and outputs, so a page can be
+parsed inline or handed to a process pool worker with the same code.
+"""
+import asyncio
+import html.entities
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse
+
+import html2text
+from bs4 import BeautifulSoup, Tag
+
+from lib.config import Settings
+from lib.crawler.url_patterns import get_url_pattern_matcher
+from .types import ScrapedContent, ScrapedLink, ScrapingConfig, WebScraperResult
+
+settings = Settings()
+
+SECTION_MARKER_ATTRIBUTE = "data-section-marker"
+NBSP_PLACEHOLDER = "&nbsp_place_holder;"
+
+_parse_executor: Optional[ProcessPoolExecutor] = None
+
+def parse_page(
+  html_content: str,
+  url: str,
+  scraping_config: ScrapingConfig,
+  allowed_url_patterns: Optional[Tuple[str, ...]] = None,
+) -> WebScraperResult:
+  """
+  Convert a fetched page to markdown and split it into sections.
+
+  When `allowed_url_patterns` is given, only links matching one of them are kept. The patterns
+  travel to a pool worker as a tuple, and the worker builds its own cached matcher from them.
+  """
+  link_filter = get_url_pattern_matcher(allowed_url_patterns) if allowed_url_patterns is not None else None
+
+  # Parse the page once, convert it to markdown once and split both into sections
+  soup = BeautifulSoup(html_content, scraping_config.html_parser)
+  title = soup.title.text if soup.title else ""
+  page_markdown = PageMarkdown(soup, url, scraping_config.splitting_selector)
+
+  return WebScraperResult(
+    url=url,
+    page_title=title,
+    page_content=page_markdown.content,
+    scraped_sections=list(extract_tag_sections(
+      soup,
+      url,
+      scraping_config,
+      link_filter=link_filter,
+      page_markdown=page_markdown,
+    )),
+  )
+
+async def async_parse_page(
+  html_content: str,
+  url: str,
+  scraping_config: ScrapingConfig,
+  allowed_url_patterns: Optional[Tuple[str, ...]] = None,
+) -> WebScraperResult:
+  """Parse a page in the parse process pool when one is configured, inline otherwise."""
+  executor = get_parse_executor()
+  if executor is None:
+    return parse_page(html_content, url, scraping_config, allowed_url_patterns)
+
+  loop = asyncio.get_running_loop()
+  return await loop.run_in_executor(executor, parse_page, html_content, url, scraping_config, allowed_url_patterns)
+
+def get_parse_executor() -> Optional[ProcessPoolExecutor]:
+  """
+  Return the process pool used for parsing, starting it on first use.
+
+  Parsing a large page blocks the event loop for seconds, stalling every other crawl handled
+  by the worker. Set `HTML_PARSE_WORKERS` to parse in that many processes instead; the default
+  of 0 parses inline.
+  """
+  global _parse_executor
+  if _parse_executor is None and settings.html_parse_workers > 0:
+    _parse_executor = ProcessPoolExecutor(
+      max_workers=settings.html_parse_workers,
+      # Forking a process that runs an event loop and client threads is not safe
+      mp_context=multiprocessing.get_context("spawn"),
+    )
+  return _parse_executor
+
+def close_parse_executor() -> None:
+  global _parse_executor
+  if _parse_executor is not None:
+    _parse_executor.shutdown(wait=False, cancel_futures=True)
+    _parse_executor = None
+
+def extract_tag_sections(
+  root: Tag,
+  base_url: str,
+  scraping_config: ScrapingConfig,
+  split_depth: int = 0,
+  id_counter: int = 0,
+  link_filter: Optional[Callable[[str], bool]] = None,
+  page_markdown: Optional["PageMarkdown"] = None,
+) -> Iterator[ScrapedContent]:
+  """
+  Walk an already parsed tree, splitting sections that are too large on the next selector.
+
+  Oversized sections are split in place on their subtree rather than serialized and parsed
+  again, so a page is parsed once however deep the splitting goes. Their markdown is sliced
+  from `page_markdown`, converted from `root` when not given, so no markup is converted twice.
+  Links whose normalized URL `link_filter` rejects are skipped.
+  """
+  if page_markdown is None:
+    page_markdown = PageMarkdown(root, base_url, scraping_config.splitting_selector)
+
+  can_split = split_depth < len(scraping_config.splitting_selector) - 1
+  sections = _select_sections(root, scraping_config.splitting_selector[split_depth])
+  if not sections and can_split:
+    yield from extract_tag_sections(
+      root, base_url, scraping_config, split_depth + 1, id_counter, link_filter, page_markdown,
+    )
+
+  for section in sections:
+    parsed_content = page_markdown.get_section_content(section)
+
+    if len(parsed_content) > scraping_config.max_chunk_size and can_split:
+      split_successful = False
+      for subsection in extract_tag_sections(
+        section, base_url, scraping_config, split_depth + 1, id_counter, link_filter, page_markdown,
+      ):
+        id_counter += 1
+        split_successful = True
+        yield subsection
+
+      if split_successful:
+        # Continue to the next section
+        continue
+
+    id_counter += 1
+    id : Optional[str] = str(section.get('id') or id_counter)
+    if scraping_config.section_id_selector:
+      id_element = section.select_one(scraping_config.section_id_selector)
+      if id_element:
+        id = str(id_element.get(scraping_config.section_id_selector))
+    section_title_soup = section.select_one(scraping_config.title_selector)
+    section_title = section_title_soup.text if section_title_soup else ""
+
+    links = section.find_all('a')
+    scraped_links = [
+      ScrapedLink(
+        url=url,
+        anchor_text=anchor_text
+      )
+      for link in links
+      if (anchor_text := link.text.strip())
+      and (url := normalize_url(link.get('href'), base_url))
+      and (link_filter is None or link_filter(url))
+    ]
+    yield ScrapedContent(
+      id=id,
+      content=parsed_content,
+      title=section_title,
+      scraped_links=scraped_links,
+    )
+
+class PageMarkdown:
+  """
+  Markdown of a parsed page, converted in a single html2text pass.
+
+  Every element matching one of the splitting selectors is tagged with a marker attribute for
+  the conversion, and `_SectionRecordingHTML2Text` records where its output starts and ends.
+  A section's markdown is then a slice of the page's output, wrapped like a standalone
+  conversion, instead of another html2text run over markup that was already converted.
+  Sections nested in a quote, list, preformatted block or link are converted on their own,
+  since their slice carries the prefixes and indentation of that context.
+  """
+
+  def __init__(self, root: Tag, base_url: str, splitting_selectors: List[str]):
+    self.base_url = base_url
+    sections = root.select(", ".join(splitting_selectors))
+    if root.parent is not None and root.css.match(", ".join(splitting_selectors)):
+      sections.insert(0, root)
+
+    self._markers: Dict[int, str] = {}
+    for marker, section in enumerate(sections):
+      section[SECTION_MARKER_ATTRIBUTE] = str(marker)
+      self._markers[id(section)] = str(marker)
+    try:
+      markup = str(root)
+    finally:
+      for section in sections:
+        del section[SECTION_MARKER_ATTRIBUTE]
+
+    self._converter = _SectionRecordingHTML2Text(base_url)
+    self.content = self._converter.handle(markup).strip()
+    self._section_contents: Dict[str, str] = {}
+
+  def get_section_content(self, section: Tag) -> str:
+    marker = self._markers.get(id(section))
+    if marker is None or marker not in self._converter.spans:
+      return html_to_markdown(str(section), self.base_url)
+
+    if marker not in self._section_contents:
+      start, end = self._converter.spans[marker]
+      self._section_contents[marker] = self._converter.wrap_output(start, end)
+    return self._section_contents[marker]
+
+class _SectionRecordingHTML2Text(html2text.HTML2Text):
+  """HTML2Text that records the output offsets of each element carrying a section marker."""
+
+  def __init__(self, base_url: str):
+    super().__init__(baseurl=base_url)
+    _configure_html2text(self)
+    self.spans: Dict[str, Tuple[int, int]] = {}
+    self._output_length = 0
+    self._raw_output = ""
+    self._open_markers: Dict[str, List[Tuple[Optional[str], int]]] = {}
+
+  def outtextf(self, s: str) -> None:
+    super().outtextf(s)
+    self._output_length += len(s)
+
+  def handle_tag(self, tag: str, attrs: Dict[str, Optional[str]], start: bool) -> None:
+    if start:
+      # Output nested in a quote, list, preformatted block or link is prefixed or indented for
+      # it, so such sections are left unrecorded and converted on their own
+      marker = None if self._in_nested_context() else attrs.get(SECTION_MARKER_ATTRIBUTE)
+      self._open_markers.setdefault(tag, []).append((marker, self._output_length))
+      super().handle_tag(tag, attrs, start)
+      return
+
+    super().handle_tag(tag, attrs, start)
+    open_markers = self._open_markers.get(tag)
+    if open_markers:
+      marker, start_offset = open_markers.pop()
+      if marker is not None:
+        self.spans[marker] = (start_offset, self._output_length)
+
+  def _in_nested_context(self) -> bool:
+    return bool(self.blockquote or self.list or self.pre or self.astack)
+
+  def finish(self) -> str:
+    self._raw_output = "".join(self.outtextlist)
+    return super().finish()
+
+  def wrap_output(self, start: int, end: int) -> str:
+    """Return the output between two offsets as `handle` would have returned it on its own."""
+    nbsp = html.entities.html5["nbsp;"] if self.unicode_snob else " "
+    return self.optwrap(self._raw_output[start:end].replace(NBSP_PLACEHOLDER, nbsp)).strip()
+
+def html_to_markdown(html_content: str, base_url: str) -> str:
+  h = html2text.HTML2Text(baseurl=base_url)
+  _configure_html2text(h)
+  return h.handle(html_content).strip()
+
+def _configure_html2text(h: html2text.HTML2Text) -> None:
+  h.ignore_links = False
+  h.ignore_images = True
+
+def normalize_url(href: str, base_url: str) -> str:
+  """Normalize relative URLs to absolute URLs and filter out self-links"""
+  if not href:
+    return ""
+
+  # Handle fragment-only URLs (anchor links)
+  if href.startswith('#'):
+    return ""
+
+  # Parse both URLs
+  parsed_href = urlparse(href)
+  parsed_base = urlparse(base_url)
+
+  # If there's no scheme (protocol) or netloc (domain), it's relative
+  if not parsed_href.scheme and not parsed_href.netloc:
+    full_url = urljoin(base_url, href)
+    parsed_full = urlparse(full_url)
+  else:
+    full_url = href
+    parsed_full = parsed_href
+
+  # Check if it points to the same page
+  if (parsed_full.scheme == parsed_base.scheme and
+      parsed_full.netloc == parsed_base.netloc and
+      parsed_full.path == parsed_base.path):
+    return ""
+
+  # Remove the fragment and reconstruct the URL
+  cleaned_parts = parsed_full._replace(fragment='')
+  return urlunparse(cleaned_parts)
+
+def _select_sections(root: Tag, selector: str) -> List[Tag]:
+  """Select the sections under `root`, including `root` itself when it matches the selector."""
+  sections = root.select(selector)
+  if root.parent is not None and root.css.match(selector):
+    sections.insert(0, root)
+  return sections
@@ -2,10 +2,29 @@
 Simple web scraper with LLM integration
 """
 import asyncio
-from typing import AsyncGenerator, Optional, List
-
-from aiohttp import ClientTimeout
-from .types import ScrapedLink, ScrapedContent, WebScraperResult, ScraperType, ScrapingConfig
+import json
+from typing import AsyncGenerator, Dict, List, Mapping, Optional, Tuple
+
+from aiohttp import ClientSession, ClientTimeout
+from bs4 import BeautifulSoup
+from lib.http_client import get_http_session
+from lib.crawler.url_patterns import get_url_pattern_matcher
+from .types import (
+  FetchedPage,
+  HttpValidators,
+  ScrapedContent,
+  ScraperType,
+  ScrapingConfig,
+  WebScraperResult,
+)
+from .parsing import (
+  async_parse_page,
+  extract_tag_sections,
+  html_to_markdown,
+  normalize_url,
+)
+from .browser_pool import BrowserPool, get_browser_pool
+from .html_cache import HtmlCache, HtmlCacheMissError, get_html_cache
 from lib.logger import get_logger_from_context
 
 class WebScraper():
@@ -18,8 +37,22 @@ class WebScraper():
     model_api_base: Optional[str] = 'https://api.openai.com/v1',
     model_api_key: Optional[str] = None,
   scraping_service_api_key: Optional[str] = None,
+    browser_pool: Optional[BrowserPool] = None,
+    session: Optional[ClientSession] = None,
+    html_cache: Optional[HtmlCache] = None,
+    cache_only: bool = False,
   ):
-    """Initialize the web scraper with configuration options"""
+    """
+    Initialize the web scraper with configuration options.
+
+    Playwright pages come from `browser_pool`, or from the shared pool of the running event loop
+    when none is given, so the browser outlives a single scrape. ScrapingFish requests go
+    through `session`, or the shared HTTP session of the running event loop.
+
+    Fetched pages are read from and written to `html_cache`, or the cache configured with
+    `HTML_CACHE_DIR`. With `cache_only`, pages are only read from the cache, expired or not,
+    and a miss raises `HtmlCacheMissError` instead of fetching.
+    """
     self.headless = headless
     self.model = model
     self.model_api_base = model_api_base
@@ -28,24 +61,50 @@ class WebScraper():
     self.scraper = scraper
     # Playwright configuration
     self.browser_config = {}
+    self.browser_pool = browser_pool
+    self.session = session
+    self.html_cache = html_cache or get_html_cache()
+    self.cache_only = cache_only
     self.RETRY_LIMIT = 3
     self.TIMEOUT = 10
 
     self.logger = get_logger_from_context()
 
   async def async_fetch_content(self, url: str) -> str:
+    page = await self.async_fetch_page(url)
+    assert page.content is not None, "Unconditional fetches always return content"
+    return page.content
+
+  async def async_fetch_page(self, url: str, validators: Optional[HttpValidators] = None) -> FetchedPage:
+    """
+    Fetch a page, from the HTML cache when possible.
+
+    With `validators`, the page is revalidated against the site with a conditional request
+    instead of being read from the cache, and an unchanged page comes back as `not_modified`
+    without content.
+    """
+    if self.html_cache and (validators is None or self.cache_only):
+      cached_page = await self.html_cache.get_page(url, ignore_ttl=self.cache_only)
+      if cached_page is not None:
+        self.logger.info(f"Using cached HTML for {url}")
+        return cached_page
+
+    if self.cache_only:
+      raise HtmlCacheMissError(f"{url} is not in the HTML cache")
+
     if self.scraper == "playwright":
-      return await self.async_fetch_content_playwright(url)
+      page = await self.async_fetch_page_playwright(url, validators)
     elif self.scraper == "scraping_fish":
-      return await self.async_fetch_content_scraping_fish(url)
+      page = await self.async_fetch_page_scraping_fish(url, validators)
     else:
       raise ValueError(f"Invalid scraper: {self.scraper}")
 
-  async def async_fetch_content_scraping_fish(self, url: str) -> str:
-    """Fetch content from URL using ScrapingFish API"""
-    import aiohttp
-    import json
+    if self.html_cache and page.content is not None:
+      await self.html_cache.put(url, page.content, page.validators)
+    return page
 
+  async def async_fetch_page_scraping_fish(self, url: str, validators: Optional[HttpValidators] = None) -> FetchedPage:
+    """Fetch content from URL using ScrapingFish API"""
     if not self.scraping_service_api_key:
       raise ValueError("ScrapingFish requires an API key. Please provide it via scraping_service_api_key parameter.")
 
@@ -56,21 +115,29 @@ class WebScraper():
       "url": url,
       "trial_timeout_ms": self.TIMEOUT * 1000,
     }
+    conditional_headers = _get_conditional_headers(validators)
+    if conditional_headers:
+      # Forward the validators to the site and its 304 back to us
+      params["headers"] = json.dumps(conditional_headers)
+      params["forward_original_status"] = "true"
 
+    session = self.session or get_http_session()
     attempt = 0
     while attempt < self.RETRY_LIMIT:
       try:
-        async with aiohttp.ClientSession() as session:
-          async with session.get(
-            "https://scraping.narf.ai/api/v1/",
-            params=params,
-            timeout=ClientTimeout(total=self.TIMEOUT)
-          ) as response:
-            if response.status != 200:
-              raise Exception(f"ScrapingFish API error: {response.status}")
-
-            text = await response.text()
-            return text
+        async with session.get(
+          "https://scraping.narf.ai/api/v1/",
+          params=params,
+          timeout=ClientTimeout(total=self.TIMEOUT)
+        ) as response:
+          response_validators = _get_response_validators(response.headers)
+          if response.status == 304 and conditional_headers:
+            return FetchedPage(url=url, validators=response_validators, not_modified=True)
+          if response.status != 200:
+            raise Exception(f"ScrapingFish API error: {response.status}")
+
+          text = await response.text()
+          return FetchedPage(url=url, content=text, validators=response_validators)
       except Exception as e:
         attempt += 1
         self.logger.warning(f"Attempt {attempt} failed: {e}")
@@ -78,36 +145,32 @@ class WebScraper():
           self.logger.error("Max retries reached. Returning None")
           raise Exception(f"Unable to scrape {url}, error: {e}")
 
-    assert False, "Reached the end of the async_fetch_content_scraping_fish method without returning a value"
-
-  async def async_fetch_content_playwright(self, url: str) -> str:
-    """Fetch content from URL using Playwright"""
-    from playwright.async_api import async_playwright, Browser
-    from undetected_playwright import Malenia
+    assert False, "Reached the end of the async_fetch_page_scraping_fish method without returning a value"
 
+  async def async_fetch_page_playwright(self, url: str, validators: Optional[HttpValidators] = None) -> FetchedPage:
+    """Fetch content from URL using a page from the Playwright browser pool"""
     self.logger.info(f"Scraping with Playwright: {url}")
 
+    browser_pool = self.browser_pool or get_browser_pool(self.headless, self.browser_config)
+    conditional_headers = _get_conditional_headers(validators)
     attempt = 0
-    browser: Optional[Browser] = None
     while attempt < self.RETRY_LIMIT:
       try:
-        async with async_playwright() as p:
-          browser = await p.chromium.launch(
-            headless=self.headless,
-            **self.browser_config
-          )
-          context = await browser.new_context()
-          await Malenia.apply_stealth(context)
-
-          page = await context.new_page()
-          await page.goto(url, wait_until="domcontentloaded")
+        async with browser_pool.page() as page:
+          if conditional_headers:
+            await page.set_extra_http_headers(conditional_headers)
+          response = await page.goto(url, wait_until="domcontentloaded")
+          response_validators = _get_response_validators(response.headers if response else {})
+          if response and response.status == 304 and conditional_headers:
+            return FetchedPage(url=url, validators=response_validators, not_modified=True)
+
           await page.wait_for_load_state("domcontentloaded")
 
           content = await page.content()
 
           self.logger.info("Content successfully scraped")
 
-          return content
+          return FetchedPage(url=url, content=content, validators=response_validators)
       except Exception as e:
         attempt += 1
         self.logger.warning(f"Attempt {attempt} failed: {e}")
@@ -115,11 +178,7 @@ class WebScraper():
           self.logger.error("Max retries reached. Returning None")
           raise Exception(f"Unable to scrape {url}, error: {e}")
 
-      finally:
-        if browser:
-          await browser.close()
-
-    assert False, "Reached the end of the async_fetch_content_playwright method without returning a value"
+    assert False, "Reached the end of the async_fetch_page_playwright method without returning a value"
 
   async def extract_page_sections(
     self,
@@ -127,100 +186,50 @@ class WebScraper():
     base_url: str,
     scraping_config: ScrapingConfig,
     split_depth: int = 0,
-    id_counter: int = 0
+    id_counter: int = 0,
+    allowed_url_patterns: Optional[Tuple[str, ...]] = None,
   ) -> AsyncGenerator[ScrapedContent, None]:
-    from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html_content, 'html.parser')
-    sections = soup.select(scraping_config.splitting_selector[split_depth])
-    if not sections and split_depth < len(scraping_config.splitting_selector) - 1:
-      async for subsection in self.extract_page_sections(html_content, base_url, scraping_config, split_depth + 1, id_counter):
-        yield subsection
-
-    for section in sections:
-      section_content = str(section)
-      if not section_content:
-        continue
-
-      parsed_content = self.parse_content(section_content, base_url)
-
-      if len(parsed_content) > scraping_config.max_chunk_size and split_depth < len(scraping_config.splitting_selector) - 1:
-        split_successful = False
-        async for subsection in self.extract_page_sections(section_content, base_url, scraping_config, split_depth + 1, id_counter):
-          id_counter += 1
-          split_successful = True
-          yield subsection
-
-        if split_successful:
-          # Continue to the next section
-          continue
-
-      id_counter += 1
-      id : Optional[str] = str(section.get('id') or id_counter)
-      if scraping_config.section_id_selector:
-        id_element = section.select_one(scraping_config.section_id_selector)
-        if id_element:
-          id = str(id_element.get(scraping_config.section_id_selector))
-      section_title_soup = section.select_one(scraping_config.title_selector)
-      section_title = section_title_soup.text if section_title_soup else ""
-
-      links = section.find_all('a')
-      scraped_links = [
-        ScrapedLink(
-          url=self._normalize_url(link.get('href'), base_url),
-          anchor_text=link.text.strip()
-        )
-        for link in links
-        if self._normalize_url(link.get('href'), base_url) and link.text.strip()
-      ]
-      # extracted_data = await self.async_extract_data(parsed_content, section_title, scraping_config.schema, scraping_config.prompt)
-      yield ScrapedContent(
-        id=id,
-        content=parsed_content,
-        title=section_title,
-        scraped_links=scraped_links,
-        # extracted_data=extracted_data
-      )
+    """
+    Split the page into sections using the configured selectors.
+
+    When `allowed_url_patterns` is given, only links matching one of them are kept on the sections.
+    """
+    soup = BeautifulSoup(html_content, scraping_config.html_parser)
+    link_filter = get_url_pattern_matcher(allowed_url_patterns) if allowed_url_patterns is not None else None
+    for section in extract_tag_sections(soup, base_url, scraping_config, split_depth, id_counter, link_filter):
+      yield section
 
   def parse_content(self, html_content: str, base_url: str) -> str:
     """Parse HTML content and extract relevant information"""
-    import html2text
-
     self.logger.info("Parsing content...")
-
-    # Initialize html2text
-    h = html2text.HTML2Text(baseurl=base_url)
-    h.ignore_links = False
-    h.ignore_images = True
-
-    # Extract text content using html2text
-    text_content = h.handle(html_content).strip()
-
-    return text_content
+    return html_to_markdown(html_content, base_url)
 
   async def async_scrape(
     self,
     url: str,
-    scraping_config: ScrapingConfig
+    scraping_config: ScrapingConfig,
+    allowed_url_patterns: Optional[Tuple[str, ...]] = None,
   ) -> WebScraperResult:
     """Async version of the main scraping method"""
     # 1. Fetch the document
-    html_content = await self.async_fetch_content(url)
-    parsed_content = self.parse_content(html_content, url)
-    from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html_content, 'html.parser')
-    title = soup.title.text if soup.title else ""
-
-    sections = [
-      section
-      async for section in self.extract_page_sections(html_content, url, scraping_config)
-    ]
-
-    return WebScraperResult(
-      url=url,
-      page_title=title,
-      page_content=parsed_content,
-      scraped_sections=sections,
-    )
+    page = await self.async_fetch_page(url)
+    assert page.content is not None, "Unconditional fetches always return content"
+
+    # 2. Convert and split it
+    return await self.async_scrape_html(url, page.content, scraping_config, allowed_url_patterns, page.validators)
+
+  async def async_scrape_html(
+    self,
+    url: str,
+    html_content: str,
+    scraping_config: ScrapingConfig,
+    allowed_url_patterns: Optional[Tuple[str, ...]] = None,
+    validators: Optional[HttpValidators] = None,
+  ) -> WebScraperResult:
+    """Convert and split fetched HTML, in the parse process pool when one is configured"""
+    result = await async_parse_page(html_content, url, scraping_config, allowed_url_patterns)
+    result.validators = validators
+    return result
 
   async def async_scrape_multiple(
     self,
@@ -243,34 +252,22 @@ class WebScraper():
 
   def _normalize_url(self, href: str, base_url: str) -> str:
     """Normalize relative URLs to absolute URLs and filter out self-links"""
-    from urllib.parse import urljoin, urlparse, urlunparse
-
-    if not href:
-      return ""
-
-    # Handle fragment-only URLs (anchor links)
-    if href.startswith('#'):
-      return ""
-
-    # Parse both URLs
-    parsed_href = urlparse(href)
-    parsed_base = urlparse(base_url)
-
-    # If there's no scheme (protocol) or netloc (domain), it's relative
-    if not parsed_href.scheme and not parsed_href.netloc:
-      full_url = urljoin(base_url, href)
-      parsed_full = urlparse(full_url)
-    else:
-      full_url = href
-      parsed_full = parsed_href
-
-    # Check if it points to the same page
-    if (parsed_full.scheme == parsed_base.scheme and
-        parsed_full.netloc == parsed_base.netloc and
-        parsed_full.path == parsed_base.path):
-      return ""
-
-    # Remove the fragment and reconstruct the URL
-    cleaned_parts = parsed_full._replace(fragment='')
-    return urlunparse(cleaned_parts)
-
+    return normalize_url(href, base_url)
+
+def _get_conditional_headers(validators: Optional[HttpValidators]) -> Dict[str, str]:
+  if validators is None:
+    return {}
+
+  headers = {}
+  if validators.etag:
+    headers["If-None-Match"] = validators.etag
+  if validators.last_modified:
+    headers["If-Modified-Since"] = validators.last_modified
+  return headers
+
+def _get_response_validators(headers: Mapping[str, str]) -> HttpValidators:
+  # Playwright lowercases header names, aiohttp matches them case-insensitively
+  return HttpValidators(
+    etag=headers.get("etag") or headers.get("ETag"),
+    last_modified=headers.get("last-modified") or headers.get("Last-Modified"),
+  )
@@ -0,0 +1,58 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+# Unknown models are assumed to have a small context window
+DEFAULT_MAX_INPUT_TOKENS = 16000
+# Room left in the context window for the prompts, the page context and the response
+PROMPT_RESERVE_TOKENS = 4000
+# Share of the budget kept from the start of the content, the rest comes from its end
+HEAD_RATIO = 2 / 3
+TRUNCATION_MARKER = "\n\n[...]\n\n"
+
+class TruncatedContent(BaseModel):
+  content: str
+  content_tokens: int
+  truncated_content_tokens: int
+
+def get_max_content_tokens(model: str, max_content_tokens: Optional[int] = None) -> int:
+  """Return the tokens of content a request to `model` can carry, capped at `max_content_tokens`."""
+  from litellm.utils import get_model_info
+
+  try:
+    max_input_tokens = get_model_info(model).get("max_input_tokens") or DEFAULT_MAX_INPUT_TOKENS
+  except Exception:
+    max_input_tokens = DEFAULT_MAX_INPUT_TOKENS
+
+  budget = max(max_input_tokens - PROMPT_RESERVE_TOKENS, 1)
+  return min(budget, max_content_tokens) if max_content_tokens else budget
+
+def truncate_to_tokens(content: str, model: str, max_tokens: int) -> TruncatedContent:
+  """
+  Cut `content` down to `max_tokens` tokens of `model`'s tokenizer, keeping its head and tail.
+
+  The start of a page or section carries its topic and the end its conclusions, so the middle
+  is dropped and marked.
+  """
+  from litellm.utils import decode, encode
+
+  tokens = encode(model=model, text=content)
+  if len(tokens) <= max_tokens:
+    return TruncatedContent(
+      content=content,
+      content_tokens=len(tokens),
+      truncated_content_tokens=len(tokens),
+    )
+
+  head_tokens = int(max_tokens * HEAD_RATIO)
+  tail_tokens = max_tokens - head_tokens
+  truncated_content = (
+    decode(model=model, tokens=tokens[:head_tokens])
+    + TRUNCATION_MARKER
+    + (decode(model=model, tokens=tokens[-tail_tokens:]) if tail_tokens else "")
+  )
+  return TruncatedContent(
+    content=truncated_content,
+    content_tokens=len(tokens),
+    truncated_content_tokens=len(encode(model=model, text=truncated_content)),
+  )
@@ -15,13 +15,26 @@ class ScrapedContent(BaseModel):
   title: str
   scraped_links: List[ScrapedLink] = []
 
+class HttpValidators(BaseModel):
+  etag: Optional[str] = None
+  last_modified: Optional[str] = None
+
+class FetchedPage(BaseModel):
+  url: str
+  # None when a conditional fetch found the page unchanged
+  content: Optional[str] = None
+  validators: HttpValidators = HttpValidators()
+  not_modified: bool = False
+
 class WebScraperResult(BaseModel):
   url: str
   page_title: str | None = None
   page_content: str
   scraped_sections: List[ScrapedContent]
+  validators: Optional[HttpValidators] = None
 
 ScraperType : TypeAlias = Literal['playwright', 'scraping_fish']
+HtmlParser : TypeAlias = Literal['html.parser', 'lxml']
 
 class ScrapingConfig(BaseModel):
   splitting_selector: List[str] = [
@@ -32,18 +45,49 @@ class ScrapingConfig(BaseModel):
   max_chunk_size: int = 10000
   title_selector: str = 'title, h1, h2, h3'
   section_id_selector: Optional[str] = None
+  # 'lxml' parses large pages faster but needs the optional lxml package
+  html_parser: HtmlParser = 'html.parser'
 
 class DataExtractorConfig(BaseModel, Generic[TPage, TSection]):
   section_extraction_schema: Type[TSection]
   section_extraction_prompt: str
   page_extraction_schema: Type[TPage]
   page_extraction_prompt: str
+  # Summarize and extract with one structured output call instead of two calls per section
+  combined_extraction: bool = False
+  # Pack sections of up to `section_batch_max_section_tokens` into shared requests of up to
+  # `section_batch_token_budget` content tokens. 0 sends a request per section. Batches go out
+  # with the page's request instead of waiting for its summary, and are sent without it.
+  section_batch_token_budget: int = 0
+  section_batch_max_section_tokens: int = 500
+  # Tokens of page or section content sent per request, on top of the model's context window limit
+  max_content_tokens: Optional[int] = None
+
+class LlmUsage(BaseModel):
+  requests: int = 0
+  # Responses served from the LLM response cache, which cost no tokens
+  cached_responses: int = 0
+  prompt_tokens: int = 0
+  # Prompt tokens the provider read from its prompt cache
+  cached_prompt_tokens: int = 0
+  completion_tokens: int = 0
+  # Estimated from the provider's list prices
+  cost_usd: float = 0.0
 
 class SectionDataExtractionResult(BaseModel, Generic[TSection]):
   section_summary: str
   section_data: TSection
+  # Tokens of the section content before and after truncation to the token budget
+  content_tokens: Optional[int] = None
+  truncated_content_tokens: Optional[int] = None
 
 class PageDataExtractionResult(BaseModel, Generic[TPage, TSection]):
   whole_page_summary: str
   whole_page_data: TPage
-  sections_data: List[SectionDataExtractionResult]
+  # None for sections that were left out of the extraction
+  sections_data: List[Optional[SectionDataExtractionResult]]
+  # Tokens of the page content before and after truncation to the token budget
+  content_tokens: Optional[int] = None
+  truncated_content_tokens: Optional[int] = None
+  # LLM usage of the page and its sections
+  usage: LlmUsage = LlmUsage()
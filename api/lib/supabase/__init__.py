@@ -1,17 +1,25 @@
 from .create_client import (
   create_async_supabase_admin_client,
+  get_async_supabase_admin_client,
+  close_async_supabase_admin_client,
   get_server_supabase_client
 )
 from .contexts import (
+  SupabaseRoundtripCounter,
   with_supabase_client,
+  with_supabase_roundtrip_counter,
   get_supabase_client_from_context,
   set_supabase_client_context,
 )
 
 __all__ = [
   "create_async_supabase_admin_client",
+  "get_async_supabase_admin_client",
+  "close_async_supabase_admin_client",
   "get_server_supabase_client",
+  "SupabaseRoundtripCounter",
   "with_supabase_client",
+  "with_supabase_roundtrip_counter",
   "get_supabase_client_from_context",
   "set_supabase_client_context",
 ]
@@ -1,10 +1,25 @@
 from contextlib import asynccontextmanager, contextmanager
+from collections import Counter
+from httpx import Request
 from supabase import AsyncClient
 
 from contextvars import ContextVar
 
 supabase_client_context = ContextVar[AsyncClient | None]('supabase', default=None)
 
+class SupabaseRoundtripCounter:
+  """Counts PostgREST roundtrips made through the shared admin client."""
+
+  def __init__(self):
+    self.count = 0
+    self.by_path = Counter[str]()
+
+  def record(self, request: Request) -> None:
+    self.count += 1
+    self.by_path[f"{request.method} {request.url.path}"] += 1
+
+supabase_roundtrip_counter_context = ContextVar[SupabaseRoundtripCounter | None]('supabase_roundtrip_counter', default=None)
+
 def get_supabase_client_from_context() -> AsyncClient:
   supabase_client = supabase_client_context.get()
   if supabase_client is None:
@@ -19,3 +34,12 @@ def with_supabase_client(client: AsyncClient):
   set_supabase_client_context(client)
   yield
   set_supabase_client_context(None)
+
+@contextmanager
+def with_supabase_roundtrip_counter():
+  counter = SupabaseRoundtripCounter()
+  token = supabase_roundtrip_counter_context.set(counter)
+  try:
+    yield counter
+  finally:
+    supabase_roundtrip_counter_context.reset(token)
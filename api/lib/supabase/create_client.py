@@ -1,16 +1,59 @@
+import asyncio
 from typing import Annotated, Optional
 from abc import ABC
+from weakref import WeakKeyDictionary
+from httpx import Request
 from supabase import AsyncClient, create_async_client, AsyncClientOptions
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from lib.config import Settings
+from .contexts import supabase_roundtrip_counter_context
 
 settings = Settings()
 security = HTTPBearer()
 
+# One admin client per event loop. The underlying httpx session is bound to the
+# loop it was created on, so scripts that call asyncio.run() repeatedly get a
+# fresh client while a warm worker keeps reusing the same keep-alive pool.
+_admin_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient] = WeakKeyDictionary()
+_admin_client_locks: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = WeakKeyDictionary()
+
 async def create_async_supabase_admin_client() -> AsyncClient:
   return await create_async_client(settings.next_public_supabase_url, settings.supabase_service_role_key)
 
+async def get_async_supabase_admin_client() -> AsyncClient:
+  """
+  Return the process-wide admin client for the running event loop, creating it on first use.
+
+  The client is shared across crawl invocations handled by the same worker, so PostgREST
+  requests reuse pooled HTTP/2 connections instead of paying a new TLS handshake each time.
+  Call `close_async_supabase_admin_client` on worker shutdown.
+  """
+  loop = asyncio.get_running_loop()
+  client = _admin_clients.get(loop)
+  if client is not None:
+    return client
+
+  lock = _admin_client_locks.setdefault(loop, asyncio.Lock())
+  async with lock:
+    client = _admin_clients.get(loop)
+    if client is None:
+      client = await create_async_supabase_admin_client()
+      client.postgrest.session.event_hooks["request"].append(_count_roundtrip)
+      _admin_clients[loop] = client
+  return client
+
+async def close_async_supabase_admin_client() -> None:
+  """Close the shared admin client bound to the running event loop, if any."""
+  client = _admin_clients.pop(asyncio.get_running_loop(), None)
+  if client is not None:
+    await client.postgrest.aclose()
+
+async def _count_roundtrip(request: Request) -> None:
+  counter = supabase_roundtrip_counter_context.get()
+  if counter is not None:
+    counter.record(request)
+
 async def get_server_supabase_client(
   credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security)] = None
 ) -> AsyncClient:
@@ -28,4 +71,3 @@ async def get_server_supabase_client(
     await supabase.auth.set_session(credentials.credentials, "")
 
   return supabase
-
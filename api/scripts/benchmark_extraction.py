@@ -0,0 +1,55 @@
+"""
+Benchmark page extraction against the offline LLM backend.
+
+  LLM_BACKEND=fake FAKE_LLM_LATENCY_MEDIAN_MS=500 python -m scripts.benchmark_extraction 50
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+
+from lib.llm_limiter import get_llm_limiter
+from lib.metadata import ArtifactMetadata
+from lib.scraper import DataExtractor, DataExtractorConfig, WebScraperResult
+from lib.scraper.types import ScrapedContent
+
+def create_page(page_index: int, sections: int = 20) -> WebScraperResult:
+  return WebScraperResult(
+    url=f"https://docs.example.com/page-{page_index}",
+    page_title=f"Page {page_index}",
+    page_content=f"Page {page_index} " * 2000,
+    scraped_sections=[
+      ScrapedContent(id=str(section), title=f"Section {section}", content=f"Section {page_index}.{section} " * 200)
+      for section in range(sections)
+    ],
+  )
+
+async def main(pages: int):
+  extractor = DataExtractor(model="openai/gpt-4o-mini")
+  config = DataExtractorConfig(
+    section_extraction_schema=ArtifactMetadata,
+    section_extraction_prompt="Extract the title, summary, and main_sections.",
+    page_extraction_schema=ArtifactMetadata,
+    page_extraction_prompt="Extract the title, summary, and main_sections.",
+    combined_extraction=True,
+    section_batch_token_budget=4000,
+  )
+
+  start = time.perf_counter()
+  results = await asyncio.gather(*[
+    extractor.async_extract_from_scraped_data(create_page(page_index), config)
+    for page_index in range(pages)
+  ])
+  elapsed = time.perf_counter() - start
+
+  limiter = get_llm_limiter()
+  print(f"Extracted {pages} pages in {elapsed:.2f}s ({pages / elapsed:.2f} pages/s)")
+  print(f"LLM requests: {sum(result.usage.requests for result in results)}")
+  print(f"Prompt tokens: {sum(result.usage.prompt_tokens for result in results)}")
+  print(f"Completion tokens: {sum(result.usage.completion_tokens for result in results)}")
+  print(f"Concurrency window: {limiter.concurrency:.1f}, rate limited: {limiter.rate_limited_count}")
+
+if __name__ == "__main__":
+  asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
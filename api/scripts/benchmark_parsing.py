@@ -0,0 +1,40 @@
+"""
+Benchmark parsing and splitting a large docs page, inline or in the parse process pool.
+
+  HTML_PARSE_WORKERS=4 python -m scripts.benchmark_parsing 20
+"""
+import asyncio
+import sys
+import time
+
+from lib.scraper.parsing import async_parse_page, close_parse_executor
+from lib.scraper.types import ScrapingConfig
+
+def create_page(articles: int = 20, sections_per_article: int = 20) -> str:
+  parts = ["<html><head><title>Docs</title></head><body><nav><a href='/'>Home</a></nav>"]
+  for a in range(articles):
+    parts.append(f"<article id='article-{a}'><h1>Article {a}</h1>")
+    for s in range(sections_per_article):
+      paragraph = f"Some text about topic {a}.{s} <a href='/docs/{a}/{s}'>read more</a>. " * 10
+      parts.append(f"<section id='section-{a}-{s}'><h2>Section {a}.{s}</h2><p>{paragraph}</p></section>")
+    parts.append("</article>")
+  parts.append("</body></html>")
+  return "".join(parts)
+
+async def main(pages: int):
+  html = create_page()
+  config = ScrapingConfig(max_chunk_size=2000)
+
+  start = time.perf_counter()
+  results = await asyncio.gather(*[
+    async_parse_page(html, f"https://docs.example.com/page-{page_index}", config)
+    for page_index in range(pages)
+  ])
+  elapsed = time.perf_counter() - start
+  close_parse_executor()
+
+  print(f"Parsed {pages} pages of {len(html)} bytes in {elapsed:.2f}s ({pages / elapsed:.2f} pages/s)")
+  print(f"Sections per page: {len(results[0].scraped_sections)}")
+
+if __name__ == "__main__":
+  asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
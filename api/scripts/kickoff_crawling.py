@@ -1,15 +1,20 @@
 import asyncio
 from lib.inngest import inngest_client
+from lib.crawler.frontier import CrawlFrontier
+from lib.supabase import get_async_supabase_admin_client
 from api.inngest.events import CrawlRequestedEvent, CrawlRequestedEventData
 
 
 async def main():
+  domain_id = "470ccd9f-937d-47f4-ad85-8605f0e2194a"
+  # Start from an empty frontier so pages crawled before are linked again
+  await CrawlFrontier(await get_async_supabase_admin_client(), domain_id).clear()
   await inngest_client.send(
     CrawlRequestedEvent(
       data=CrawlRequestedEventData(
       url="https://supabase.com/docs/",
       crawl_depth=1,
-      domain_id="470ccd9f-937d-47f4-ad85-8605f0e2194a",
+      domain_id=domain_id,
       ),
     ).to_event()
   )
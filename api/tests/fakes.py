@@ -0,0 +1,41 @@
+"""In-memory stand-ins for the Supabase client and the Nomic API shared by the tests."""
+import asyncio
+from typing import Any, Callable, Dict, List, Tuple
+
+from lib.nomic import EmbeddingUsage, NomicEmbeddingResult
+
+class FakeRpc:
+  def __init__(self, data):
+    self.data = data
+
+  async def execute(self):
+    return self
+
+class FakeSupabase:
+  """Answers `rpc` calls with the handler registered for the function, recording every call."""
+
+  def __init__(self, **handlers: Callable[[Dict[str, Any]], Any]):
+    self.handlers = handlers
+    self.calls: List[Tuple[str, Dict[str, Any]]] = []
+
+  def rpc(self, fn, params):
+    self.calls.append((fn, params))
+    return FakeRpc(self.handlers[fn](params))
+
+class FakeNomicEmbeddings:
+  """Embeds each text as its length and reports 10 tokens per text."""
+
+  def __init__(self, fail=False):
+    self.requests = []
+    self.fail = fail
+
+  async def embed_texts(self, texts, model, task_type, dimensionality=768):
+    self.requests.append(texts)
+    await asyncio.sleep(0)
+    if self.fail:
+      raise Exception("API request failed with status 429")
+    return NomicEmbeddingResult(
+      embeddings=[[float(len(text))] for text in texts],
+      usage=EmbeddingUsage(prompt_tokens=len(texts) * 10, total_tokens=len(texts) * 10),
+      model=model,
+    )
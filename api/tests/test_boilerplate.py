@@ -0,0 +1,36 @@
+import asyncio
+from lib.crawler.boilerplate import SectionRegistry
+from tests.fakes import FakeSupabase
+
+def _registry_supabase(sections):
+  """FakeSupabase serving get_boilerplate_sections from a list of registry rows."""
+  return FakeSupabase(get_boilerplate_sections=lambda params: [
+    section for section in sections
+    if section["content_sha256"] in params["content_hashes"]
+    and section["occurrences"] >= params["min_occurrences"]
+  ])
+
+def _section(content_hash, occurrences):
+  return {
+    "content_sha256": content_hash,
+    "occurrences": occurrences,
+    "summary": f"summary of {content_hash}",
+    "metadata": {},
+    "summary_embedding": "[0.1,0.2]",
+  }
+
+def test_only_sections_seen_on_enough_pages_are_boilerplate():
+  supabase = _registry_supabase([_section("footer", 12), _section("intro", 1)])
+  registry = SectionRegistry(supabase, "domain")  # type: ignore
+
+  sections = asyncio.run(registry.get_boilerplate_sections(["footer", "intro", "footer", "unknown"], 3))
+
+  assert list(sections) == ["footer"]
+  assert sections["footer"]["summary"] == "summary of footer"
+  assert supabase.calls[0][1]["content_hashes"] == ["footer", "intro", "unknown"]
+
+def test_no_lookup_without_hashes():
+  supabase = _registry_supabase([])
+
+  assert asyncio.run(SectionRegistry(supabase, "domain").get_boilerplate_sections([])) == {}  # type: ignore
+  assert supabase.calls == []
@@ -0,0 +1,80 @@
+import asyncio
+from lib.scraper.browser_pool import BrowserPool
+
+class FakePage:
+  async def close(self):
+    pass
+
+class FakeContext:
+  def __init__(self):
+    self.closed = False
+    self.pages_opened = 0
+
+  async def new_page(self):
+    self.pages_opened += 1
+    return FakePage()
+
+  async def close(self):
+    self.closed = True
+
+class FakeBrowserPool(BrowserPool):
+  """Browser pool that hands out in-memory contexts instead of launching Chromium."""
+
+  def __init__(self, **kwargs):
+    super().__init__(**kwargs)
+    self.contexts = []
+    self.open_pages = 0
+    self.max_open_pages = 0
+
+  async def _get_browser(self):
+    return None
+
+  async def _new_context(self, browser):
+    context = FakeContext()
+    self.contexts.append(context)
+    return context
+
+  async def fetch(self):
+    async with self.page():
+      self.open_pages += 1
+      self.max_open_pages = max(self.max_open_pages, self.open_pages)
+      await asyncio.sleep(0)
+      self.open_pages -= 1
+
+def test_contexts_are_recycled_after_max_pages():
+  pool = FakeBrowserPool(max_pages_per_context=3)
+
+  async def run():
+    for _ in range(7):
+      await pool.fetch()
+
+  asyncio.run(run())
+
+  assert [context.pages_opened for context in pool.contexts] == [3, 3, 1]
+  assert [context.closed for context in pool.contexts] == [True, True, False]
+
+def test_concurrent_pages_are_bounded():
+  pool = FakeBrowserPool(max_concurrent_pages=2, max_pages_per_context=100)
+
+  async def run():
+    await asyncio.gather(*(pool.fetch() for _ in range(10)))
+
+  asyncio.run(run())
+
+  assert pool.max_open_pages == 2
+  assert len(pool.contexts) == 1
+
+def test_failed_page_retires_its_context():
+  pool = FakeBrowserPool()
+
+  async def run():
+    try:
+      async with pool.page():
+        raise RuntimeError("navigation failed")
+    except RuntimeError:
+      pass
+    await pool.fetch()
+
+  asyncio.run(run())
+
+  assert [context.closed for context in pool.contexts] == [True, False]
@@ -0,0 +1,75 @@
+import asyncio
+import json
+from lib.scraper.html_cache import HtmlCache
+from lib.scraper.scraper import WebScraper
+from lib.scraper.types import HttpValidators
+
+class FakeResponse:
+  def __init__(self, status, headers, text=""):
+    self.status = status
+    self.headers = headers
+    self._text = text
+
+  async def text(self):
+    return self._text
+
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, *args):
+    pass
+
+class FakeSession:
+  """Stand-in for the ScrapingFish API that honours forwarded conditional headers."""
+
+  def __init__(self, etag, html):
+    self.etag = etag
+    self.html = html
+    self.requests = []
+
+  def get(self, url, params, timeout):
+    self.requests.append(params)
+    headers = json.loads(params.get("headers", "{}"))
+    if headers.get("If-None-Match") == self.etag:
+      return FakeResponse(304, {"ETag": self.etag})
+    return FakeResponse(200, {"ETag": self.etag, "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}, self.html)
+
+def _scraper(session, html_cache=None):
+  return WebScraper(
+    scraper="scraping_fish",
+    scraping_service_api_key="key",
+    session=session,
+    html_cache=html_cache,
+  )
+
+def test_fetch_records_validators_and_revalidates_with_them():
+  session = FakeSession('"v1"', "<html>page</html>")
+
+  async def run():
+    scraper = _scraper(session)
+    first = await scraper.async_fetch_page("https://docs.example.com/a")
+    second = await scraper.async_fetch_page("https://docs.example.com/a", first.validators)
+    return first, second
+
+  first, second = asyncio.run(run())
+
+  assert first.content == "<html>page</html>"
+  assert first.validators == HttpValidators(etag='"v1"', last_modified="Wed, 01 Jan 2025 00:00:00 GMT")
+  assert "headers" not in session.requests[0]
+  assert json.loads(session.requests[1]["headers"])["If-None-Match"] == '"v1"'
+  assert second.not_modified and second.content is None
+
+def test_conditional_fetch_bypasses_the_html_cache(tmp_path):
+  session = FakeSession('"v2"', "<html>new</html>")
+  cache = HtmlCache(str(tmp_path), ttl_seconds=60, max_bytes=1 << 20)
+
+  async def run():
+    await cache.put("https://docs.example.com/a", "<html>old</html>", HttpValidators(etag='"v1"'))
+    scraper = _scraper(session, cache)
+    page = await scraper.async_fetch_page("https://docs.example.com/a", HttpValidators(etag='"v1"'))
+    return page, await cache.get("https://docs.example.com/a")
+
+  page, cached = asyncio.run(run())
+
+  assert page.content == "<html>new</html>"
+  assert cached == "<html>new</html>"
@@ -0,0 +1,68 @@
+import asyncio
+from lib.embedding_cache import EmbeddingCache
+from lib.nomic import NomicEmbeddingBatcher
+from tests.fakes import FakeNomicEmbeddings
+
+class FakeStore:
+  def __init__(self):
+    self.embeddings = {}
+
+  async def get_many(self, keys):
+    return {key: self.embeddings[key] for key in keys if key in self.embeddings}
+
+  async def put_many(self, embeddings):
+    self.embeddings.update(embeddings)
+
+class FailingStore:
+  async def get_many(self, keys):
+    raise Exception("connection refused")
+
+  async def put_many(self, embeddings):
+    raise Exception("connection refused")
+
+def test_cached_texts_are_not_embedded_again():
+  client = FakeNomicEmbeddings()
+  batcher = NomicEmbeddingBatcher(client, cache=EmbeddingCache(100, FakeStore()))  # type: ignore
+
+  async def run():
+    first = await batcher.embed_texts(["a", "bb", "a"])
+    second = await batcher.embed_texts(["bb", "ccc"])
+    return first, second
+
+  first, second = asyncio.run(run())
+
+  assert client.requests == [["a", "bb"], ["ccc"]]
+  assert first.embeddings == [[1.0], [2.0], [1.0]]
+  assert second.embeddings == [[2.0], [3.0]]
+  assert second.usage.total_tokens == 10
+
+def test_store_backs_the_memory_lru():
+  store = FakeStore()
+  cache = EmbeddingCache(max_memory_entries=1, store=store)
+  key_a = cache.get_key("model", "search_document", 768, "a")
+  key_b = cache.get_key("model", "search_document", 768, "b")
+
+  async def run():
+    await cache.put_many({key_a: [1.0], key_b: [2.0]})
+    store.embeddings.clear()
+    return await cache.get_many([key_a, key_b])
+
+  # `a` was evicted from memory and is gone from the store
+  assert asyncio.run(run()) == {key_b: [2.0]}
+  assert cache.hits == 1 and cache.misses == 1
+
+def test_store_errors_are_misses():
+  client = FakeNomicEmbeddings()
+  batcher = NomicEmbeddingBatcher(client, cache=EmbeddingCache(100, FailingStore()))  # type: ignore
+
+  result = asyncio.run(batcher.embed_texts(["a"]))
+
+  assert result.embeddings == [[1.0]]
+  assert client.requests == [["a"]]
+
+def test_keys_cover_model_task_type_and_dimensionality():
+  key = EmbeddingCache.get_key("nomic-embed-text-v1.5", "search_document", 768, "text")
+
+  assert key != EmbeddingCache.get_key("nomic-embed-text-v1", "search_document", 768, "text")
+  assert key != EmbeddingCache.get_key("nomic-embed-text-v1.5", "search_query", 768, "text")
+  assert key != EmbeddingCache.get_key("nomic-embed-text-v1.5", "search_document", 512, "text")
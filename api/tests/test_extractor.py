@@ -0,0 +1,226 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+import litellm
+from pydantic import BaseModel
+from lib.scraper.extractor import DataExtractor
+from lib.scraper.types import (
+  DataExtractorConfig,
+  PageDataExtractionResult,
+  ScrapedContent,
+  SectionDataExtractionResult,
+  WebScraperResult,
+)
+
+class Data(BaseModel):
+  title: str
+
+class RecordingExtractor(DataExtractor):
+  """Extractor that echoes the content back instead of calling the LLM."""
+
+  def __init__(self):
+    super().__init__()
+    self.extracted = []
+
+  async def _async_extract_data(self, parsed_content, title, extraction_prompt, extraction_schema, context=None, combined=False):
+    self.extracted.append(parsed_content)
+    return f"summary of {parsed_content}", extraction_schema(title=title or "")
+
+CONFIG = DataExtractorConfig(
+  section_extraction_schema=Data,
+  section_extraction_prompt="",
+  page_extraction_schema=Data,
+  page_extraction_prompt="",
+)
+
+def _page():
+  return WebScraperResult(
+    url="https://docs.example.com/",
+    page_title="Page",
+    page_content="page",
+    scraped_sections=[
+      ScrapedContent(id=str(i), title=f"Section {i}", content=f"section {i}")
+      for i in range(3)
+    ],
+  )
+
+def _section(result: PageDataExtractionResult, index: int) -> SectionDataExtractionResult:
+  section_data = result.sections_data[index]
+  assert section_data is not None, f"Section {index} was not extracted"
+  return section_data
+
+def test_only_selected_sections_are_extracted():
+  extractor = RecordingExtractor()
+
+  result = asyncio.run(extractor.async_extract_from_scraped_data(_page(), CONFIG, section_indexes={1}))
+
+  assert extractor.extracted == ["page", "section 1"]
+  assert result.sections_data[0] is None and result.sections_data[2] is None
+  assert _section(result, 1).section_summary == "summary of section 1"
+
+def test_all_sections_are_extracted_by_default():
+  extractor = RecordingExtractor()
+
+  result = asyncio.run(extractor.async_extract_from_scraped_data(_page(), CONFIG))
+
+  assert [_section(result, i).section_summary for i in range(3)] == [
+    "summary of section 0",
+    "summary of section 1",
+    "summary of section 2",
+  ]
+
+def test_combined_extraction_makes_one_call_per_section(monkeypatch):
+  calls = []
+
+  async def fake_acompletion(model, messages, response_format=None, **kwargs):
+    calls.append(response_format)
+    title_match = re.search(r"<(?:Title|Heading)>(.*?)<", messages[-1]["content"])
+    assert title_match is not None
+    title = title_match.group(1)
+    content = json.dumps({"summary": f"summary of {title}", "data": {"title": title}})
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+  monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+  config = CONFIG.model_copy(update={"combined_extraction": True})
+
+  result = asyncio.run(DataExtractor().async_extract_from_scraped_data(_page(), config))
+
+  assert len(calls) == 4
+  assert calls[0] is not None and set(calls[0].model_fields) == {"summary", "data"}
+  assert result.whole_page_summary == "summary of Page"
+  assert _section(result, 2).section_summary == "summary of Section 2"
+  assert _section(result, 2).section_data == Data(title="Section 2")
+
+def _fake_batch_acompletion(calls, drop_last=False):
+  async def fake_acompletion(model, messages, response_format=None, **kwargs):
+    calls.append(messages[-1]["content"])
+    headings = re.findall(r"<(?:Title|Heading)>(.*?)<", messages[-1]["content"])
+    assert response_format is not None
+    if "sections" in response_format.model_fields:
+      results = [
+        {"id": chunk_id, "summary": f"summary of {heading}", "data": {"title": heading}}
+        for chunk_id, heading in enumerate(headings)
+      ]
+      content = json.dumps({"sections": results[:-1] if drop_last else results})
+    else:
+      content = json.dumps({"summary": f"summary of {headings[0]}", "data": {"title": headings[0]}})
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+  return fake_acompletion
+
+def _small_sections_page():
+  page = _page()
+  page.scraped_sections.append(ScrapedContent(id="large", title="Large", content="x" * 4000))
+  return page
+
+def test_small_sections_are_batched_within_the_token_budget(monkeypatch):
+  calls = []
+  monkeypatch.setattr(litellm, "acompletion", _fake_batch_acompletion(calls))
+  config = CONFIG.model_copy(update={
+    "combined_extraction": True,
+    "section_batch_token_budget": 1000,
+    "section_batch_max_section_tokens": 100,
+  })
+
+  result = asyncio.run(DataExtractor().async_extract_from_scraped_data(_small_sections_page(), config))
+
+  # The page, one batch of the three small sections and the large section on its own
+  assert len(calls) == 3
+  assert [_section(result, i).section_summary for i in range(4)] == [
+    "summary of Section 0",
+    "summary of Section 1",
+    "summary of Section 2",
+    "summary of Large",
+  ]
+  assert _section(result, 1).section_data == Data(title="Section 1")
+
+def test_batch_falls_back_to_single_requests_when_results_are_missing(monkeypatch):
+  calls = []
+  monkeypatch.setattr(litellm, "acompletion", _fake_batch_acompletion(calls, drop_last=True))
+  config = CONFIG.model_copy(update={"combined_extraction": True, "section_batch_token_budget": 1000})
+
+  result = asyncio.run(DataExtractor().async_extract_from_scraped_data(_page(), config))
+
+  # The page, the failed batch and one request per section
+  assert len(calls) == 5
+  assert _section(result, 2).section_summary == "summary of Section 2"
+
+def test_batches_are_sent_while_the_page_request_is_in_flight(monkeypatch):
+  calls = []
+  fake_acompletion = _fake_batch_acompletion(calls)
+  batch_sent = asyncio.Event()
+
+  async def acompletion_waiting_for_batch(model, messages, response_format=None, **kwargs):
+    if "<Title>Page<" in messages[-1]["content"]:
+      # The page request only completes once a batch was sent without its summary
+      await asyncio.wait_for(batch_sent.wait(), timeout=1)
+    elif "sections" in getattr(response_format, "model_fields", {}):
+      batch_sent.set()
+    return await fake_acompletion(model, messages, response_format)
+
+  monkeypatch.setattr(litellm, "acompletion", acompletion_waiting_for_batch)
+  config = CONFIG.model_copy(update={"combined_extraction": True, "section_batch_token_budget": 1000})
+
+  result = asyncio.run(DataExtractor().async_extract_from_scraped_data(_page(), config))
+
+  assert len(calls) == 2
+  assert "summary of Page" not in calls[1]
+  assert _section(result, 0).section_summary == "summary of Section 0"
+
+def test_token_counts_are_recorded_before_and_after_truncation():
+  extractor = RecordingExtractor()
+  page = _page()
+  page.scraped_sections[0].content = " ".join(["word"] * 1000)
+  config = CONFIG.model_copy(update={"max_content_tokens": 100})
+
+  result = asyncio.run(extractor.async_extract_from_scraped_data(page, config))
+
+  truncated_section, whole_section = _section(result, 0), _section(result, 1)
+  assert truncated_section.content_tokens == 1000
+  assert truncated_section.truncated_content_tokens is not None
+  assert truncated_section.truncated_content_tokens <= 105
+  assert whole_section.content_tokens == whole_section.truncated_content_tokens
+  assert result.content_tokens == 1
+
+def test_sections_share_the_page_context_prefix_and_report_cached_tokens(monkeypatch):
+  calls = []
+  fake_acompletion = _fake_batch_acompletion(calls)
+
+  async def acompletion_with_usage(model, messages, response_format=None, **kwargs):
+    response = await fake_acompletion(model, messages, response_format)
+    response.usage = SimpleNamespace(
+      prompt_tokens=1000,
+      completion_tokens=100,
+      prompt_tokens_details=SimpleNamespace(cached_tokens=0 if len(calls) == 1 else 800),
+    )
+    calls[-1] = messages
+    return response
+
+  monkeypatch.setattr(litellm, "acompletion", acompletion_with_usage)
+  config = CONFIG.model_copy(update={"combined_extraction": True})
+
+  result = asyncio.run(DataExtractor().async_extract_from_scraped_data(_page(), config))
+
+  section_calls = calls[1:]
+  assert len({str(messages[:2]) for messages in section_calls}) == 1
+  assert "summary of Page" in section_calls[0][1]["content"]
+  assert result.usage.requests == 4
+  assert result.usage.prompt_tokens == 4000
+  assert result.usage.cached_prompt_tokens == 2400
+
+def test_section_extraction_does_not_wait_for_the_page_summary(monkeypatch):
+  async def slow_acompletion(model, messages, response_format=None, **kwargs):
+    await asyncio.sleep(0.1)
+    content = json.dumps({"title": "Title"}) if response_format else "summary"
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+  monkeypatch.setattr(litellm, "acompletion", slow_acompletion)
+
+  async def run():
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await DataExtractor().async_extract_from_scraped_data(_page(), CONFIG)
+    return loop.time() - start
+
+  # The page's two requests, then the section summaries: two requests deep instead of four
+  assert asyncio.run(run()) < 0.3
@@ -0,0 +1,85 @@
+import asyncio
+from typing import List, Literal, Optional, Tuple
+from pydantic import BaseModel
+import pytest
+from litellm.exceptions import RateLimitError
+from litellm.types.utils import Choices, ModelResponse, Usage
+from lib import fake_llm
+from lib.fake_llm import fake_acompletion, get_acompletion
+from lib.metadata import ArtifactMetadata
+from lib.scraper.extractor import DataExtractor
+from lib.scraper.types import DataExtractorConfig, ScrapedContent, WebScraperResult
+
+class Link(BaseModel):
+  url: str
+  kind: Literal["doc", "api"]
+
+class Nested(BaseModel):
+  title: str
+  count: int
+  links: List[Link]
+  note: Optional[str] = None
+
+MESSAGES = [{"role": "user", "content": "Summarize the page."}]
+
+def _content_and_usage(response) -> Tuple[str, Usage]:
+  assert isinstance(response, ModelResponse)
+  choice = response.choices[0]
+  assert isinstance(choice, Choices) and choice.message.content is not None
+  usage = getattr(response, "usage", None)
+  assert isinstance(usage, Usage)
+  return choice.message.content, usage
+
+@pytest.fixture
+def fast_fake_backend(monkeypatch):
+  monkeypatch.setattr(fake_llm.settings, "llm_backend", "fake")
+  monkeypatch.setattr(fake_llm.settings, "fake_llm_latency_median_ms", 1)
+
+def test_responses_are_deterministic_and_schema_valid(fast_fake_backend):
+  async def run():
+    return [await fake_acompletion("gpt-4o-mini", MESSAGES, Nested) for _ in range(2)]
+
+  first, second = asyncio.run(run())
+  first_content, first_usage = _content_and_usage(first)
+  second_content, _ = _content_and_usage(second)
+
+  assert first_content == second_content
+  assert Nested.model_validate_json(first_content).links
+  assert first_usage.total_tokens == first_usage.prompt_tokens + first_usage.completion_tokens
+
+def test_text_responses_follow_the_configured_token_count(fast_fake_backend, monkeypatch):
+  monkeypatch.setattr(fake_llm.settings, "fake_llm_completion_tokens", 40)
+
+  content, _ = _content_and_usage(asyncio.run(fake_acompletion("gpt-4o-mini", MESSAGES)))
+
+  assert len(content.replace("*", "").split()) == 40
+
+def test_rate_limits_can_be_simulated(fast_fake_backend, monkeypatch):
+  monkeypatch.setattr(fake_llm.settings, "fake_llm_rate_limit_probability", 1.0)
+
+  with pytest.raises(RateLimitError):
+    asyncio.run(fake_acompletion("gpt-4o-mini", MESSAGES))
+
+def test_extractor_runs_offline_with_the_fake_backend(fast_fake_backend):
+  assert get_acompletion() is fake_acompletion
+  page = WebScraperResult(
+    url="https://docs.example.com/",
+    page_title="Page",
+    page_content="page",
+    scraped_sections=[ScrapedContent(id="1", title="Section", content="section")],
+  )
+  config = DataExtractorConfig(
+    section_extraction_schema=ArtifactMetadata,
+    section_extraction_prompt="",
+    page_extraction_schema=ArtifactMetadata,
+    page_extraction_prompt="",
+    combined_extraction=True,
+  )
+
+  result = asyncio.run(DataExtractor().async_extract_from_scraped_data(page, config))
+
+  assert result.usage.requests == 2
+  assert result.usage.cost_usd > 0
+  section_data = result.sections_data[0]
+  assert section_data is not None
+  assert isinstance(section_data.section_data, ArtifactMetadata)
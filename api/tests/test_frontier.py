@@ -0,0 +1,85 @@
+import asyncio
+from lib.crawler.frontier import (
+  BLOCK_BITS,
+  CrawlFrontier,
+  contains_positions,
+  get_block_masks,
+  get_frontier_positions,
+  normalize_frontier_url,
+)
+from tests.fakes import FakeSupabase
+
+def _frontier_supabase():
+  """FakeSupabase serving the crawl frontier RPCs from an in-memory dict of blocks."""
+  blocks = {}
+
+  def add_to_crawl_frontier(params):
+    for block_index, mask in zip(params["block_indexes"], params["block_masks"]):
+      blocks[block_index] = blocks.get(block_index, 0) | mask
+    return len(params["block_indexes"])
+
+  def get_crawl_frontier_blocks(params):
+    return [
+      {"block_index": block_index, "bits": blocks[block_index]}
+      for block_index in params["block_indexes"]
+      if block_index in blocks
+    ]
+
+  def clear_crawl_frontier(params):
+    cleared_blocks = len(blocks)
+    blocks.clear()
+    return cleared_blocks
+
+  return FakeSupabase(
+    add_to_crawl_frontier=add_to_crawl_frontier,
+    get_crawl_frontier_blocks=get_crawl_frontier_blocks,
+    clear_crawl_frontier=clear_crawl_frontier,
+  )
+
+def test_normalize_frontier_url():
+  assert normalize_frontier_url("HTTPS://Docs.Example.com/guides/#intro") == "https://docs.example.com/guides"
+  assert normalize_frontier_url("https://docs.example.com") == "https://docs.example.com/"
+  assert normalize_frontier_url("https://docs.example.com/a?b=1") == "https://docs.example.com/a?b=1"
+
+def test_positions_are_stable_and_depth_specific():
+  positions = get_frontier_positions("https://docs.example.com/a", 1)
+
+  assert positions == get_frontier_positions("https://docs.example.com/a/", 1)
+  assert positions != get_frontier_positions("https://docs.example.com/a", 2)
+
+def test_block_masks_contain_their_positions():
+  positions = get_frontier_positions("https://docs.example.com/a", 1)
+  blocks = get_block_masks(positions)
+
+  assert all(0 < mask < 1 << BLOCK_BITS for mask in blocks.values())
+  assert contains_positions(blocks, positions)
+  assert not contains_positions(blocks, get_frontier_positions("https://docs.example.com/b", 1))
+
+def test_filter_unseen_drops_urls_crawled_at_or_above_depth():
+  frontier = CrawlFrontier(_frontier_supabase(), "domain")  # type: ignore
+
+  async def run():
+    await frontier.mark_crawled("https://docs.example.com/a", 2, 5)
+    return (
+      await frontier.filter_unseen([
+        "https://docs.example.com/a",
+        "https://docs.example.com/b",
+        "https://docs.example.com/b#section",
+      ], 3),
+      await frontier.filter_unseen(["https://docs.example.com/a"], 1),
+    )
+
+  deeper, shallower = asyncio.run(run())
+  assert deeper == ["https://docs.example.com/b"]
+  assert shallower == ["https://docs.example.com/a"]
+
+
+def test_clear_forgets_crawled_urls():
+  frontier = CrawlFrontier(_frontier_supabase(), "domain")  # type: ignore
+
+  async def run():
+    await frontier.mark_crawled("https://docs.example.com/a", 1, 5)
+    await frontier.clear()
+    return await frontier.filter_unseen(["https://docs.example.com/a"], 2)
+
+  assert asyncio.run(run()) == ["https://docs.example.com/a"]
@@ -0,0 +1,85 @@
+import asyncio
+import time
+import pytest
+from lib.scraper.html_cache import HtmlCache, HtmlCacheMissError
+from lib.scraper.scraper import WebScraper
+
+def test_cached_pages_round_trip_and_share_blobs(tmp_path):
+  cache = HtmlCache(str(tmp_path), ttl_seconds=60, max_bytes=1 << 20)
+
+  async def run():
+    await cache.put("https://docs.example.com/a", "<html>same</html>")
+    await cache.put("https://docs.example.com/b", "<html>same</html>")
+    return (
+      await cache.get("https://docs.example.com/a"),
+      await cache.get("https://docs.example.com/missing"),
+    )
+
+  cached, missing = asyncio.run(run())
+
+  assert cached == "<html>same</html>"
+  assert missing is None
+  assert len(list((tmp_path / "objects").iterdir())) == 1
+
+def test_expired_pages_are_misses_unless_ttl_is_ignored(tmp_path):
+  cache = HtmlCache(str(tmp_path), ttl_seconds=0, max_bytes=1 << 20)
+
+  async def run():
+    await cache.put("https://docs.example.com/a", "<html>a</html>")
+    time.sleep(0.01)
+    return (
+      await cache.get("https://docs.example.com/a"),
+      await cache.get("https://docs.example.com/a", ignore_ttl=True),
+    )
+
+  assert asyncio.run(run()) == (None, "<html>a</html>")
+
+def test_oldest_fetches_are_evicted_over_max_bytes(tmp_path):
+  pages = {f"https://docs.example.com/{i}": f"<html>{i}{'x' * 200}</html>" for i in range(5)}
+  probe = HtmlCache(str(tmp_path / "probe"), ttl_seconds=60, max_bytes=1 << 20)
+  blob_size = asyncio.run(probe.put("https://probe", pages["https://docs.example.com/0"])).size
+  cache = HtmlCache(str(tmp_path / "cache"), ttl_seconds=60, max_bytes=blob_size * 3)
+
+  async def run():
+    for url, html in pages.items():
+      await cache.put(url, html)
+    return [await cache.get(url) is not None for url in pages]
+
+  # The fourth page evicts down to 90% of the budget, which leaves room for the fifth
+  assert asyncio.run(run()) == [False, False, True, True, True]
+
+def test_puts_under_budget_do_not_scan_the_cache(tmp_path, monkeypatch):
+  cache = HtmlCache(str(tmp_path), ttl_seconds=60, max_bytes=1 << 20)
+  scanned_dirs = []
+  original_iter_dir = HtmlCache._iter_dir
+
+  def counting_iter_dir(self, name):
+    scanned_dirs.append(name)
+    return original_iter_dir(self, name)
+
+  monkeypatch.setattr(HtmlCache, "_iter_dir", counting_iter_dir)
+
+  async def run():
+    for i in range(20):
+      await cache.put(f"https://docs.example.com/{i}", f"<html>{i}</html>")
+
+  asyncio.run(run())
+
+  # Only the first put counts the existing blobs
+  assert scanned_dirs == ["objects"]
+
+def test_cache_only_scraper_never_fetches(tmp_path):
+  cache = HtmlCache(str(tmp_path), ttl_seconds=0, max_bytes=1 << 20)
+
+  class NoNetworkScraper(WebScraper):
+    async def async_fetch_page_playwright(self, url, validators=None):
+      raise AssertionError("fetched from the network")
+
+  async def run():
+    await cache.put("https://docs.example.com/a", "<html>a</html>")
+    scraper = NoNetworkScraper(html_cache=cache, cache_only=True)
+    assert await scraper.async_fetch_content("https://docs.example.com/a") == "<html>a</html>"
+    with pytest.raises(HtmlCacheMissError):
+      await scraper.async_fetch_content("https://docs.example.com/b")
+
+  asyncio.run(run())
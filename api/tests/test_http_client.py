@@ -0,0 +1,31 @@
+import asyncio
+from api.inngest.crawl_url import CRAWL_URL_CONCURRENCY
+from lib.http_client import close_http_session, get_http_session
+
+def test_session_is_shared_within_a_loop_and_closed_on_shutdown():
+  async def run():
+    session = get_http_session()
+    assert get_http_session() is session
+    await close_http_session()
+    assert session.closed
+    assert get_http_session() is not session
+    await close_http_session()
+
+  asyncio.run(run())
+
+def test_each_loop_gets_its_own_session():
+  async def run():
+    session = get_http_session()
+    await close_http_session()
+    return session
+
+  assert asyncio.run(run()) is not asyncio.run(run())
+
+def test_per_host_limit_leaves_room_for_every_concurrent_crawl():
+  async def run():
+    session = get_http_session()
+    limit_per_host = session.connector.limit_per_host if session.connector else 0
+    await close_http_session()
+    return limit_per_host
+
+  assert asyncio.run(run()) >= CRAWL_URL_CONCURRENCY
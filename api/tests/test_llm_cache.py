@@ -0,0 +1,57 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import litellm
+from pydantic import BaseModel
+from lib.scraper.extractor import DataExtractor
+from lib.scraper.llm_cache import LlmResponseCache
+
+class Data(BaseModel):
+  title: str
+
+def _messages(content):
+  return [{"role": "system", "content": "Summarize."}, {"role": "user", "content": content}]
+
+def test_cache_key_covers_model_prompt_schema_and_content():
+  key = LlmResponseCache.get_cache_key("gpt-4o-mini", _messages("a"), Data)
+
+  assert key == LlmResponseCache.get_cache_key("gpt-4o-mini", _messages("a"), Data)
+  assert key != LlmResponseCache.get_cache_key("gpt-4o", _messages("a"), Data)
+  assert key != LlmResponseCache.get_cache_key("gpt-4o-mini", _messages("b"), Data)
+  assert key != LlmResponseCache.get_cache_key("gpt-4o-mini", _messages("a"))
+
+def test_expired_and_least_recently_used_entries_are_misses(tmp_path):
+  cache = LlmResponseCache(str(tmp_path / "llm.sqlite"), ttl_seconds=60, max_entries=2)
+
+  async def run():
+    await cache.put("a", "model", "response a")
+    await cache.put("b", "model", "response b")
+    assert await cache.get("a") == "response a"
+    await cache.put("c", "model", "response c")
+    return [await cache.get(key) for key in ["a", "b", "c"]]
+
+  assert asyncio.run(run()) == ["response a", None, "response c"]
+  assert cache.stats.hits == 3 and cache.stats.misses == 1 and cache.stats.evictions == 1
+
+  cache.ttl_seconds = -1
+  assert asyncio.run(cache.get("a")) is None
+
+def test_retried_extraction_makes_no_llm_calls(tmp_path, monkeypatch):
+  calls = []
+
+  async def fake_acompletion(model, messages, response_format=None, **kwargs):
+    calls.append(messages)
+    content = json.dumps({"title": "Title"}) if response_format else "summary"
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+  monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+  cache = LlmResponseCache(str(tmp_path / "llm.sqlite"), ttl_seconds=60, max_entries=100)
+
+  def extract():
+    extractor = DataExtractor(llm_cache=cache)
+    return asyncio.run(extractor._async_extract_data("content", "Title", "Extract.", Data))
+
+  assert extract() == ("summary", Data(title="Title"))
+  assert len(calls) == 2
+  assert extract() == ("summary", Data(title="Title"))
+  assert len(calls) == 2
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from lib.llm_limiter import LlmRateLimiter, estimate_tokens, get_llm_limiter
+
+class RateLimitError(Exception):
+  status_code = 429
+
+def test_in_flight_requests_stay_within_the_window():
+  limiter = LlmRateLimiter(tokens_per_minute=1_000_000, max_concurrency=4, initial_concurrency=2)
+  peak = 0
+
+  async def request():
+    nonlocal peak
+    async with limiter.limit(10):
+      peak = max(peak, limiter.in_flight)
+      await asyncio.sleep(0.01)
+
+  async def run():
+    await asyncio.gather(*[request() for _ in range(20)])
+
+  asyncio.run(run())
+
+  assert peak <= 4
+  assert limiter.in_flight == 0
+  # Additive increase up to the maximum
+  assert limiter.concurrency == 4
+
+def test_rate_limits_halve_the_window_once_per_burst():
+  limiter = LlmRateLimiter(tokens_per_minute=1_000_000, max_concurrency=16)
+
+  async def rate_limited_request():
+    async with limiter.limit(10):
+      await asyncio.sleep(0.01)
+      raise RateLimitError()
+
+  async def run():
+    return await asyncio.gather(*[rate_limited_request() for _ in range(8)], return_exceptions=True)
+
+  results = asyncio.run(run())
+
+  assert all(isinstance(result, RateLimitError) for result in results)
+  assert limiter.rate_limited_count == 8
+  assert limiter.concurrency == 8
+
+def test_token_bucket_holds_requests_back():
+  # 6000 tokens per minute refill at 100 tokens per second
+  limiter = LlmRateLimiter(tokens_per_minute=6000, max_concurrency=16)
+
+  async def run():
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    async with limiter.limit(6000):
+      pass
+    async with limiter.limit(10):
+      pass
+    return loop.time() - start
+
+  assert asyncio.run(run()) == pytest.approx(0.1, abs=0.05)
+
+def test_reported_usage_settles_the_bucket():
+  limiter = LlmRateLimiter(tokens_per_minute=6000, max_concurrency=16)
+
+  async def run():
+    async with limiter.limit(1000):
+      pass
+    limiter.record_usage(1000, 200)
+
+  asyncio.run(run())
+
+  assert limiter._tokens == pytest.approx(5800, abs=5)
+
+def test_limiter_is_shared_within_a_loop():
+  async def run():
+    return get_llm_limiter() is get_llm_limiter()
+
+  assert asyncio.run(run())
+  assert estimate_tokens([{"role": "user", "content": "x" * 400}], max_output_tokens=0) == 100
@@ -0,0 +1,68 @@
+import asyncio
+from lib.nomic import NomicEmbeddingBatcher, get_embedding_batcher
+from tests.fakes import FakeNomicEmbeddings
+
+def test_concurrent_callers_share_one_request():
+  client = FakeNomicEmbeddings()
+  batcher = NomicEmbeddingBatcher(client)  # type: ignore
+
+  async def run():
+    return await asyncio.gather(
+      batcher.embed_texts(["a", "bb"]),
+      batcher.embed_texts(["ccc"]),
+      batcher.embed_texts(["dddd", "eeeee"]),
+    )
+
+  results = asyncio.run(run())
+
+  assert client.requests == [["a", "bb", "ccc", "dddd", "eeeee"]]
+  assert [result.embeddings for result in results] == [[[1.0], [2.0]], [[3.0]], [[4.0], [5.0]]]
+  assert sum(result.usage.total_tokens for result in results) == 50
+
+def test_batches_are_capped_at_the_max_batch_size():
+  client = FakeNomicEmbeddings()
+  batcher = NomicEmbeddingBatcher(client, max_batch_size=2)  # type: ignore
+
+  async def run():
+    return await asyncio.gather(
+      batcher.embed_texts(["a", "b", "c"]),
+      batcher.embed_texts(["d"]),
+    )
+
+  results = asyncio.run(run())
+
+  assert client.requests == [["a", "b"], ["c", "d"]]
+  assert results[0].embeddings == [[1.0], [1.0], [1.0]]
+
+def test_batches_stay_within_the_max_batch_tokens():
+  client = FakeNomicEmbeddings()
+  # Each 8-character text is estimated at 3 tokens
+  batcher = NomicEmbeddingBatcher(client, max_batch_tokens=7)  # type: ignore
+
+  async def run():
+    return await asyncio.gather(
+      batcher.embed_texts(["aaaaaaaa", "bbbbbbbb"]),
+      batcher.embed_texts(["cccccccc"]),
+    )
+
+  asyncio.run(run())
+
+  assert client.requests == [["aaaaaaaa", "bbbbbbbb"], ["cccccccc"]]
+
+def test_failed_batch_fails_every_caller():
+  batcher = NomicEmbeddingBatcher(FakeNomicEmbeddings(fail=True))  # type: ignore
+
+  async def run():
+    return await asyncio.gather(
+      batcher.embed_texts(["a"]),
+      batcher.embed_texts(["b"]),
+      return_exceptions=True,
+    )
+
+  assert all(isinstance(result, Exception) for result in asyncio.run(run()))
+
+def test_batcher_is_shared_within_a_loop():
+  async def run():
+    return get_embedding_batcher("key") is get_embedding_batcher("key")
+
+  assert asyncio.run(run())
@@ -0,0 +1,107 @@
+import asyncio
+from typing import cast
+from lib.crawler import crawler
+from lib.db.types import Artifact, DomainConfig
+from lib.inngest_context import with_inngest_step
+from lib.scraper.types import FetchedPage, HttpValidators, ScrapingConfig, WebScraperResult
+from lib.crawler.url_patterns import UrlPatternMatcher
+from api.inngest.events import CrawlRequestedEventData
+
+class StepInterrupt(Exception):
+  pass
+
+class FakeStep:
+  """Runs each new step once, then interrupts the function the way Inngest does so it is replayed."""
+
+  def __init__(self):
+    self.memos = {}
+
+  async def run(self, step_id, handler, *handler_args):
+    if step_id not in self.memos:
+      self.memos[step_id] = await handler(*handler_args)
+      raise StepInterrupt()
+    return self.memos[step_id]
+
+  async def send_event(self, step_id, events):
+    if step_id not in self.memos:
+      self.memos[step_id] = [f"event-{i}" for i, _ in enumerate(events)]
+      raise StepInterrupt()
+    return self.memos[step_id]
+
+class FakeScraper:
+  def __init__(self, html):
+    self.html = html
+    self.fetches = []
+
+  async def async_fetch_page(self, url, validators=None):
+    self.fetches.append(validators)
+    return FetchedPage(url=url, content=self.html, validators=HttpValidators(etag='"v2"'))
+
+  async def async_scrape_html(self, url, html, scraping_config, allowed_url_patterns, validators):
+    return WebScraperResult(url=url, page_content=html, scraped_sections=[], validators=validators)
+
+ARTIFACT = cast(Artifact, {
+  "artifact_id": "a1",
+  "domain_id": "d1",
+  "url": "https://docs.example.com/a",
+  "crawl_depth": 0,
+  "crawl_status": "scraped",
+  "content_sha256": "old",
+  "crawled_as_artifact_id": None,
+  "http_etag": '"v1"',
+  "http_last_modified": None,
+})
+
+def _run_until_complete(step, coroutine_factory):
+  async def run():
+    with with_inngest_step(step):
+      while True:
+        try:
+          return await coroutine_factory()
+        except StepInterrupt:
+          continue
+
+  return asyncio.run(run())
+
+def test_refresh_replay_reuses_the_committed_result(monkeypatch):
+  scraper = FakeScraper("<html>changed</html>")
+  commits = []
+  marks = []
+
+  async def extract_and_commit(artifact, scrape_response, config):
+    commits.append(scrape_response)
+    return {
+      "artifact": artifact,
+      "artifact_contents": [],
+      "artifact_links": [{"target_url": "https://docs.example.com/b"}],
+    }
+
+  async def mark_crawl_frontier(crawl_request, max_crawl_depth):
+    marks.append(crawl_request.url)
+
+  async def filter_crawl_frontier(target_urls, base_crawl_event):
+    return target_urls
+
+  monkeypatch.setattr(crawler, "_create_scraper", lambda cache_only=False: scraper)
+  monkeypatch.setattr(crawler, "_extract_and_commit", extract_and_commit)
+  monkeypatch.setattr(crawler, "_mark_crawl_frontier", mark_crawl_frontier)
+  monkeypatch.setattr(crawler, "_filter_crawl_frontier", filter_crawl_frontier)
+
+  config = DomainConfig(allowed_url_patterns=["https://docs.example.com/*"])
+  crawl_request = CrawlRequestedEventData(url=ARTIFACT["url"], crawl_depth=0, domain_id="d1", refresh=True)
+  result = _run_until_complete(FakeStep(), lambda: crawler._refresh_artifact(
+    ARTIFACT,
+    crawl_request,
+    ScrapingConfig(),
+    UrlPatternMatcher.from_domain_config(config),
+    config,
+    5,
+  ))
+
+  assert len(scraper.fetches) == 1
+  assert scraper.fetches[0] == HttpValidators(etag='"v1"')
+  assert len(commits) == 1
+  assert result["artifact"]["artifact_id"] == "a1"
+  assert result["crawl_event_ids"] == ["event-0"]
+  assert result["insert_ids"] == [{"target_url": "https://docs.example.com/b"}]
+  assert marks and set(marks) == {ARTIFACT["url"]}
@@ -0,0 +1,147 @@
+import asyncio
+from bs4 import BeautifulSoup
+from lib.scraper import parsing
+from lib.scraper.scraper import WebScraper
+from lib.scraper.types import FetchedPage, ScrapingConfig
+
+def _doc_page(articles: int, sections_per_article: int) -> str:
+  parts = ["<html><head><title>Docs</title></head><body><nav><a href='/'>Home</a></nav>"]
+  for a in range(articles):
+    parts.append(f"<article id='article-{a}'><h1>Article {a}</h1>")
+    for s in range(sections_per_article):
+      paragraph = f"Some text about topic {a}.{s} <a href='/docs/{a}/{s}'>read more</a>. " * 10
+      parts.append(f"<section id='section-{a}-{s}'><h2>Section {a}.{s}</h2><p>{paragraph}</p></section>")
+    parts.append("</article>")
+  parts.append("</body></html>")
+  return "".join(parts)
+
+class FakeFetchScraper(WebScraper):
+  def __init__(self, html: str):
+    super().__init__()
+    self.html = html
+
+  async def async_fetch_page(self, url, validators=None):
+    return FetchedPage(url=url, content=self.html)
+
+def test_oversized_sections_are_split_on_the_next_selector():
+  html = _doc_page(articles=2, sections_per_article=3)
+  config = ScrapingConfig(max_chunk_size=2000)
+
+  async def run():
+    return await FakeFetchScraper(html).async_scrape("https://docs.example.com/guide", config)
+
+  result = asyncio.run(run())
+
+  assert result.page_title == "Docs"
+  assert [section.id for section in result.scraped_sections] == [
+    f"section-{a}-{s}" for a in range(2) for s in range(3)
+  ]
+  assert result.scraped_sections[0].title == "Section 0.0"
+  assert result.scraped_sections[0].scraped_links[0].url == "https://docs.example.com/docs/0/0"
+
+def test_large_page_is_parsed_once(monkeypatch):
+  html = _doc_page(articles=20, sections_per_article=20)
+  config = ScrapingConfig(max_chunk_size=2000)
+  parse_count = 0
+  original_soup = parsing.BeautifulSoup
+
+  def counting_soup(*args, **kwargs):
+    nonlocal parse_count
+    parse_count += 1
+    return original_soup(*args, **kwargs)
+
+  monkeypatch.setattr(parsing, "BeautifulSoup", counting_soup)
+
+  async def run():
+    return await FakeFetchScraper(html).async_scrape("https://docs.example.com/guide", config)
+
+  result = asyncio.run(run())
+
+  assert len(result.scraped_sections) == 400
+  assert parse_count == 1
+
+def test_process_pool_parsing_matches_inline_parsing(monkeypatch):
+  html = _doc_page(articles=2, sections_per_article=3)
+  config = ScrapingConfig(max_chunk_size=2000)
+
+  async def run():
+    return await FakeFetchScraper(html).async_scrape(
+      "https://docs.example.com/guide",
+      config,
+      allowed_url_patterns=(r"https://docs\.example\.com/docs/\d+/1$",),
+    )
+
+  inline_result = asyncio.run(run())
+
+  monkeypatch.setattr(parsing.settings, "html_parse_workers", 1)
+  try:
+    pooled_result = asyncio.run(run())
+    assert parsing.get_parse_executor() is not None
+  finally:
+    parsing.close_parse_executor()
+
+  assert pooled_result == inline_result
+  assert [len(section.scraped_links) for section in pooled_result.scraped_sections] == [0, 10, 0, 0, 10, 0]
+
+def test_rejected_links_are_never_materialized(monkeypatch):
+  html = _doc_page(articles=2, sections_per_article=3)
+  config = ScrapingConfig(max_chunk_size=2000)
+  built_urls = []
+  original_link = parsing.ScrapedLink
+
+  def recording_link(**kwargs):
+    built_urls.append(kwargs["url"])
+    return original_link(**kwargs)
+
+  monkeypatch.setattr(parsing, "ScrapedLink", recording_link)
+
+  async def run():
+    return await FakeFetchScraper(html).async_scrape(
+      "https://docs.example.com/guide",
+      config,
+      allowed_url_patterns=(r"https://docs\.example\.com/docs/0/",),
+    )
+
+  result = asyncio.run(run())
+
+  assert built_urls and all(url.startswith("https://docs.example.com/docs/0/") for url in built_urls)
+  assert sum(len(section.scraped_links) for section in result.scraped_sections) == len(built_urls)
+
+def test_markup_is_converted_to_markdown_once(monkeypatch):
+  html = _doc_page(articles=5, sections_per_article=5)
+  config = ScrapingConfig(max_chunk_size=2000)
+  converted_lengths = []
+  original_handle = parsing.html2text.HTML2Text.handle
+
+  def counting_handle(self, data):
+    converted_lengths.append(len(data))
+    return original_handle(self, data)
+
+  monkeypatch.setattr(parsing.html2text.HTML2Text, "handle", counting_handle)
+
+  result = parsing.parse_page(html, "https://docs.example.com/guide", config)
+
+  assert len(result.scraped_sections) == 25
+  assert len(converted_lengths) == 1
+  assert result.scraped_sections[0].content == parsing.html_to_markdown(
+    str(BeautifulSoup(html, "html.parser").select_one("#section-0-0")),
+    "https://docs.example.com/guide",
+  )
+
+def test_nested_sections_match_a_standalone_conversion():
+  html = (
+    "<html><body><h1>Top</h1>"
+    "<blockquote><section id='quoted'><h2>Quoted</h2><p>Quoted text.</p></section></blockquote>"
+    "<ul><li><section id='listed'><h2>Listed</h2><p>Listed text.</p></section></li></ul>"
+    "<section id='plain'><h2>Plain</h2><p>Plain text.</p></section>"
+    "</body></html>"
+  )
+  soup = BeautifulSoup(html, "html.parser")
+  assert soup.html is not None
+  page_markdown = parsing.PageMarkdown(soup.html, "https://docs.example.com/guide", ["section"])
+
+  for section in soup.select("section"):
+    assert page_markdown.get_section_content(section) == parsing.html_to_markdown(
+      str(section),
+      "https://docs.example.com/guide",
+    )
@@ -0,0 +1,82 @@
+from typing import cast
+from lib.crawler import sections as sections_module
+from lib.crawler.sections import SectionIndex
+from lib.db.types import ArtifactContent
+from lib.scraper.types import ScrapedContent
+
+def _make_sections(count: int):
+  return [
+    ScrapedContent(id=f"section-{i}", title=f"Section {i}", content=f"Content of section {i}\n" * 20)
+    for i in range(count)
+  ]
+
+def _make_artifact_contents(sections):
+  return [
+    cast(ArtifactContent, {
+      "artifact_content_id": f"content-{i}",
+      "created_at": "2025-01-01T00:00:00Z",
+      "artifact_id": "artifact",
+      "anchor_id": section.id,
+      "title": section.title,
+      "parsed_text": section.content,
+      "summary": None,
+      "metadata": None,
+      "summary_embedding": None,
+    })
+    for i, section in enumerate(sections)
+  ]
+
+def test_unique_sections_keep_first_section_per_anchor():
+  sections = [
+    ScrapedContent(id="a", title="A", content="first"),
+    ScrapedContent(id="b", title="B", content="second"),
+    ScrapedContent(id="a", title="A again", content="third"),
+  ]
+  index = SectionIndex(sections)
+
+  assert index.unique_sections() == [(0, sections[0]), (1, sections[1])]
+
+def test_match_pairs_contents_by_anchor_and_content():
+  sections = _make_sections(3)
+  artifact_contents = _make_artifact_contents(sections)
+  artifact_contents[1]["parsed_text"] = "stale text"
+  artifact_contents.append({**artifact_contents[0], "artifact_content_id": "duplicate"})
+
+  matched = SectionIndex(sections).match(artifact_contents)
+
+  assert [(content["artifact_content_id"], section.id) for content, section in matched] == [
+    ("content-0", "section-0"),
+    ("content-2", "section-2"),
+  ]
+
+def test_match_does_one_lookup_per_stored_row(monkeypatch):
+  sections = _make_sections(1000)
+  artifact_contents = list(reversed(_make_artifact_contents(sections)))
+  for content in artifact_contents:
+    content["content_sha256"] = sections_module.get_sha256_hash(content["parsed_text"])
+
+  hashed_texts = []
+  original_hash = sections_module.get_sha256_hash
+
+  def counting_hash(text):
+    hashed_texts.append(text)
+    return original_hash(text)
+
+  monkeypatch.setattr(sections_module, "get_sha256_hash", counting_hash)
+  index = SectionIndex(sections)
+  assert len(hashed_texts) == len(sections)
+
+  lookups = []
+  original_get = SectionIndex.get
+
+  def counting_get(self, anchor_id, content_hash):
+    lookups.append((anchor_id, content_hash))
+    return original_get(self, anchor_id, content_hash)
+
+  monkeypatch.setattr(SectionIndex, "get", counting_get)
+  matched = index.match(artifact_contents)
+
+  assert [section.id for _, section in matched] == [section.id for section in reversed(sections)]
+  assert len(lookups) == len(artifact_contents)
+  # Rows with a stored content hash are not hashed again
+  assert len(hashed_texts) == len(sections)
@@ -0,0 +1,31 @@
+from lib.scraper.truncation import (
+  DEFAULT_MAX_INPUT_TOKENS,
+  PROMPT_RESERVE_TOKENS,
+  TRUNCATION_MARKER,
+  get_max_content_tokens,
+  truncate_to_tokens,
+)
+
+MODEL = "openai/gpt-4o-mini"
+
+def test_content_within_budget_is_kept():
+  result = truncate_to_tokens("A short section.", MODEL, 100)
+
+  assert result.content == "A short section."
+  assert result.content_tokens == result.truncated_content_tokens
+
+def test_long_content_keeps_head_and_tail():
+  content = "Introduction. " + "filler words " * 5000 + "Conclusion."
+
+  result = truncate_to_tokens(content, MODEL, 300)
+
+  assert result.content.startswith("Introduction.")
+  assert result.content.endswith("Conclusion.")
+  assert TRUNCATION_MARKER in result.content
+  assert result.content_tokens > 10000
+  assert result.truncated_content_tokens <= 310
+
+def test_budget_follows_the_model_context_window():
+  assert get_max_content_tokens(MODEL) == 128000 - PROMPT_RESERVE_TOKENS
+  assert get_max_content_tokens(MODEL, 12000) == 12000
+  assert get_max_content_tokens("unknown/model") == DEFAULT_MAX_INPUT_TOKENS - PROMPT_RESERVE_TOKENS
@@ -0,0 +1,53 @@
+import re
+from lib.crawler.url_patterns import UrlPatternMatcher, get_url_pattern_matcher
+from lib.db.types import DomainConfig
+
+PATTERNS = [
+  r"https://docs\.example\.com/guides/.*",
+  r"https://docs\.example\.com/reference/",
+  r"https?://blog\.example\.com/\d{4}/",
+  r"https://(www\.)?example\.org/docs",
+  r"https://api\.example\.com/v1|https://api\.example\.com/v2",
+]
+
+URLS = [
+  "https://docs.example.com/guides/cron",
+  "https://docs.example.com/reference/api",
+  "https://docs.example.com/blog/post",
+  "http://blog.example.com/2024/01/post",
+  "https://blog.example.com/latest",
+  "https://www.example.org/docs/intro",
+  "https://example.org/docs",
+  "https://api.example.com/v2/users",
+  "https://api.example.com/v3/users",
+  "https://evil.com/?next=https://docs.example.com/guides/",
+  "https://docs.example.com",
+  "mailto:someone@example.com",
+]
+
+def test_matches_like_re_match():
+  matcher = UrlPatternMatcher(PATTERNS)
+
+  for url in URLS:
+    expected = any(re.match(pattern, url) for pattern in PATTERNS)
+    assert matcher.matches(url) == expected, url
+
+def test_inline_flags_fall_back_to_individual_patterns():
+  patterns = [r"https://docs\.example\.com/.*", r"(?i)https://DOCS\.other\.com/"]
+  matcher = UrlPatternMatcher(patterns)
+
+  assert matcher.matches("https://docs.other.com/page")
+  assert matcher.matches("https://docs.example.com/page")
+  assert not matcher.matches("https://example.com/page")
+
+def test_no_patterns_match_nothing():
+  matcher = UrlPatternMatcher([])
+
+  assert not matcher.matches("https://docs.example.com/")
+
+def test_matchers_are_cached_by_patterns():
+  config_a = DomainConfig(allowed_url_patterns=list(PATTERNS))
+  config_b = DomainConfig(allowed_url_patterns=list(PATTERNS))
+
+  assert UrlPatternMatcher.from_domain_config(config_a) is UrlPatternMatcher.from_domain_config(config_b)
+  assert get_url_pattern_matcher(tuple(PATTERNS)) is UrlPatternMatcher.from_domain_config(config_a)
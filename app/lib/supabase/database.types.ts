@@ -74,6 +74,7 @@ export type Database = {
           anchor_id: string | null
           artifact_content_id: string
           artifact_id: string
+          content_sha256: string | null
           created_at: string
           metadata: Json | null
           parsed_text: string
@@ -86,6 +87,7 @@ export type Database = {
           anchor_id?: string | null
           artifact_content_id?: string
           artifact_id: string
+          content_sha256?: string | null
           created_at?: string
           metadata?: Json | null
           parsed_text: string
@@ -98,6 +100,7 @@ export type Database = {
           anchor_id?: string | null
           artifact_content_id?: string
           artifact_id?: string
+          content_sha256?: string | null
           created_at?: string
           metadata?: Json | null
           parsed_text?: string
@@ -116,6 +119,63 @@ export type Database = {
           },
         ]
       }
+      artifact_crawl_usage: {
+        Row: {
+          artifact_id: string
+          cached_llm_responses: number
+          cached_prompt_tokens: number
+          completion_tokens: number
+          cost_usd: number
+          created_at: string
+          domain_id: string
+          embedding_tokens: number
+          id: string
+          llm_requests: number
+          prompt_tokens: number
+        }
+        Insert: {
+          artifact_id: string
+          cached_llm_responses?: number
+          cached_prompt_tokens?: number
+          completion_tokens?: number
+          cost_usd?: number
+          created_at?: string
+          domain_id: string
+          embedding_tokens?: number
+          id?: string
+          llm_requests?: number
+          prompt_tokens?: number
+        }
+        Update: {
+          artifact_id?: string
+          cached_llm_responses?: number
+          cached_prompt_tokens?: number
+          completion_tokens?: number
+          cost_usd?: number
+          created_at?: string
+          domain_id?: string
+          embedding_tokens?: number
+          id?: string
+          llm_requests?: number
+          prompt_tokens?: number
+        }
+        Relationships: [
+          {
+            foreignKeyName: "artifact_crawl_usage_artifact_id_fkey"
+            columns: ["artifact_id"]
+            isOneToOne: false
+            referencedRelation: "artifacts"
+            referencedColumns: ["artifact_id"]
+          },
+          {
+            foreignKeyName: "artifact_crawl_usage_domain_id_fkey"
+            columns: ["domain_id"]
+            isOneToOne: false
+            referencedRelation: "artifact_domains"
+            referencedColumns: ["id"]
+          },
+        ]
+      }
       artifact_domains: {
         Row: {
           config: Json
@@ -172,6 +232,32 @@ export type Database = {
           },
         ]
       }
+      artifact_scrapes: {
+        Row: {
+          artifact_id: string
+          created_at: string
+          scrape_result: Json
+        }
+        Insert: {
+          artifact_id: string
+          created_at?: string
+          scrape_result: Json
+        }
+        Update: {
+          artifact_id?: string
+          created_at?: string
+          scrape_result?: Json
+        }
+        Relationships: [
+          {
+            foreignKeyName: "artifact_scrapes_artifact_id_fkey"
+            columns: ["artifact_id"]
+            isOneToOne: true
+            referencedRelation: "artifacts"
+            referencedColumns: ["artifact_id"]
+          },
+        ]
+      }
       artifacts: {
         Row: {
           artifact_id: string
@@ -181,6 +267,8 @@ export type Database = {
           crawled_as_artifact_id: string | null
           created_at: string
           domain_id: string
+          http_etag: string | null
+          http_last_modified: string | null
           metadata: Json | null
           parsed_text: string | null
           summary: string | null
@@ -195,6 +283,8 @@ export type Database = {
           crawled_as_artifact_id?: string | null
           created_at?: string
           domain_id: string
+          http_etag?: string | null
+          http_last_modified?: string | null
           metadata?: Json | null
           parsed_text?: string | null
           summary?: string | null
@@ -209,6 +299,8 @@ export type Database = {
           crawled_as_artifact_id?: string | null
           created_at?: string
           domain_id?: string
+          http_etag?: string | null
+          http_last_modified?: string | null
           metadata?: Json | null
           parsed_text?: string | null
           summary?: string | null
@@ -312,6 +404,59 @@ export type Database = {
           },
         ]
       }
+      crawl_frontier_blocks: {
+        Row: {
+          bits: number
+          block_index: number
+          domain_id: string
+        }
+        Insert: {
+          bits?: number
+          block_index: number
+          domain_id: string
+        }
+        Update: {
+          bits?: number
+          block_index?: number
+          domain_id?: string
+        }
+        Relationships: [
+          {
+            foreignKeyName: "crawl_frontier_blocks_domain_id_fkey"
+            columns: ["domain_id"]
+            isOneToOne: false
+            referencedRelation: "artifact_domains"
+            referencedColumns: ["id"]
+          },
+        ]
+      }
+      embedding_cache: {
+        Row: {
+          content_sha256: string
+          created_at: string
+          dimensionality: number
+          embedding: number[]
+          model: string
+          task_type: string
+        }
+        Insert: {
+          content_sha256: string
+          created_at?: string
+          dimensionality: number
+          embedding: number[]
+          model: string
+          task_type: string
+        }
+        Update: {
+          content_sha256?: string
+          created_at?: string
+          dimensionality?: number
+          embedding?: number[]
+          model?: string
+          task_type?: string
+        }
+        Relationships: []
+      }
       profiles: {
         Row: {
           created_at: string
@@ -333,6 +478,44 @@ export type Database = {
         }
         Relationships: []
       }
+      section_registry: {
+        Row: {
+          content_sha256: string
+          created_at: string
+          domain_id: string
+          metadata: Json | null
+          occurrences: number
+          summary: string | null
+          summary_embedding: string | null
+        }
+        Insert: {
+          content_sha256: string
+          created_at?: string
+          domain_id: string
+          metadata?: Json | null
+          occurrences?: number
+          summary?: string | null
+          summary_embedding?: string | null
+        }
+        Update: {
+          content_sha256?: string
+          created_at?: string
+          domain_id?: string
+          metadata?: Json | null
+          occurrences?: number
+          summary?: string | null
+          summary_embedding?: string | null
+        }
+        Relationships: [
+          {
+            foreignKeyName: "section_registry_domain_id_fkey"
+            columns: ["domain_id"]
+            isOneToOne: false
+            referencedRelation: "artifact_domains"
+            referencedColumns: ["id"]
+          },
+        ]
+      }
       thread_states: {
         Row: {
           agent_name: string | null
@@ -415,6 +598,29 @@ export type Database = {
       [_ in never]: never
     }
     Functions: {
+      add_to_crawl_frontier: {
+        Args: {
+          target_domain_id: string
+          block_indexes: number[]
+          block_masks: number[]
+        }
+        Returns: number
+      }
+      clear_crawl_frontier: {
+        Args: {
+          target_domain_id: string
+        }
+        Returns: number
+      }
+      commit_crawl_result: {
+        Args: {
+          target_artifact_id: string
+          artifact_data: Json
+          artifact_contents: Json
+          crawl_usage?: Json
+        }
+        Returns: Json
+      }
       copy_domain_artifacts: {
         Args: {
           source_domain_id: string
@@ -453,6 +659,20 @@ export type Database = {
           inbound_links: Json
         }[]
       }
+      get_boilerplate_sections: {
+        Args: {
+          target_domain_id: string
+          content_hashes: string[]
+          min_occurrences: number
+        }
+        Returns: {
+          content_sha256: string
+          occurrences: number
+          summary: string
+          metadata: Json
+          summary_embedding: string
+        }[]
+      }
       get_cluster_summarization_data: {
         Args: {
           target_domain_id: string
@@ -467,6 +687,47 @@ export type Database = {
           prior_clusters: Json
         }[]
       }
+      get_crawl_frontier_blocks: {
+        Args: {
+          target_domain_id: string
+          block_indexes: number[]
+        }
+        Returns: {
+          block_index: number
+          bits: number
+        }[]
+      }
+      get_domain_crawl_usage: {
+        Args: {
+          target_domain_id: string
+        }
+        Returns: {
+          crawls: number
+          artifacts: number
+          llm_requests: number
+          cached_llm_responses: number
+          prompt_tokens: number
+          cached_prompt_tokens: number
+          completion_tokens: number
+          embedding_tokens: number
+          cost_usd: number
+        }[]
+      }
+      get_most_expensive_artifacts: {
+        Args: {
+          target_domain_id: string
+          max_results?: number
+        }
+        Returns: {
+          artifact_id: string
+          url: string
+          crawls: number
+          prompt_tokens: number
+          completion_tokens: number
+          embedding_tokens: number
+          cost_usd: number
+        }[]
+      }
       get_top_level_clusters: {
         Args: {
           target_domain_id: string
@@ -519,7 +780,12 @@ export type Database = {
     }
     Enums: {
       domain_visibility: "public" | "unreleased"
-      enum_crawl_status: "discovered" | "scraped" | "scrape_failed" | "scraping"
+      enum_crawl_status:
+        | "discovered"
+        | "scraped"
+        | "scrape_failed"
+        | "scraping"
+        | "enriching"
       enum_thread_type: "runbook_generator"
     }
     CompositeTypes: {
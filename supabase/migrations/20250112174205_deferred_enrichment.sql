@@ -0,0 +1,135 @@
+alter type "public"."enum_crawl_status" add value 'enriching';
+
+create table "public"."artifact_scrapes" (
+    "artifact_id" uuid not null,
+    "created_at" timestamp with time zone not null default now(),
+    "scrape_result" jsonb not null
+);
+
+alter table "public"."artifact_scrapes" enable row level security;
+
+CREATE UNIQUE INDEX artifact_scrapes_pkey ON public.artifact_scrapes USING btree (artifact_id);
+
+alter table "public"."artifact_scrapes" add constraint "artifact_scrapes_pkey" PRIMARY KEY using index "artifact_scrapes_pkey";
+
+alter table "public"."artifact_scrapes" add constraint "artifact_scrapes_artifact_id_fkey" FOREIGN KEY (artifact_id) REFERENCES artifacts(artifact_id) ON DELETE CASCADE not valid;
+
+alter table "public"."artifact_scrapes" validate constraint "artifact_scrapes_artifact_id_fkey";
+
+set check_function_bodies = off;
+
+CREATE OR REPLACE FUNCTION public.commit_crawl_result(target_artifact_id uuid, artifact_data jsonb, artifact_contents jsonb)
+ RETURNS jsonb
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+    committed_artifact jsonb;
+    committed_contents jsonb;
+    committed_links jsonb;
+BEGIN
+    -- 1. Upsert the scraped sections of the artifact
+    WITH upserted_contents AS (
+        INSERT INTO public.artifact_contents (
+            artifact_id,
+            anchor_id,
+            title,
+            parsed_text,
+            summary,
+            metadata,
+            summary_embedding
+        )
+        SELECT
+            target_artifact_id,
+            c.anchor_id,
+            c.title,
+            c.parsed_text,
+            c.summary,
+            c.metadata,
+            c.summary_embedding::vector
+        FROM jsonb_to_recordset(artifact_contents) AS c(
+            anchor_id text,
+            title text,
+            parsed_text text,
+            summary text,
+            metadata jsonb,
+            summary_embedding text
+        )
+        ON CONFLICT (artifact_id, anchor_id) DO UPDATE
+            SET title             = EXCLUDED.title,
+                parsed_text       = EXCLUDED.parsed_text,
+                summary           = EXCLUDED.summary,
+                metadata          = EXCLUDED.metadata,
+                summary_embedding = EXCLUDED.summary_embedding
+        RETURNING
+            artifact_content_id,
+            created_at,
+            artifact_id,
+            anchor_id,
+            title,
+            parsed_text,
+            summary,
+            metadata
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(upserted_contents)), '[]'::jsonb)
+    INTO committed_contents
+    FROM upserted_contents;
+
+    -- 2. Replace the outbound links of the upserted sections
+    DELETE FROM public.artifact_links al
+    USING public.artifact_contents ac
+    WHERE al.source_artifact_content_id = ac.artifact_content_id
+      AND ac.artifact_id = target_artifact_id
+      AND ac.anchor_id IN (
+          SELECT c.anchor_id
+          FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text)
+      );
+
+    WITH inserted_links AS (
+        INSERT INTO public.artifact_links (
+            source_artifact_content_id,
+            anchor_text,
+            target_url
+        )
+        SELECT
+            ac.artifact_content_id,
+            l.anchor_text,
+            l.target_url
+        FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text, links jsonb)
+        JOIN public.artifact_contents ac
+            ON ac.artifact_id = target_artifact_id
+            AND ac.anchor_id = c.anchor_id
+        CROSS JOIN LATERAL jsonb_to_recordset(COALESCE(c.links, '[]'::jsonb)) AS l(anchor_text text, target_url text)
+        RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(inserted_links)), '[]'::jsonb)
+    INTO committed_links
+    FROM inserted_links;
+
+    -- 3. Mark the artifact as scraped
+    UPDATE public.artifacts a
+    SET crawl_status           = 'scraped',
+        metadata               = artifact_data->'metadata',
+        parsed_text            = artifact_data->>'parsed_text',
+        summary                = artifact_data->>'summary',
+        title                  = artifact_data->>'title',
+        content_sha256         = artifact_data->>'content_sha256',
+        crawled_as_artifact_id = NULL
+    WHERE a.artifact_id = target_artifact_id
+    RETURNING to_jsonb(a.*) INTO committed_artifact;
+
+    IF committed_artifact IS NULL THEN
+        RAISE EXCEPTION 'Artifact % not found', target_artifact_id;
+    END IF;
+
+    -- 4. Drop the scrape kept around for deferred enrichment
+    DELETE FROM public.artifact_scrapes s
+    WHERE s.artifact_id = target_artifact_id;
+
+    RETURN jsonb_build_object(
+        'artifact', committed_artifact,
+        'artifact_contents', committed_contents,
+        'artifact_links', committed_links
+    );
+END;
+$function$
+;
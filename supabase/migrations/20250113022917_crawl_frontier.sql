@@ -0,0 +1,70 @@
+create table "public"."crawl_frontier_blocks" (
+    "domain_id" uuid not null,
+    "block_index" integer not null,
+    "bits" bigint not null default 0
+);
+
+alter table "public"."crawl_frontier_blocks" enable row level security;
+
+CREATE UNIQUE INDEX crawl_frontier_blocks_pkey ON public.crawl_frontier_blocks USING btree (domain_id, block_index);
+
+alter table "public"."crawl_frontier_blocks" add constraint "crawl_frontier_blocks_pkey" PRIMARY KEY using index "crawl_frontier_blocks_pkey";
+
+alter table "public"."crawl_frontier_blocks" add constraint "crawl_frontier_blocks_domain_id_fkey" FOREIGN KEY (domain_id) REFERENCES artifact_domains(id) ON DELETE CASCADE not valid;
+
+alter table "public"."crawl_frontier_blocks" validate constraint "crawl_frontier_blocks_domain_id_fkey";
+
+set check_function_bodies = off;
+
+CREATE OR REPLACE FUNCTION public.get_crawl_frontier_blocks(target_domain_id uuid, block_indexes integer[])
+ RETURNS TABLE(block_index integer, bits bigint)
+ LANGUAGE plpgsql
+AS $function$
+BEGIN
+    RETURN QUERY
+    SELECT f.block_index, f.bits
+    FROM public.crawl_frontier_blocks f
+    WHERE f.domain_id = target_domain_id
+      AND f.block_index = ANY(block_indexes);
+END;
+$function$
+;
+
+CREATE OR REPLACE FUNCTION public.add_to_crawl_frontier(target_domain_id uuid, block_indexes integer[], block_masks bigint[])
+ RETURNS integer
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+    blocks_updated INTEGER;
+BEGIN
+    WITH merged_blocks AS (
+        INSERT INTO public.crawl_frontier_blocks (domain_id, block_index, bits)
+        SELECT target_domain_id, m.block_index, m.bits
+        FROM unnest(block_indexes, block_masks) AS m(block_index, bits)
+        ON CONFLICT (domain_id, block_index) DO UPDATE
+            SET bits = crawl_frontier_blocks.bits | EXCLUDED.bits
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO blocks_updated
+    FROM merged_blocks;
+
+    RETURN blocks_updated;
+END;
+$function$
+;
+
+CREATE OR REPLACE FUNCTION public.clear_crawl_frontier(target_domain_id uuid)
+ RETURNS integer
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+    blocks_deleted INTEGER;
+BEGIN
+    DELETE FROM public.crawl_frontier_blocks
+    WHERE domain_id = target_domain_id;
+
+    GET DIAGNOSTICS blocks_deleted = ROW_COUNT;
+    RETURN blocks_deleted;
+END;
+$function$
+;
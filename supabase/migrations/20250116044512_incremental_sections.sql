@@ -0,0 +1,141 @@
+alter table "public"."artifact_contents" add column "content_sha256" text;
+
+-- Hash the stored sections the same way the crawler does, so they are not re-summarized
+UPDATE public.artifact_contents
+SET content_sha256 = encode(sha256(convert_to(parsed_text, 'UTF8')), 'hex')
+WHERE parsed_text IS NOT NULL;
+
+set check_function_bodies = off;
+
+CREATE OR REPLACE FUNCTION public.commit_crawl_result(target_artifact_id uuid, artifact_data jsonb, artifact_contents jsonb)
+ RETURNS jsonb
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+    committed_artifact jsonb;
+    committed_contents jsonb;
+    committed_links jsonb;
+BEGIN
+    -- 0. Drop the sections the page no longer has, along with their links
+    DELETE FROM public.artifact_contents ac
+    WHERE ac.artifact_id = target_artifact_id
+      AND ac.anchor_id NOT IN (
+          SELECT c.anchor_id
+          FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text)
+          WHERE c.anchor_id IS NOT NULL
+      );
+
+    -- 1. Upsert the scraped sections of the artifact
+    --    Unchanged sections come without summary, metadata and embedding and keep the stored ones
+    WITH upserted_contents AS (
+        INSERT INTO public.artifact_contents AS existing (
+            artifact_id,
+            anchor_id,
+            title,
+            parsed_text,
+            content_sha256,
+            summary,
+            metadata,
+            summary_embedding
+        )
+        SELECT
+            target_artifact_id,
+            c.anchor_id,
+            c.title,
+            c.parsed_text,
+            c.content_sha256,
+            c.summary,
+            c.metadata,
+            c.summary_embedding::vector
+        FROM jsonb_to_recordset(artifact_contents) AS c(
+            anchor_id text,
+            title text,
+            parsed_text text,
+            content_sha256 text,
+            summary text,
+            metadata jsonb,
+            summary_embedding text
+        )
+        ON CONFLICT (artifact_id, anchor_id) DO UPDATE
+            SET title             = EXCLUDED.title,
+                parsed_text       = EXCLUDED.parsed_text,
+                content_sha256    = EXCLUDED.content_sha256,
+                summary           = COALESCE(EXCLUDED.summary, existing.summary),
+                metadata          = COALESCE(EXCLUDED.metadata, existing.metadata),
+                summary_embedding = COALESCE(EXCLUDED.summary_embedding, existing.summary_embedding)
+        RETURNING
+            artifact_content_id,
+            created_at,
+            artifact_id,
+            anchor_id,
+            title,
+            parsed_text,
+            content_sha256,
+            summary,
+            metadata
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(upserted_contents)), '[]'::jsonb)
+    INTO committed_contents
+    FROM upserted_contents;
+
+    -- 2. Replace the outbound links of the upserted sections
+    DELETE FROM public.artifact_links al
+    USING public.artifact_contents ac
+    WHERE al.source_artifact_content_id = ac.artifact_content_id
+      AND ac.artifact_id = target_artifact_id
+      AND ac.anchor_id IN (
+          SELECT c.anchor_id
+          FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text)
+      );
+
+    WITH inserted_links AS (
+        INSERT INTO public.artifact_links (
+            source_artifact_content_id,
+            anchor_text,
+            target_url
+        )
+        SELECT
+            ac.artifact_content_id,
+            l.anchor_text,
+            l.target_url
+        FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text, links jsonb)
+        JOIN public.artifact_contents ac
+            ON ac.artifact_id = target_artifact_id
+            AND ac.anchor_id = c.anchor_id
+        CROSS JOIN LATERAL jsonb_to_recordset(COALESCE(c.links, '[]'::jsonb)) AS l(anchor_text text, target_url text)
+        RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(inserted_links)), '[]'::jsonb)
+    INTO committed_links
+    FROM inserted_links;
+
+    -- 3. Mark the artifact as scraped
+    UPDATE public.artifacts a
+    SET crawl_status           = 'scraped',
+        metadata               = artifact_data->'metadata',
+        parsed_text            = artifact_data->>'parsed_text',
+        summary                = artifact_data->>'summary',
+        title                  = artifact_data->>'title',
+        content_sha256         = artifact_data->>'content_sha256',
+        http_etag              = artifact_data->>'http_etag',
+        http_last_modified     = artifact_data->>'http_last_modified',
+        crawled_as_artifact_id = NULL
+    WHERE a.artifact_id = target_artifact_id
+    RETURNING to_jsonb(a.*) INTO committed_artifact;
+
+    IF committed_artifact IS NULL THEN
+        RAISE EXCEPTION 'Artifact % not found', target_artifact_id;
+    END IF;
+
+    -- 4. Drop the scrape kept around for deferred enrichment
+    DELETE FROM public.artifact_scrapes s
+    WHERE s.artifact_id = target_artifact_id;
+
+    RETURN jsonb_build_object(
+        'artifact', committed_artifact,
+        'artifact_contents', committed_contents,
+        'artifact_links', committed_links
+    );
+END;
+$function$
+;
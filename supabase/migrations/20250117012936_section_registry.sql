@@ -0,0 +1,256 @@
+create table "public"."section_registry" (
+    "domain_id" uuid not null,
+    "content_sha256" text not null,
+    "occurrences" integer not null default 0,
+    "summary" text,
+    "metadata" jsonb,
+    "summary_embedding" vector(768),
+    "created_at" timestamp with time zone not null default now()
+);
+
+alter table "public"."section_registry" enable row level security;
+
+CREATE UNIQUE INDEX section_registry_pkey ON public.section_registry USING btree (domain_id, content_sha256);
+
+alter table "public"."section_registry" add constraint "section_registry_pkey" PRIMARY KEY using index "section_registry_pkey";
+
+alter table "public"."section_registry" add constraint "section_registry_domain_id_fkey" FOREIGN KEY (domain_id) REFERENCES artifact_domains(id) ON DELETE CASCADE not valid;
+
+alter table "public"."section_registry" validate constraint "section_registry_domain_id_fkey";
+
+-- Seed the registry with the sections already crawled
+WITH section_counts AS (
+    SELECT a.domain_id, ac.content_sha256, COUNT(DISTINCT ac.artifact_id)::integer AS occurrences
+    FROM public.artifact_contents ac
+    JOIN public.artifacts a ON a.artifact_id = ac.artifact_id
+    WHERE ac.content_sha256 IS NOT NULL
+    GROUP BY a.domain_id, ac.content_sha256
+),
+first_sections AS (
+    SELECT DISTINCT ON (a.domain_id, ac.content_sha256)
+        a.domain_id,
+        ac.content_sha256,
+        ac.summary,
+        ac.metadata,
+        ac.summary_embedding
+    FROM public.artifact_contents ac
+    JOIN public.artifacts a ON a.artifact_id = ac.artifact_id
+    WHERE ac.content_sha256 IS NOT NULL
+    ORDER BY a.domain_id, ac.content_sha256, ac.created_at
+)
+INSERT INTO public.section_registry (domain_id, content_sha256, occurrences, summary, metadata, summary_embedding)
+SELECT f.domain_id, f.content_sha256, c.occurrences, f.summary, f.metadata, f.summary_embedding
+FROM first_sections f
+JOIN section_counts c USING (domain_id, content_sha256);
+
+set check_function_bodies = off;
+
+CREATE OR REPLACE FUNCTION public.get_boilerplate_sections(target_domain_id uuid, content_hashes text[], min_occurrences integer)
+ RETURNS TABLE(content_sha256 text, occurrences integer, summary text, metadata jsonb, summary_embedding text)
+ LANGUAGE plpgsql
+AS $function$
+BEGIN
+    RETURN QUERY
+    SELECT
+        r.content_sha256,
+        r.occurrences,
+        r.summary,
+        r.metadata,
+        r.summary_embedding::text
+    FROM public.section_registry r
+    WHERE r.domain_id = target_domain_id
+      AND r.content_sha256 = ANY(content_hashes)
+      AND r.occurrences >= min_occurrences
+      AND r.summary IS NOT NULL
+      AND r.summary_embedding IS NOT NULL;
+END;
+$function$
+;
+
+CREATE OR REPLACE FUNCTION public.commit_crawl_result(target_artifact_id uuid, artifact_data jsonb, artifact_contents jsonb)
+ RETURNS jsonb
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+    committed_artifact jsonb;
+    committed_contents jsonb;
+    committed_links jsonb;
+    artifact_domain_id uuid;
+    previous_hashes text[];
+    committed_hashes text[];
+BEGIN
+    SELECT a.domain_id INTO artifact_domain_id
+    FROM public.artifacts a
+    WHERE a.artifact_id = target_artifact_id;
+
+    SELECT COALESCE(array_agg(DISTINCT ac.content_sha256), '{}')
+    INTO previous_hashes
+    FROM public.artifact_contents ac
+    WHERE ac.artifact_id = target_artifact_id
+      AND ac.content_sha256 IS NOT NULL;
+
+    SELECT COALESCE(array_agg(DISTINCT c.content_sha256), '{}')
+    INTO committed_hashes
+    FROM jsonb_to_recordset(artifact_contents) AS c(content_sha256 text)
+    WHERE c.content_sha256 IS NOT NULL;
+
+    -- 0. Drop the sections the page no longer has, along with their links
+    DELETE FROM public.artifact_contents ac
+    WHERE ac.artifact_id = target_artifact_id
+      AND ac.anchor_id NOT IN (
+          SELECT c.anchor_id
+          FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text)
+          WHERE c.anchor_id IS NOT NULL
+      );
+
+    -- 1. Upsert the scraped sections of the artifact
+    --    Unchanged sections come without summary, metadata and embedding and keep the stored ones
+    WITH upserted_contents AS (
+        INSERT INTO public.artifact_contents AS existing (
+            artifact_id,
+            anchor_id,
+            title,
+            parsed_text,
+            content_sha256,
+            summary,
+            metadata,
+            summary_embedding
+        )
+        SELECT
+            target_artifact_id,
+            c.anchor_id,
+            c.title,
+            c.parsed_text,
+            c.content_sha256,
+            c.summary,
+            c.metadata,
+            c.summary_embedding::vector
+        FROM jsonb_to_recordset(artifact_contents) AS c(
+            anchor_id text,
+            title text,
+            parsed_text text,
+            content_sha256 text,
+            summary text,
+            metadata jsonb,
+            summary_embedding text
+        )
+        ON CONFLICT (artifact_id, anchor_id) DO UPDATE
+            SET title             = EXCLUDED.title,
+                parsed_text       = EXCLUDED.parsed_text,
+                content_sha256    = EXCLUDED.content_sha256,
+                summary           = COALESCE(EXCLUDED.summary, existing.summary),
+                metadata          = COALESCE(EXCLUDED.metadata, existing.metadata),
+                summary_embedding = COALESCE(EXCLUDED.summary_embedding, existing.summary_embedding)
+        RETURNING
+            artifact_content_id,
+            created_at,
+            artifact_id,
+            anchor_id,
+            title,
+            parsed_text,
+            content_sha256,
+            summary,
+            metadata
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(upserted_contents)), '[]'::jsonb)
+    INTO committed_contents
+    FROM upserted_contents;
+
+    -- 2. Replace the outbound links of the upserted sections
+    DELETE FROM public.artifact_links al
+    USING public.artifact_contents ac
+    WHERE al.source_artifact_content_id = ac.artifact_content_id
+      AND ac.artifact_id = target_artifact_id
+      AND ac.anchor_id IN (
+          SELECT c.anchor_id
+          FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text)
+      );
+
+    WITH inserted_links AS (
+        INSERT INTO public.artifact_links (
+            source_artifact_content_id,
+            anchor_text,
+            target_url
+        )
+        SELECT
+            ac.artifact_content_id,
+            l.anchor_text,
+            l.target_url
+        FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text, links jsonb)
+        JOIN public.artifact_contents ac
+            ON ac.artifact_id = target_artifact_id
+            AND ac.anchor_id = c.anchor_id
+        CROSS JOIN LATERAL jsonb_to_recordset(COALESCE(c.links, '[]'::jsonb)) AS l(anchor_text text, target_url text)
+        RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(inserted_links)), '[]'::jsonb)
+    INTO committed_links
+    FROM inserted_links;
+
+    -- 3. Count the sections this artifact gained or lost in the domain's section registry,
+    --    keeping the first summary and embedding seen for each section
+    INSERT INTO public.section_registry AS r (
+        domain_id,
+        content_sha256,
+        occurrences,
+        summary,
+        metadata,
+        summary_embedding
+    )
+    SELECT DISTINCT ON (c.content_sha256)
+        artifact_domain_id,
+        c.content_sha256,
+        CASE WHEN c.content_sha256 = ANY(previous_hashes) THEN 0 ELSE 1 END,
+        c.summary,
+        c.metadata,
+        c.summary_embedding::vector
+    FROM jsonb_to_recordset(artifact_contents) AS c(
+        content_sha256 text,
+        summary text,
+        metadata jsonb,
+        summary_embedding text
+    )
+    WHERE c.content_sha256 IS NOT NULL
+    ORDER BY c.content_sha256, c.summary IS NULL
+    ON CONFLICT (domain_id, content_sha256) DO UPDATE
+        SET occurrences       = r.occurrences + EXCLUDED.occurrences,
+            summary           = COALESCE(r.summary, EXCLUDED.summary),
+            metadata          = COALESCE(r.metadata, EXCLUDED.metadata),
+            summary_embedding = COALESCE(r.summary_embedding, EXCLUDED.summary_embedding);
+
+    UPDATE public.section_registry r
+    SET occurrences = GREATEST(r.occurrences - 1, 0)
+    WHERE r.domain_id = artifact_domain_id
+      AND r.content_sha256 = ANY(previous_hashes)
+      AND NOT r.content_sha256 = ANY(committed_hashes);
+
+    -- 4. Mark the artifact as scraped
+    UPDATE public.artifacts a
+    SET crawl_status           = 'scraped',
+        metadata               = artifact_data->'metadata',
+        parsed_text            = artifact_data->>'parsed_text',
+        summary                = artifact_data->>'summary',
+        title                  = artifact_data->>'title',
+        content_sha256         = artifact_data->>'content_sha256',
+        http_etag              = artifact_data->>'http_etag',
+        http_last_modified     = artifact_data->>'http_last_modified',
+        crawled_as_artifact_id = NULL
+    WHERE a.artifact_id = target_artifact_id
+    RETURNING to_jsonb(a.*) INTO committed_artifact;
+
+    IF committed_artifact IS NULL THEN
+        RAISE EXCEPTION 'Artifact % not found', target_artifact_id;
+    END IF;
+
+    -- 5. Drop the scrape kept around for deferred enrichment
+    DELETE FROM public.artifact_scrapes s
+    WHERE s.artifact_id = target_artifact_id;
+
+    RETURN jsonb_build_object(
+        'artifact', committed_artifact,
+        'artifact_contents', committed_contents,
+        'artifact_links', committed_links
+    );
+END;
+$function$
+;
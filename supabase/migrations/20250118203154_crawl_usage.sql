@@ -0,0 +1,311 @@
+create table "public"."artifact_crawl_usage" (
+    "id" uuid not null default gen_random_uuid(),
+    "artifact_id" uuid not null,
+    "domain_id" uuid not null,
+    "llm_requests" integer not null default 0,
+    "cached_llm_responses" integer not null default 0,
+    "prompt_tokens" integer not null default 0,
+    "cached_prompt_tokens" integer not null default 0,
+    "completion_tokens" integer not null default 0,
+    "embedding_tokens" integer not null default 0,
+    "cost_usd" double precision not null default 0,
+    "created_at" timestamp with time zone not null default now()
+);
+
+alter table "public"."artifact_crawl_usage" enable row level security;
+
+CREATE UNIQUE INDEX artifact_crawl_usage_pkey ON public.artifact_crawl_usage USING btree (id);
+
+CREATE INDEX artifact_crawl_usage_artifact_id_idx ON public.artifact_crawl_usage USING btree (artifact_id);
+
+CREATE INDEX artifact_crawl_usage_domain_id_idx ON public.artifact_crawl_usage USING btree (domain_id);
+
+alter table "public"."artifact_crawl_usage" add constraint "artifact_crawl_usage_pkey" PRIMARY KEY using index "artifact_crawl_usage_pkey";
+
+alter table "public"."artifact_crawl_usage" add constraint "artifact_crawl_usage_artifact_id_fkey" FOREIGN KEY (artifact_id) REFERENCES artifacts(artifact_id) ON DELETE CASCADE not valid;
+
+alter table "public"."artifact_crawl_usage" validate constraint "artifact_crawl_usage_artifact_id_fkey";
+
+alter table "public"."artifact_crawl_usage" add constraint "artifact_crawl_usage_domain_id_fkey" FOREIGN KEY (domain_id) REFERENCES artifact_domains(id) ON DELETE CASCADE not valid;
+
+alter table "public"."artifact_crawl_usage" validate constraint "artifact_crawl_usage_domain_id_fkey";
+
+create policy "Allow all users to query artifact_crawl_usage"
+on "public"."artifact_crawl_usage"
+as permissive
+for select
+to authenticated
+using (true);
+
+set check_function_bodies = off;
+
+CREATE OR REPLACE FUNCTION public.get_domain_crawl_usage(target_domain_id uuid)
+ RETURNS TABLE(crawls bigint, artifacts bigint, llm_requests bigint, cached_llm_responses bigint, prompt_tokens bigint, cached_prompt_tokens bigint, completion_tokens bigint, embedding_tokens bigint, cost_usd double precision)
+ LANGUAGE plpgsql
+AS $function$
+BEGIN
+    RETURN QUERY
+    SELECT
+        COUNT(*),
+        COUNT(DISTINCT u.artifact_id),
+        COALESCE(SUM(u.llm_requests), 0)::bigint,
+        COALESCE(SUM(u.cached_llm_responses), 0)::bigint,
+        COALESCE(SUM(u.prompt_tokens), 0)::bigint,
+        COALESCE(SUM(u.cached_prompt_tokens), 0)::bigint,
+        COALESCE(SUM(u.completion_tokens), 0)::bigint,
+        COALESCE(SUM(u.embedding_tokens), 0)::bigint,
+        COALESCE(SUM(u.cost_usd), 0)::double precision
+    FROM public.artifact_crawl_usage u
+    WHERE u.domain_id = target_domain_id;
+END;
+$function$
+;
+
+CREATE OR REPLACE FUNCTION public.get_most_expensive_artifacts(target_domain_id uuid, max_results integer DEFAULT 20)
+ RETURNS TABLE(artifact_id uuid, url text, crawls bigint, prompt_tokens bigint, completion_tokens bigint, embedding_tokens bigint, cost_usd double precision)
+ LANGUAGE plpgsql
+AS $function$
+BEGIN
+    RETURN QUERY
+    SELECT
+        u.artifact_id,
+        a.url,
+        COUNT(*),
+        SUM(u.prompt_tokens)::bigint,
+        SUM(u.completion_tokens)::bigint,
+        SUM(u.embedding_tokens)::bigint,
+        SUM(u.cost_usd)::double precision
+    FROM public.artifact_crawl_usage u
+    JOIN public.artifacts a ON a.artifact_id = u.artifact_id
+    WHERE u.domain_id = target_domain_id
+    GROUP BY u.artifact_id, a.url
+    ORDER BY SUM(u.cost_usd) DESC, SUM(u.prompt_tokens + u.completion_tokens) DESC
+    LIMIT max_results;
+END;
+$function$
+;
+
+-- The usage of a crawl is committed in the same transaction as its result
+DROP FUNCTION IF EXISTS public.commit_crawl_result(uuid, jsonb, jsonb);
+
+CREATE OR REPLACE FUNCTION public.commit_crawl_result(target_artifact_id uuid, artifact_data jsonb, artifact_contents jsonb, crawl_usage jsonb DEFAULT NULL)
+ RETURNS jsonb
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+    committed_artifact jsonb;
+    committed_contents jsonb;
+    committed_links jsonb;
+    artifact_domain_id uuid;
+    previous_hashes text[];
+    committed_hashes text[];
+BEGIN
+    SELECT a.domain_id INTO artifact_domain_id
+    FROM public.artifacts a
+    WHERE a.artifact_id = target_artifact_id;
+
+    SELECT COALESCE(array_agg(DISTINCT ac.content_sha256), '{}')
+    INTO previous_hashes
+    FROM public.artifact_contents ac
+    WHERE ac.artifact_id = target_artifact_id
+      AND ac.content_sha256 IS NOT NULL;
+
+    SELECT COALESCE(array_agg(DISTINCT c.content_sha256), '{}')
+    INTO committed_hashes
+    FROM jsonb_to_recordset(artifact_contents) AS c(content_sha256 text)
+    WHERE c.content_sha256 IS NOT NULL;
+
+    -- 0. Drop the sections the page no longer has, along with their links
+    DELETE FROM public.artifact_contents ac
+    WHERE ac.artifact_id = target_artifact_id
+      AND ac.anchor_id NOT IN (
+          SELECT c.anchor_id
+          FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text)
+          WHERE c.anchor_id IS NOT NULL
+      );
+
+    -- 1. Upsert the scraped sections of the artifact
+    --    Unchanged sections come without summary, metadata and embedding and keep the stored ones
+    WITH upserted_contents AS (
+        INSERT INTO public.artifact_contents AS existing (
+            artifact_id,
+            anchor_id,
+            title,
+            parsed_text,
+            content_sha256,
+            summary,
+            metadata,
+            summary_embedding
+        )
+        SELECT
+            target_artifact_id,
+            c.anchor_id,
+            c.title,
+            c.parsed_text,
+            c.content_sha256,
+            c.summary,
+            c.metadata,
+            c.summary_embedding::vector
+        FROM jsonb_to_recordset(artifact_contents) AS c(
+            anchor_id text,
+            title text,
+            parsed_text text,
+            content_sha256 text,
+            summary text,
+            metadata jsonb,
+            summary_embedding text
+        )
+        ON CONFLICT (artifact_id, anchor_id) DO UPDATE
+            SET title             = EXCLUDED.title,
+                parsed_text       = EXCLUDED.parsed_text,
+                content_sha256    = EXCLUDED.content_sha256,
+                summary           = COALESCE(EXCLUDED.summary, existing.summary),
+                metadata          = COALESCE(EXCLUDED.metadata, existing.metadata),
+                summary_embedding = COALESCE(EXCLUDED.summary_embedding, existing.summary_embedding)
+        RETURNING
+            artifact_content_id,
+            created_at,
+            artifact_id,
+            anchor_id,
+            title,
+            parsed_text,
+            content_sha256,
+            summary,
+            metadata
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(upserted_contents)), '[]'::jsonb)
+    INTO committed_contents
+    FROM upserted_contents;
+
+    -- 2. Replace the outbound links of the upserted sections
+    DELETE FROM public.artifact_links al
+    USING public.artifact_contents ac
+    WHERE al.source_artifact_content_id = ac.artifact_content_id
+      AND ac.artifact_id = target_artifact_id
+      AND ac.anchor_id IN (
+          SELECT c.anchor_id
+          FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text)
+      );
+
+    WITH inserted_links AS (
+        INSERT INTO public.artifact_links (
+            source_artifact_content_id,
+            anchor_text,
+            target_url
+        )
+        SELECT
+            ac.artifact_content_id,
+            l.anchor_text,
+            l.target_url
+        FROM jsonb_to_recordset(artifact_contents) AS c(anchor_id text, links jsonb)
+        JOIN public.artifact_contents ac
+            ON ac.artifact_id = target_artifact_id
+            AND ac.anchor_id = c.anchor_id
+        CROSS JOIN LATERAL jsonb_to_recordset(COALESCE(c.links, '[]'::jsonb)) AS l(anchor_text text, target_url text)
+        RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(inserted_links)), '[]'::jsonb)
+    INTO committed_links
+    FROM inserted_links;
+
+    -- 3. Count the sections this artifact gained or lost in the domain's section registry,
+    --    keeping the first summary and embedding seen for each section
+    INSERT INTO public.section_registry AS r (
+        domain_id,
+        content_sha256,
+        occurrences,
+        summary,
+        metadata,
+        summary_embedding
+    )
+    SELECT DISTINCT ON (c.content_sha256)
+        artifact_domain_id,
+        c.content_sha256,
+        CASE WHEN c.content_sha256 = ANY(previous_hashes) THEN 0 ELSE 1 END,
+        c.summary,
+        c.metadata,
+        c.summary_embedding::vector
+    FROM jsonb_to_recordset(artifact_contents) AS c(
+        content_sha256 text,
+        summary text,
+        metadata jsonb,
+        summary_embedding text
+    )
+    WHERE c.content_sha256 IS NOT NULL
+    ORDER BY c.content_sha256, c.summary IS NULL
+    ON CONFLICT (domain_id, content_sha256) DO UPDATE
+        SET occurrences       = r.occurrences + EXCLUDED.occurrences,
+            summary           = COALESCE(r.summary, EXCLUDED.summary),
+            metadata          = COALESCE(r.metadata, EXCLUDED.metadata),
+            summary_embedding = COALESCE(r.summary_embedding, EXCLUDED.summary_embedding);
+
+    UPDATE public.section_registry r
+    SET occurrences = GREATEST(r.occurrences - 1, 0)
+    WHERE r.domain_id = artifact_domain_id
+      AND r.content_sha256 = ANY(previous_hashes)
+      AND NOT r.content_sha256 = ANY(committed_hashes);
+
+    -- 4. Mark the artifact as scraped
+    UPDATE public.artifacts a
+    SET crawl_status           = 'scraped',
+        metadata               = artifact_data->'metadata',
+        parsed_text            = artifact_data->>'parsed_text',
+        summary                = artifact_data->>'summary',
+        title                  = artifact_data->>'title',
+        content_sha256         = artifact_data->>'content_sha256',
+        http_etag              = artifact_data->>'http_etag',
+        http_last_modified     = artifact_data->>'http_last_modified',
+        crawled_as_artifact_id = NULL
+    WHERE a.artifact_id = target_artifact_id
+    RETURNING to_jsonb(a.*) INTO committed_artifact;
+
+    IF committed_artifact IS NULL THEN
+        RAISE EXCEPTION 'Artifact % not found', target_artifact_id;
+    END IF;
+
+    -- 5. Drop the scrape kept around for deferred enrichment
+    DELETE FROM public.artifact_scrapes s
+    WHERE s.artifact_id = target_artifact_id;
+
+    -- 6. Record the LLM and embedding usage of this crawl along with its result
+    IF crawl_usage IS NOT NULL THEN
+        INSERT INTO public.artifact_crawl_usage (
+            artifact_id,
+            domain_id,
+            llm_requests,
+            cached_llm_responses,
+            prompt_tokens,
+            cached_prompt_tokens,
+            completion_tokens,
+            embedding_tokens,
+            cost_usd
+        )
+        SELECT
+            target_artifact_id,
+            artifact_domain_id,
+            COALESCE(u.llm_requests, 0),
+            COALESCE(u.cached_llm_responses, 0),
+            COALESCE(u.prompt_tokens, 0),
+            COALESCE(u.cached_prompt_tokens, 0),
+            COALESCE(u.completion_tokens, 0),
+            COALESCE(u.embedding_tokens, 0),
+            COALESCE(u.cost_usd, 0)
+        FROM jsonb_to_record(crawl_usage) AS u(
+            llm_requests integer,
+            cached_llm_responses integer,
+            prompt_tokens integer,
+            cached_prompt_tokens integer,
+            completion_tokens integer,
+            embedding_tokens integer,
+            cost_usd double precision
+        );
+    END IF;
+
+    RETURN jsonb_build_object(
+        'artifact', committed_artifact,
+        'artifact_contents', committed_contents,
+        'artifact_links', committed_links
+    );
+END;
+$function$
+;
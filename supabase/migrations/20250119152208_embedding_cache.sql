@@ -0,0 +1,14 @@
+create table "public"."embedding_cache" (
+    "model" text not null,
+    "task_type" text not null,
+    "dimensionality" integer not null,
+    "content_sha256" text not null,
+    "embedding" real[] not null,
+    "created_at" timestamp with time zone not null default now()
+);
+
+alter table "public"."embedding_cache" enable row level security;
+
+CREATE UNIQUE INDEX embedding_cache_pkey ON public.embedding_cache USING btree (model, task_type, dimensionality, content_sha256);
+
+alter table "public"."embedding_cache" add constraint "embedding_cache_pkey" PRIMARY KEY using index "embedding_cache_pkey";
@@ -0,0 +1,100 @@
+begin;
+select plan(9);
+
+-- 1. Insert two domains, with two pages in the first one and one in the second
+insert into public.artifact_domains (id, name, config, visibility)
+values
+  ('00000000-0000-0000-0000-000000000001', 'Test Domain A', '{}', 'public'),
+  ('00000000-0000-0000-0000-000000000002', 'Test Domain B', '{}', 'public');
+
+insert into public.artifacts (
+  artifact_id, url, domain_id, crawl_depth, crawl_status
+) values
+  ('11111111-1111-1111-1111-111111111111', 'https://example.com/cheap', '00000000-0000-0000-0000-000000000001', 0, 'scraping'),
+  ('11111111-1111-1111-1111-222222222222', 'https://example.com/expensive', '00000000-0000-0000-0000-000000000001', 0, 'scraping'),
+  ('22222222-2222-2222-2222-333333333333', 'https://otherdomain.com/b1', '00000000-0000-0000-0000-000000000002', 0, 'scraping');
+
+create function pg_temp.commit_page(artifact_id uuid, crawl_usage jsonb)
+returns jsonb
+language sql
+as $$
+  select public.commit_crawl_result(
+    artifact_id,
+    jsonb_build_object('metadata', '{}'::jsonb, 'parsed_text', 'Page', 'summary', 'Page summary', 'title', 'Page', 'content_sha256', 'page'),
+    '[]'::jsonb,
+    crawl_usage
+  );
+$$;
+
+-- 2. Commit the pages with their usage; the expensive page is crawled twice
+select lives_ok(
+  $$ select pg_temp.commit_page('11111111-1111-1111-1111-111111111111', jsonb_build_object(
+       'llm_requests', 2, 'cached_llm_responses', 1, 'prompt_tokens', 100, 'cached_prompt_tokens', 50,
+       'completion_tokens', 10, 'embedding_tokens', 20, 'cost_usd', 0.01
+     )) $$,
+  'The cheap page commits with its usage.'
+);
+select lives_ok(
+  $$ select pg_temp.commit_page('11111111-1111-1111-1111-222222222222', jsonb_build_object(
+       'llm_requests', 5, 'cached_llm_responses', 0, 'prompt_tokens', 1000, 'cached_prompt_tokens', 0,
+       'completion_tokens', 200, 'embedding_tokens', 300, 'cost_usd', 0.5
+     )) $$,
+  'The expensive page commits with its usage.'
+);
+select lives_ok(
+  $$ select pg_temp.commit_page('11111111-1111-1111-1111-222222222222', jsonb_build_object(
+       'llm_requests', 1, 'prompt_tokens', 400, 'completion_tokens', 100, 'cost_usd', 0.25
+     )) $$,
+  'The expensive page commits again, with some usage fields left out.'
+);
+select lives_ok(
+  $$ select pg_temp.commit_page('22222222-2222-2222-2222-333333333333', jsonb_build_object(
+       'llm_requests', 9, 'prompt_tokens', 9000, 'completion_tokens', 900, 'cost_usd', 9
+     )) $$,
+  'A page of another domain commits with its usage.'
+);
+
+-- 3. Every commit with usage records one row for its crawl
+select is(
+  (select count(*)::integer from public.artifact_crawl_usage
+   where artifact_id = '11111111-1111-1111-1111-111111111111'),
+  1,
+  'Each commit with usage records one usage row.'
+);
+
+-- 4. The domain rollup sums only the domain's crawls, treating missing fields as 0
+select results_eq(
+  $$ select crawls, artifacts, llm_requests, cached_llm_responses, prompt_tokens,
+            cached_prompt_tokens, completion_tokens, embedding_tokens, round(cost_usd::numeric, 6)
+     from public.get_domain_crawl_usage('00000000-0000-0000-0000-000000000001') $$,
+  $$ values (3::bigint, 2::bigint, 8::bigint, 1::bigint, 1500::bigint,
+             50::bigint, 310::bigint, 320::bigint, 0.76::numeric) $$,
+  'Domain usage sums the crawls of the domain only.'
+);
+
+select results_eq(
+  $$ select crawls, cost_usd
+     from public.get_domain_crawl_usage('00000000-0000-0000-0000-00000000ffff') $$,
+  $$ values (0::bigint, 0::double precision) $$,
+  'A domain without crawls has zero usage.'
+);
+
+-- 5. The most expensive pages come first, with their crawls summed
+select results_eq(
+  $$ select url, crawls, prompt_tokens, completion_tokens, embedding_tokens, round(cost_usd::numeric, 6)
+     from public.get_most_expensive_artifacts('00000000-0000-0000-0000-000000000001') $$,
+  $$ values
+       ('https://example.com/expensive'::text, 2::bigint, 1400::bigint, 300::bigint, 300::bigint, 0.75::numeric),
+       ('https://example.com/cheap'::text, 1::bigint, 100::bigint, 10::bigint, 20::bigint, 0.01::numeric) $$,
+  'Pages are ranked by their total cost.'
+);
+
+select results_eq(
+  $$ select url
+     from public.get_most_expensive_artifacts('00000000-0000-0000-0000-000000000001', 1) $$,
+  $$ values ('https://example.com/expensive'::text) $$,
+  'max_results caps the number of pages returned.'
+);
+
+select * from finish();
+rollback;
@@ -0,0 +1,119 @@
+begin;
+select plan(12);
+
+-- 1. Insert a domain with two pages
+insert into public.artifact_domains (id, name, config, visibility)
+values
+  ('00000000-0000-0000-0000-000000000001', 'Test Domain', '{}', 'public');
+
+insert into public.artifacts (
+  artifact_id, url, domain_id, crawl_depth, crawl_status
+) values
+  ('11111111-1111-1111-1111-111111111111', 'https://example.com/p1', '00000000-0000-0000-0000-000000000001', 0, 'scraping'),
+  ('11111111-1111-1111-1111-222222222222', 'https://example.com/p2', '00000000-0000-0000-0000-000000000001', 0, 'scraping');
+
+-- Builds one section of the artifact_contents payload, with a summary and embedding when given
+create function pg_temp.section(anchor_id text, content_sha256 text, summary text default null)
+returns jsonb
+language sql
+as $$
+  select jsonb_build_object(
+    'anchor_id', anchor_id,
+    'title', anchor_id,
+    'parsed_text', 'Text of ' || content_sha256,
+    'content_sha256', content_sha256,
+    'summary', summary,
+    'metadata', case when summary is null then null else '{}'::jsonb end,
+    'summary_embedding', case when summary is null then null else array_fill(0.1, array[768])::vector(768)::text end,
+    'links', '[]'::jsonb
+  );
+$$;
+
+create function pg_temp.commit_page(artifact_id uuid, sections jsonb)
+returns jsonb
+language sql
+as $$
+  select public.commit_crawl_result(
+    artifact_id,
+    jsonb_build_object('metadata', '{}'::jsonb, 'parsed_text', 'Page', 'summary', 'Page summary', 'title', 'Page', 'content_sha256', 'page'),
+    sections
+  );
+$$;
+
+create function pg_temp.occurrences(target_content_sha256 text)
+returns integer
+language sql
+as $$
+  select r.occurrences
+  from public.section_registry r
+  where r.domain_id = '00000000-0000-0000-0000-000000000001'
+    and r.content_sha256 = target_content_sha256;
+$$;
+
+-- 2. Both pages share a footer; each has a section of its own
+select lives_ok(
+  $$ select pg_temp.commit_page('11111111-1111-1111-1111-111111111111', jsonb_build_array(
+       pg_temp.section('footer', 'h-footer', 'Footer summary'),
+       pg_temp.section('intro', 'h-intro', 'Intro summary')
+     )) $$,
+  'The first page commits.'
+);
+select lives_ok(
+  $$ select pg_temp.commit_page('11111111-1111-1111-1111-222222222222', jsonb_build_array(
+       pg_temp.section('footer', 'h-footer'),
+       pg_temp.section('other', 'h-other', 'Other summary')
+     )) $$,
+  'The second page commits.'
+);
+
+select is(pg_temp.occurrences('h-footer'), 2, 'A section on two pages is counted twice.');
+select is(pg_temp.occurrences('h-intro'), 1, 'A section on one page is counted once.');
+
+-- 3. Committing the same page again does not count its sections again
+select lives_ok(
+  $$ select pg_temp.commit_page('11111111-1111-1111-1111-111111111111', jsonb_build_array(
+       pg_temp.section('footer', 'h-footer'),
+       pg_temp.section('intro', 'h-intro')
+     )) $$,
+  'The first page commits again unchanged.'
+);
+
+select is(pg_temp.occurrences('h-footer'), 2, 'Re-committing a page does not double-count its sections.');
+
+-- 4. The page's intro changes: the old hash loses the page and the new one gains it
+select lives_ok(
+  $$ select pg_temp.commit_page('11111111-1111-1111-1111-111111111111', jsonb_build_array(
+       pg_temp.section('footer', 'h-footer'),
+       pg_temp.section('intro', 'h-intro-v2', 'New intro summary')
+     )) $$,
+  'The first page commits with a changed intro.'
+);
+
+select is(pg_temp.occurrences('h-intro'), 0, 'A section a page no longer has is decremented.');
+select is(pg_temp.occurrences('h-intro-v2'), 1, 'A section a page gains is incremented.');
+select is(pg_temp.occurrences('h-footer'), 2, 'Sections kept across commits keep their count.');
+
+-- 5. Only sections on enough pages, with a stored summary and embedding, are boilerplate
+select results_eq(
+  $$ select content_sha256, occurrences, summary
+     from public.get_boilerplate_sections(
+       '00000000-0000-0000-0000-000000000001',
+       array['h-footer', 'h-intro', 'h-intro-v2', 'h-other'],
+       2
+     ) $$,
+  $$ values ('h-footer'::text, 2, 'Footer summary'::text) $$,
+  'Only the footer is on at least 2 pages, and it keeps the first summary seen.'
+);
+
+select is(
+  (select count(*)::integer from public.get_boilerplate_sections(
+     '00000000-0000-0000-0000-000000000001',
+     array['h-footer', 'h-intro', 'h-intro-v2', 'h-other'],
+     1
+  )),
+  3,
+  'With a threshold of 1, every section still on a page is boilerplate.'
+);
+
+select * from finish();
+rollback;